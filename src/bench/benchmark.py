@@ -0,0 +1,458 @@
+"""
+Banc de mesure reproductible par étage (VAD, STT, MT, TTS) et pipeline complet.
+
+Chaque étage est exécuté sur un corpus fixe (clips synthétiques déterminés
+par une graine + enregistrements comme out1.wav). Le rapport JSON contient
+le facteur temps réel (RTF), les latences p50/p95, le temps CPU et le pic de
+RSS, et peut être comparé à une référence avec des seuils de régression.
+
+Usage:
+    python -m src.bench.benchmark --stages vad,stt --model-size small \\
+        --output bench.json --baseline benchmarks/baseline.json
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import gc
+import platform
+import subprocess
+import sys
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from src.core.playback import resample_linear
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_RATE = 16000
+# Bloc de capture du micro (pipeline_meet) : la VAD reçoit des blocs de cette taille en production
+CAPTURE_BLOCK = 4096
+
+# Phrases fixes pour MT/TTS (langue source, texte)
+SENTENCES = (
+    ("fr", "Bonjour à tous, merci d'être présents à cette réunion."),
+    ("fr", "Nous allons commencer par un point rapide sur le planning du projet."),
+    ("en", "Could you share your screen so that everyone can follow along?"),
+    ("en", "I think we should postpone the release until the tests are green."),
+)
+
+# File audio bloquante : aucun chunk du corpus n'est jeté
+BENCH_QUEUE_POLICIES = {"audio": {"policy": "block", "maxsize": 256}}
+# Seuils de régression par défaut : hausse relative tolérée
+DEFAULT_THRESHOLDS = {"rtf": 0.10, "p50_ms": 0.10, "p95_ms": 0.15, "cpu_s": 0.10, "peak_rss_mb": 0.10}
+
+
+class Clip:
+    """Clip audio mono 16 kHz du corpus."""
+
+    def __init__(self, name: str, audio: np.ndarray):
+        self.name = name
+        self.audio = audio.astype(np.float32)
+
+    @property
+    def duration(self) -> float:
+        return len(self.audio) / SAMPLE_RATE
+
+
+def synthetic_clip(name: str, seconds: float, seed: int) -> Clip:
+    """Alternance de « syllabes » harmoniques et de silences bruités, déterministe."""
+    rng = np.random.default_rng(seed)
+    audio = rng.normal(0, 0.003, int(seconds * SAMPLE_RATE))
+    t = np.arange(int(0.25 * SAMPLE_RATE)) / SAMPLE_RATE
+    position = int(0.3 * SAMPLE_RATE)
+    while position + len(t) < len(audio):
+        f0 = rng.uniform(110, 220)
+        syllable = sum(np.sin(2 * np.pi * f0 * k * t) / k for k in range(1, 6))
+        audio[position:position + len(t)] += 0.2 * syllable * np.hanning(len(t))
+        position += len(t) + int(rng.uniform(0.05, 0.6) * SAMPLE_RATE)
+    return Clip(name, audio)
+
+
+def load_clip(path: str) -> Clip:
+    import soundfile as sf
+    audio, sr = sf.read(path, dtype="float32", always_2d=True)
+    return Clip(os.path.basename(path), resample_linear(audio.mean(axis=1), sr, SAMPLE_RATE))
+
+
+def build_corpus(paths: Sequence[str] = ("out1.wav",), synthetic_seconds: Sequence[float] = (2, 5, 10),
+                 seed: int = 0) -> List[Clip]:
+    corpus = [synthetic_clip(f"synthetic_{s:g}s", s, seed + i) for i, s in enumerate(synthetic_seconds)]
+    for path in paths:
+        if os.path.exists(path):
+            corpus.append(load_clip(path))
+        else:
+            logger.warning(f"Clip absent, ignoré: {path}")
+    return corpus
+
+
+def current_rss_mb() -> Optional[float]:
+    """RSS courant du processus (/proc sous Linux, sinon psutil) ; None si indisponible."""
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import psutil
+    except ImportError:
+        return None
+    return psutil.Process().memory_info().rss / (1024 * 1024)
+
+
+class PeakRssSampler:
+    """
+    RSS maximal pendant un étage : un thread relève le RSS courant toutes les
+    `interval_s` secondes (ru_maxrss est un maximum sur toute la vie du
+    processus, inutilisable étage par étage). Un pic plus bref que
+    l'intervalle peut échapper à la mesure.
+    """
+
+    def __init__(self, interval_s: float = 0.01):
+        self.interval_s = interval_s
+        self.start_mb: Optional[float] = None
+        self.peak_mb: Optional[float] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _sample(self):
+        rss = current_rss_mb()
+        if rss is not None and (self.peak_mb is None or rss > self.peak_mb):
+            self.peak_mb = rss
+
+    def _run(self):
+        while not self._stop.wait(self.interval_s):
+            self._sample()
+
+    def __enter__(self):
+        self.start_mb = current_rss_mb()
+        self.peak_mb = self.start_mb
+        self._thread = threading.Thread(target=self._run, name="bench-rss", daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self._sample()
+        return False
+
+
+def summarize(latencies: Sequence[float], wall_s: float, cpu_s: float, audio_s: Optional[float]) -> dict:
+    """Statistiques d'un étage ; audio_s=None si le RTF n'a pas de sens (MT)."""
+    latencies_ms = np.asarray(latencies, dtype=np.float64) * 1000
+    p50, p95 = np.percentile(latencies_ms, [50, 95]) if len(latencies_ms) else (0.0, 0.0)
+    return {
+        "runs": len(latencies_ms),
+        "wall_s": round(wall_s, 4),
+        "cpu_s": round(cpu_s, 4),
+        "rtf": round(wall_s / audio_s, 4) if audio_s else None,
+        "p50_ms": round(float(p50), 2),
+        "p95_ms": round(float(p95), 2),
+    }
+
+
+def run_stage(calls: Sequence[Callable[[], object]], audio_s: Optional[float] = None,
+              warmup: int = 1, repeat: int = 1) -> dict:
+    """Mesure chaque appel (latence), le temps total et le CPU consommé."""
+    for call in calls[:warmup]:
+        call()
+    latencies = []
+    wall_start, cpu_start = time.perf_counter(), time.process_time()
+    for _ in range(repeat):
+        for call in calls:
+            start = time.perf_counter()
+            call()
+            latencies.append(time.perf_counter() - start)
+    wall_s = time.perf_counter() - wall_start
+    cpu_s = time.process_time() - cpu_start
+    return summarize(latencies, wall_s, cpu_s, audio_s * repeat if audio_s else None)
+
+
+def bench_vad(corpus: List[Clip], vad_backend: str = "torch", repeat: int = 1) -> dict:
+    from src.core.vad import VADDetector, OnnxVADDetector
+    vad = OnnxVADDetector() if vad_backend == "onnx" else VADDetector()
+
+    def clip_call(clip):
+        def call():
+            vad.reset()
+            for i in range(0, len(clip.audio), CAPTURE_BLOCK):
+                vad.process_chunk(clip.audio[i:i + CAPTURE_BLOCK])
+        return call
+
+    return run_stage([clip_call(c) for c in corpus], sum(c.duration for c in corpus), repeat=repeat)
+
+
+def bench_stt(corpus: List[Clip], model_size: str, device: str, repeat: int = 1) -> dict:
+    from src.stt.transcriber import Transcriber
+    transcriber = Transcriber(model_size=model_size, device=device)
+    calls = [lambda c=c: transcriber.transcribe(c.audio, language="fr") for c in corpus]
+    return run_stage(calls, sum(c.duration for c in corpus), repeat=repeat)
+
+
+def bench_fr_en(corpus: List[Clip], model_size: str, device: str, direct: bool, repeat: int = 1) -> dict:
+    """
+    Parole française -> texte anglais : Whisper seul (task="translate") ou
+    cascade Whisper + MarianMT, sur le même corpus pour comparaison directe.
+    """
+    from src.stt.transcriber import Transcriber
+    transcriber = Transcriber(model_size=model_size, device=device)
+    if direct:
+        calls = [lambda c=c: transcriber.transcribe(c.audio, language="fr", task="translate") for c in corpus]
+    else:
+        from src.core.translator import Translator
+        translator = Translator(device=device)
+        calls = [lambda c=c: translator.translate(transcriber.transcribe(c.audio, language="fr")[0], "fr", "en")
+                 for c in corpus]
+    return run_stage(calls, sum(c.duration for c in corpus), repeat=repeat)
+
+
+def bench_mt(device: str, repeat: int = 1) -> dict:
+    from src.core.translator import Translator
+    translator = Translator(device=device)
+    calls = [
+        lambda lang=lang, text=text: translator.translate(text, lang, "en" if lang == "fr" else "fr")
+        for lang, text in SENTENCES
+    ]
+    return run_stage(calls, repeat=repeat)
+
+
+def bench_tts(device: str, repeat: int = 1) -> dict:
+    from src.core.tts import TTS
+    tts = TTS(device=device)
+    produced = []
+
+    def make_call(lang, text):
+        def call():
+            samples, sr = tts.generate(text, voice="af_sarah", lang="fr-fr" if lang == "fr" else "en-us")
+            produced.append(len(samples) / sr)
+        return call
+
+    calls = [make_call(lang, text) for lang, text in SENTENCES]
+    result = run_stage(calls, repeat=repeat)
+    # RTF de synthèse : temps de calcul / durée audio produite (hors warm-up)
+    audio_s = sum(produced[1:])
+    result["rtf"] = round(result["wall_s"] / audio_s, 4) if audio_s else None
+    return result
+
+
+async def _drive_pipeline(pipeline, corpus: List[Clip], timeout_s: float) -> float:
+    """
+    Injecte le corpus plus vite que le temps réel (la file audio bloquante
+    régule le débit) et attend la fin des segments.
+    """
+    tasks = [
+        asyncio.create_task(pipeline.process_audio_loop()),
+        asyncio.create_task(pipeline.transcription_loop()),
+        asyncio.create_task(pipeline.translation_loop()),
+        asyncio.create_task(pipeline.tts_loop()),
+    ]
+    silence = np.zeros(SAMPLE_RATE, dtype=np.float32)
+    start = time.perf_counter()
+    try:
+        for clip in corpus:
+            for audio in (clip.audio, silence):
+                for i in range(0, len(audio), CAPTURE_BLOCK):
+                    await pipeline.add_audio_chunk(audio[i:i + CAPTURE_BLOCK])
+        # Chaque étage vide sa file avant que le suivant ne puisse recevoir le dernier élément
+        queues = (pipeline.audio_queue, pipeline.transcription_queue,
+                  pipeline.translation_queue, pipeline.tts_queue)
+
+        async def drain():
+            for queue in queues:
+                await queue.join()
+
+        try:
+            await asyncio.wait_for(drain(), timeout_s)
+        except asyncio.TimeoutError:
+            logger.warning(f"Pipeline non vidé après {timeout_s}s")
+        return time.perf_counter() - start
+    finally:
+        pipeline.stop()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def bench_pipeline(corpus: List[Clip], model_size: str, device: str, timeout_s: float = 600,
+                   direct_translation: bool = False, vad_backend: str = "torch") -> dict:
+    from src.core.pipeline import AsyncPipeline
+    # Injection plus rapide que le temps réel : la file audio doit faire contre-pression
+    # au lieu de jeter des chunks (drop_oldest), sinon le corpus mesuré est tronqué
+    pipeline = AsyncPipeline(model_size=model_size, device=device, direct_translation=direct_translation,
+                             vad_backend=vad_backend, queue_policies=BENCH_QUEUE_POLICIES)
+
+    def play(samples, sample_rate, on_start=None):
+        # Pas de carte son requise : le « premier son » est daté à la mise en file
+        if on_start is not None:
+            on_start(time.monotonic())
+    pipeline.tts.play = play
+
+    cpu_start = time.process_time()
+    wall_s = asyncio.run(_drive_pipeline(pipeline, corpus, timeout_s))
+    cpu_s = time.process_time() - cpu_start
+
+    dropped = {name: stats["dropped_oldest"] + stats["dropped_stale"]
+               for name, stats in pipeline.get_queue_stats().items()}
+    if any(dropped.values()):
+        logger.warning(f"Éléments jetés pendant le benchmark, résultats partiels: {dropped}")
+
+    e2e = pipeline.metrics.snapshot()["stages_ms"]["e2e"]
+    result = summarize([], wall_s, cpu_s, sum(c.duration for c in corpus))
+    result.update({
+        "runs": e2e.get("count", 0),
+        "p50_ms": e2e.get("p50", 0.0),
+        "p95_ms": e2e.get("p95", 0.0),
+        "stages_ms": {name: {k: v for k, v in s.items() if k != "buckets"}
+                      for name, s in pipeline.metrics.snapshot()["stages_ms"].items()},
+        "dropped": dropped,
+    })
+    return result
+
+
+def environment(args) -> dict:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                                text=True).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "model_size": args.model_size,
+        "device": args.device,
+        "vad_backend": args.vad_backend,
+        "capture_block": CAPTURE_BLOCK,
+        "seed": args.seed,
+    }
+
+
+def compare(current: dict, baseline: dict, thresholds: Optional[Dict[str, float]] = None) -> List[str]:
+    """
+    Compare deux rapports ; retourne la liste des régressions (métrique plus
+    élevée que la référence au-delà du seuil relatif).
+    """
+    thresholds = {**DEFAULT_THRESHOLDS, **(thresholds or {})}
+    regressions = []
+    for stage, base in baseline.get("stages", {}).items():
+        cur = current.get("stages", {}).get(stage)
+        if cur is None:
+            continue
+        for metric, threshold in thresholds.items():
+            before, after = base.get(metric), cur.get(metric)
+            # Un écart mémoire nul ou négatif ne sert pas de référence relative
+            if before is None or before <= 0 or after is None:
+                continue
+            change = (after - before) / before
+            if change > threshold:
+                regressions.append(f"{stage}.{metric}: {before} -> {after} (+{change:.0%}, seuil {threshold:.0%})")
+    return regressions
+
+
+def parse_thresholds(values: Sequence[str]) -> Dict[str, float]:
+    thresholds = {}
+    for value in values:
+        metric, _, fraction = value.partition("=")
+        if metric not in DEFAULT_THRESHOLDS or not fraction:
+            raise ValueError(f"Seuil invalide: {value}. Format: metrique=fraction, métriques: {list(DEFAULT_THRESHOLDS)}")
+        thresholds[metric] = float(fraction)
+    return thresholds
+
+
+STAGES = ("vad", "stt", "mt", "tts", "fr_en_cascade", "fr_en_direct", "pipeline", "pipeline_direct")
+
+
+def run(args) -> dict:
+    np.random.seed(args.seed)
+    corpus = build_corpus(args.clips, args.synthetic, seed=args.seed)
+    logger.info(f"Corpus: {len(corpus)} clips, {sum(c.duration for c in corpus):.1f}s d'audio")
+    report = {"meta": environment(args), "corpus": {c.name: round(c.duration, 3) for c in corpus}, "stages": {}}
+    for stage in args.stages:
+        logger.info(f"Benchmark {stage}...")
+        gc.collect()
+        with PeakRssSampler() as rss:
+            if stage == "vad":
+                result = bench_vad(corpus, args.vad_backend, args.repeat)
+            elif stage == "stt":
+                result = bench_stt(corpus, args.model_size, args.device, args.repeat)
+            elif stage == "mt":
+                result = bench_mt(args.device, args.repeat)
+            elif stage == "tts":
+                result = bench_tts(args.device, args.repeat)
+            elif stage in ("fr_en_cascade", "fr_en_direct"):
+                result = bench_fr_en(corpus, args.model_size, args.device, stage == "fr_en_direct", args.repeat)
+            else:
+                result = bench_pipeline(corpus, args.model_size, args.device,
+                                        direct_translation=stage == "pipeline_direct",
+                                        vad_backend=args.vad_backend)
+        if rss.peak_mb is not None:
+            # Pic pendant l'étage (chargement des modèles compris) et RSS au départ
+            result["peak_rss_mb"] = round(rss.peak_mb, 1)
+            result["rss_start_mb"] = round(rss.start_mb, 1)
+        report["stages"][stage] = result
+        logger.info(f"{stage}: {result}")
+    return report
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark par étage de VoxTransync")
+    parser.add_argument("--stages", default=",".join(STAGES),
+                        type=lambda s: [x for x in s.split(",") if x], help=f"Parmi {STAGES}")
+    parser.add_argument("--model-size", default="small")
+    parser.add_argument("--device", default="auto")
+    parser.add_argument("--vad-backend", default="torch", choices=("torch", "onnx"))
+    parser.add_argument("--clips", nargs="*", default=["out1.wav"])
+    parser.add_argument("--synthetic", nargs="*", type=float, default=[2, 5, 10],
+                        help="Durées (s) des clips synthétiques")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Fichier JSON du rapport (stdout sinon)")
+    parser.add_argument("--baseline", help="Rapport de référence à comparer")
+    parser.add_argument("--save-baseline", action="store_true", help="Écrit le rapport comme nouvelle référence")
+    parser.add_argument("--threshold", action="append", default=[],
+                        help="Seuil de régression, ex: p95_ms=0.2 (répétable)")
+    args = parser.parse_args(argv)
+
+    unknown = set(args.stages) - set(STAGES)
+    if unknown:
+        parser.error(f"Étages inconnus: {sorted(unknown)}. Utilisation: {STAGES}")
+    try:
+        thresholds = parse_thresholds(args.threshold)
+    except ValueError as e:
+        parser.error(str(e))
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    report = run(args)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+    else:
+        print(text)
+
+    if args.baseline and args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            f.write(text)
+        return 0
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, thresholds)
+        for line in regressions:
+            logger.error(f"Régression: {line}")
+        if regressions:
+            return 1
+        logger.info("Aucune régression par rapport à la référence.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
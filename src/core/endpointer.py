@@ -0,0 +1,136 @@
+"""
+Détection de début et de fin de parole (endpointing) à partir des probabilités
+VAD par trame. Toutes les durées sont exprimées en millisecondes et converties
+en samples : la latence de fin de phrase ne dépend pas de la taille des blocs
+de capture.
+"""
+import numpy as np
+from typing import List, Tuple
+
+SILENCE = "silence"
+ONSET = "onset"
+SPEECH = "speech"
+HANGOVER = "hangover"
+
+
+class Endpointer:
+    """
+    Machine à états alimentée par les trames de VADDetector.process_chunk.
+
+    - Hystérésis : la parole démarre au-dessus de `threshold` et ne se termine
+      qu'en dessous de `neg_threshold`.
+    - Début : `min_speech_ms` de parole sont nécessaires pour ouvrir un segment.
+    - Fin : `min_silence_ms` de silence ferment le segment.
+    - Pré-roll : le segment commence `pre_roll_ms` avant la parole détectée.
+    - Durée max : un segment est découpé de force après `max_segment_ms`.
+    """
+
+    def __init__(self, sampling_rate=16000, threshold=0.5, neg_threshold=None,
+                 min_speech_ms=64, min_silence_ms=500, pre_roll_ms=200, max_segment_ms=15000,
+                 frame_size=512):
+        self.sampling_rate = sampling_rate
+        self.frame_size = frame_size
+        self.threshold = threshold
+        self.neg_threshold = neg_threshold if neg_threshold is not None else max(threshold - 0.15, 0.01)
+        self.min_speech_samples = self._ms_to_samples(min_speech_ms)
+        self.min_silence_samples = self._ms_to_samples(min_silence_ms)
+        self.pre_roll_samples = self._ms_to_samples(pre_roll_ms)
+        self.max_segment_samples = self._ms_to_samples(max_segment_ms)
+        self.reset()
+
+    def _ms_to_samples(self, ms: float) -> int:
+        return int(ms * self.sampling_rate / 1000)
+
+    def reset(self):
+        self.state = SILENCE
+        self._onset_start = 0
+        self._speech_run = 0
+        self._segment_start = 0
+        self._silence_start = 0
+        self._last_end = 0
+        self._position = 0
+
+    @property
+    def in_segment(self) -> bool:
+        return self.state in (SPEECH, HANGOVER)
+
+    @property
+    def segment_start(self) -> int:
+        """Premier sample du segment en cours (pré-roll inclus)."""
+        return self._segment_start
+
+    def retain_from(self) -> int:
+        """Premier sample du flux encore nécessaire (segment en cours ou pré-roll)."""
+        if self.in_segment:
+            return self._segment_start
+        start = self._onset_start if self.state == ONSET else self._position
+        return max(start - self.pre_roll_samples, self._last_end, 0)
+
+    def process(self, frames: np.ndarray) -> List[Tuple[int, int]]:
+        """
+        Consomme des trames (champs "offset" et "prob") et retourne la liste
+        des segments terminés sous forme (start_sample, end_sample).
+        """
+        segments = []
+        for offset, prob in zip(frames["offset"].tolist(), frames["prob"].tolist()):
+            frame_end = offset + self.frame_size
+            self._position = frame_end
+
+            if self.state == SILENCE:
+                if prob >= self.threshold:
+                    self.state = ONSET
+                    self._onset_start = offset
+                    self._speech_run = 0
+            if self.state == ONSET:
+                if prob >= self.threshold:
+                    self._speech_run += frame_end - offset
+                    if self._speech_run >= self.min_speech_samples:
+                        self.state = SPEECH
+                        self._segment_start = max(self._onset_start - self.pre_roll_samples,
+                                                  self._last_end, 0)
+                elif prob < self.neg_threshold:
+                    self.state = SILENCE
+                continue
+
+            if self.state == SPEECH:
+                if prob < self.neg_threshold:
+                    self.state = HANGOVER
+                    self._silence_start = offset
+            elif self.state == HANGOVER:
+                if prob >= self.threshold:
+                    self.state = SPEECH
+                elif frame_end - self._silence_start >= self.min_silence_samples:
+                    self._append(segments, self._close(self._silence_start))
+                    continue
+
+            if self.in_segment and frame_end - self._segment_start >= self.max_segment_samples:
+                # Découpage forcé : le segment suivant reprend immédiatement
+                self._append(segments, (self._segment_start, frame_end))
+                self._last_end = frame_end
+                self._segment_start = frame_end
+                if self.state == HANGOVER:
+                    self._silence_start = max(self._silence_start, frame_end)
+
+        return segments
+
+    def flush(self) -> List[Tuple[int, int]]:
+        """Ferme le segment en cours (arrêt du flux)."""
+        if not self.in_segment:
+            self.state = SILENCE
+            return []
+        end = self._silence_start if self.state == HANGOVER else self._position
+        segments = []
+        self._append(segments, self._close(end))
+        return segments
+
+    def _close(self, end: int) -> Tuple[int, int]:
+        segment = (self._segment_start, end)
+        self._last_end = end
+        self.state = SILENCE
+        return segment
+
+    @staticmethod
+    def _append(segments: List[Tuple[int, int]], segment: Tuple[int, int]):
+        # Un découpage forcé juste avant la fin de parole peut laisser un segment vide
+        if segment[1] > segment[0]:
+            segments.append(segment)
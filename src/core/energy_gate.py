@@ -0,0 +1,90 @@
+"""
+Pré-filtre énergétique placé devant la VAD neuronale.
+Écarte, sans appeler Silero, les trames proches du plancher de bruit.
+"""
+import numpy as np
+
+
+class EnergyGate:
+    """
+    Gate vectorisé RMS / taux de passage par zéro (ZCR) sur des trames audio.
+
+    Une trame est écartée si son énergie reste sous le plancher de bruit
+    adaptatif + `margin_db` et que son ZCR ressemble à celui du bruit, ou si
+    elle est sous `silence_db` (silence numérique). Les trames faibles dont
+    le ZCR s'écarte du bruit (ex: fricatives) sont transmises à la VAD.
+    """
+
+    def __init__(self, margin_db=10.0, silence_db=-60.0, zcr_tolerance=0.1,
+                 floor_rise_db_per_s=2.0, sampling_rate=16000, max_initial_floor_db=-50.0):
+        self.margin_db = margin_db
+        self.silence_db = silence_db
+        # Plafond du plancher initial : un flux qui démarre en pleine parole
+        # ne doit pas placer le plancher au niveau de la voix
+        self.max_initial_floor_db = max_initial_floor_db
+        self.zcr_tolerance = zcr_tolerance
+        self.floor_rise_db_per_s = floor_rise_db_per_s
+        self.sampling_rate = sampling_rate
+        self.reset()
+
+    def reset(self):
+        self.noise_floor_db = None
+        self.noise_zcr = None
+        self.frames_total = 0
+        self.frames_skipped = 0
+
+    @staticmethod
+    def frame_features(frames: np.ndarray):
+        """Retourne (rms_db, zcr) pour un tableau (n_frames, frame_size)."""
+        rms = np.sqrt(np.mean(np.square(frames, dtype=np.float32), axis=1))
+        rms_db = 20.0 * np.log10(rms + 1e-10)
+        signs = np.signbit(frames)
+        zcr = np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1) / (frames.shape[1] - 1)
+        return rms_db, zcr
+
+    def process(self, frames: np.ndarray) -> np.ndarray:
+        """
+        Classe un bloc de trames et met à jour le plancher de bruit.
+        Retourne un masque booléen : True = trame à transmettre à la VAD.
+        """
+        if len(frames) == 0:
+            return np.zeros(0, dtype=bool)
+
+        rms_db, zcr = self.frame_features(frames)
+        if self.noise_floor_db is None:
+            self.noise_floor_db = min(max(float(rms_db.min()), self.silence_db), self.max_initial_floor_db)
+            self.noise_zcr = float(np.median(zcr))
+
+        silent = rms_db < self.silence_db
+        quiet = rms_db < self.noise_floor_db + self.margin_db
+        near_floor = quiet & ~silent
+        skip = (near_floor & (np.abs(zcr - self.noise_zcr) <= self.zcr_tolerance)) | silent
+
+        self._update_floor(rms_db, zcr, near_floor, frames.shape[1])
+
+        self.frames_total += len(frames)
+        self.frames_skipped += int(np.count_nonzero(skip))
+        return ~skip
+
+    def _update_floor(self, rms_db, zcr, near_floor, frame_size):
+        # Suivi type "minimum statistics" : descente immédiate vers le minimum
+        # du bloc, remontée lente bornée, y compris pendant la parole.
+        duration = len(rms_db) * frame_size / self.sampling_rate
+        block_min = max(float(rms_db.min()), self.silence_db)
+        self.noise_floor_db = min(block_min, self.noise_floor_db + self.floor_rise_db_per_s * duration)
+
+        # Le ZCR du bruit est appris sur les trames proches du plancher
+        if np.any(near_floor):
+            self.noise_zcr = 0.9 * self.noise_zcr + 0.1 * float(np.mean(zcr[near_floor]))
+
+    @property
+    def skip_ratio(self) -> float:
+        return self.frames_skipped / self.frames_total if self.frames_total else 0.0
+
+    def get_stats(self) -> dict:
+        return {
+            "frames_total": self.frames_total,
+            "frames_skipped": self.frames_skipped,
+            "skip_ratio": self.skip_ratio,
+            "noise_floor_db": self.noise_floor_db,
+        }
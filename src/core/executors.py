@@ -0,0 +1,51 @@
+"""
+Exécuteurs par étage du pipeline.
+Les appels bloquants aux modèles (VAD, STT, MT, TTS) sont exécutés hors de la
+boucle asyncio, chacun dans son pool de threads, pour que les étages se
+chevauchent d'un énoncé à l'autre au lieu de geler la capture audio.
+"""
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Optional
+
+from src.core.tracing import tracer
+
+
+class StageExecutors:
+    """
+    Un ThreadPoolExecutor par étage. ctranslate2, onnxruntime et torch
+    relâchent le GIL pendant l'inférence : des threads suffisent, sans avoir
+    à sérialiser les modèles vers d'autres processus.
+
+    Un étage à état (VAD, STT en flux) doit garder un seul worker pour que
+    ses appels restent ordonnés.
+    """
+    DEFAULT_WORKERS = {"vad": 1, "stt": 1, "mt": 1, "tts": 1}
+
+    def __init__(self, workers: Optional[Dict[str, int]] = None):
+        self.workers = {**self.DEFAULT_WORKERS, **(workers or {})}
+        self._pools = {
+            stage: ThreadPoolExecutor(max_workers=n, thread_name_prefix=f"vox-{stage}")
+            for stage, n in self.workers.items()
+        }
+
+    async def run(self, stage: str, fn: Callable, *args, **kwargs):
+        """Exécute fn dans le pool de l'étage et attend son résultat."""
+        if stage not in self._pools:
+            raise ValueError(f"Étage inconnu: {stage}. Utilisation: {list(self._pools)}")
+        loop = asyncio.get_running_loop()
+        call = functools.partial(fn, *args, **kwargs)
+        if tracer.enabled:
+            # Span côté worker : temps de calcul réel, hors attente du pool
+            call = functools.partial(self._traced, stage, call)
+        return await loop.run_in_executor(self._pools[stage], call)
+
+    @staticmethod
+    def _traced(stage: str, call: Callable):
+        with tracer.span(stage, "stage"):
+            return call()
+
+    def shutdown(self, wait: bool = False):
+        for pool in self._pools.values():
+            pool.shutdown(wait=wait, cancel_futures=True)
@@ -0,0 +1,264 @@
+"""
+Traduction hors-ligne d'un fichier audio, plus vite que le temps réel.
+
+Le fichier est lu par blocs (soundfile), segmenté par VAD + endpointer sur
+toute sa durée, et chaque segment part vers un pool de workers STT -> MT
+(-> TTS pour le doublage). Les résultats sont écrits dans l'ordre en JSONL
+et/ou SRT, et optionnellement dans un WAV doublé.
+
+Usage:
+    python -m src.core.file_translator reunion.wav --jsonl reunion.jsonl \\
+        --srt reunion.srt --dub reunion_en.wav --workers 4
+"""
+import argparse
+import json
+import logging
+import os
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator, List, Optional, Tuple
+
+import numpy as np
+import soundfile as sf
+import torch
+import torchaudio.transforms as T
+
+from src.core.vad import VADDetector, OnnxVADDetector
+from src.core.endpointer import Endpointer
+from src.core.ring_buffer import AudioRingBuffer
+from src.core.playback import resample_linear
+from src.stt.transcriber import Transcriber
+from src.core.translator import Translator
+
+logger = logging.getLogger(__name__)
+
+
+def format_srt_time(seconds: float) -> str:
+    millis = int(round(seconds * 1000))
+    hours, millis = divmod(millis, 3_600_000)
+    minutes, millis = divmod(millis, 60_000)
+    secs, millis = divmod(millis, 1000)
+    return f"{hours:02d}:{minutes:02d}:{secs:02d},{millis:03d}"
+
+
+class TranslatedSegment:
+    """Segment traduit, horodaté dans le fichier source."""
+
+    def __init__(self, index: int, start: float, end: float, source_lang: str, text: str,
+                 target_lang: str, translation: str):
+        self.index = index
+        self.start = start
+        self.end = end
+        self.source_lang = source_lang
+        self.text = text
+        self.target_lang = target_lang
+        self.translation = translation
+        self.audio: Optional[np.ndarray] = None  # Voix de synthèse (doublage)
+        self.sample_rate: Optional[int] = None
+
+    def to_dict(self) -> dict:
+        return {
+            "index": self.index,
+            "start": round(self.start, 3),
+            "end": round(self.end, 3),
+            "source_lang": self.source_lang,
+            "text": self.text,
+            "target_lang": self.target_lang,
+            "translation": self.translation,
+        }
+
+    def to_srt(self, number: int) -> str:
+        return f"{number}\n{format_srt_time(self.start)} --> {format_srt_time(self.end)}\n{self.translation}\n"
+
+
+class FileTranslator:
+    """
+    Traducteur de fichiers : la VAD tourne dans le thread appelant pendant que
+    `workers` segments sont transcrits et traduits en parallèle (faster-whisper
+    avec num_workers, CTranslate2 avec inter_threads). Les cœurs sont partagés
+    entre workers (workers x threads <= cœurs). Le nombre de segments en vol est
+    borné pour garder une mémoire constante sur les longs fichiers.
+    """
+    SAMPLE_RATE = 16000
+    LANGUAGES = ("fr", "en")  # Paires couvertes par Translator.MODELS
+
+    def __init__(self, model_size="large-v3", device="auto", workers: Optional[int] = None,
+                 language: Optional[str] = "fr", vad_threshold=0.5, vad_backend="torch",
+                 min_silence_ms=500, max_segment_ms=15000, block_ms=1000, dub=False):
+        if vad_backend not in ("torch", "onnx"):
+            raise ValueError(f"Backend VAD inconnu: {vad_backend}. Utilisation: ('torch', 'onnx')")
+        self.workers = workers or os.cpu_count() or 1
+        self.language = language  # None : détection automatique par segment
+        self.block_ms = block_ms
+        self.vad_threshold = vad_threshold
+        self.min_silence_ms = min_silence_ms
+        self.max_segment_ms = max_segment_ms
+        if vad_backend == "onnx":
+            self.vad = OnnxVADDetector(threshold=vad_threshold)
+        else:
+            self.vad = VADDetector(threshold=vad_threshold)
+        # Chaque worker garde sa part des cœurs : pas de sursouscription OpenMP
+        self.threads_per_worker = max(1, (os.cpu_count() or 1) // self.workers)
+        self.transcriber = Transcriber(model_size=model_size, device=device, num_workers=self.workers,
+                                       cpu_threads=self.threads_per_worker)
+        self.translator = Translator(device=device, inter_threads=self.workers,
+                                     intra_threads=self.threads_per_worker)
+        self.tts = None
+        if dub:
+            from src.core.tts import TTS
+            self.tts = TTS(device=device)
+
+    def _blocks(self, path: str) -> Iterator[np.ndarray]:
+        """Blocs mono 16 kHz lus en flux (le fichier n'est jamais chargé en entier)."""
+        with sf.SoundFile(path) as f:
+            blocksize = max(int(f.samplerate * self.block_ms / 1000), 1)
+            resampler = T.Resample(f.samplerate, self.SAMPLE_RATE) if f.samplerate != self.SAMPLE_RATE else None
+            for block in f.blocks(blocksize=blocksize, dtype="float32", always_2d=True):
+                mono = block.mean(axis=1)
+                if resampler is not None:
+                    mono = resampler(torch.from_numpy(mono).unsqueeze(0)).squeeze(0).numpy()
+                yield mono
+
+    def segments(self, path: str) -> Iterator[Tuple[int, int, np.ndarray]]:
+        """Segmente le fichier ; produit (début, fin, audio) en samples 16 kHz."""
+        self.vad.reset()
+        endpointer = Endpointer(sampling_rate=self.SAMPLE_RATE, threshold=self.vad_threshold,
+                                min_silence_ms=self.min_silence_ms, max_segment_ms=self.max_segment_ms)
+        buffer = AudioRingBuffer(capacity=int((self.max_segment_ms + 1000) * self.SAMPLE_RATE / 1000))
+        for block in self._blocks(path):
+            buffer.write(block)
+            for start, end in endpointer.process(self.vad.process_chunk(block)):
+                yield start, end, buffer.read(start, end)
+        for start, end in endpointer.flush():
+            yield start, end, buffer.read(start, end)
+
+    def _target_lang(self, source_lang: str) -> Optional[str]:
+        """Langue cible d'un segment, None si aucun modèle ne couvre la paire."""
+        if source_lang not in self.LANGUAGES:
+            return None
+        return "en" if source_lang == "fr" else "fr"
+
+    def _process_segment(self, index: int, start: int, end: int, audio: np.ndarray) -> Optional[TranslatedSegment]:
+        """Travail d'un worker : STT -> MT (-> TTS)."""
+        text, info = self.transcriber.transcribe(audio, language=self.language)
+        if not text:
+            return None
+        source_lang = info.language
+        target_lang = self._target_lang(source_lang)
+        if target_lang is None:
+            logger.info(f"Segment {index} ignoré (langue non prise en charge: {source_lang}): {text}")
+            return None
+        translation = self.translator.translate(text, source_lang, target_lang)
+        segment = TranslatedSegment(index, start / self.SAMPLE_RATE, end / self.SAMPLE_RATE,
+                                    source_lang, text, target_lang, translation)
+        if self.tts is not None and translation:
+            voice, kk_lang = ("af_sarah", "en-us") if target_lang == "en" else ("ff_siwis", "fr-fr")
+            segment.audio, segment.sample_rate = self.tts.generate(translation, voice=voice, lang=kk_lang)
+        return segment
+
+    def translate_file(self, path: str, jsonl_path: Optional[str] = None, srt_path: Optional[str] = None,
+                       dub_path: Optional[str] = None) -> List[TranslatedSegment]:
+        """Traduit un fichier et écrit les sorties demandées, au fil des segments terminés."""
+        if dub_path and self.tts is None:
+            raise ValueError("Le doublage nécessite FileTranslator(dub=True).")
+        duration = sf.info(path).duration
+        started = time.perf_counter()
+        results: List[TranslatedSegment] = []
+        writer = _OutputWriter(jsonl_path, srt_path, dub_path)
+        max_in_flight = 2 * self.workers
+        try:
+            with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="vox-file") as pool:
+                pending = deque()
+                for index, (start, end, audio) in enumerate(self.segments(path)):
+                    pending.append(pool.submit(self._process_segment, index, start, end, audio))
+                    # Attente du plus ancien : sortie dans l'ordre et mémoire bornée
+                    while len(pending) >= max_in_flight or (pending and pending[0].done()):
+                        self._collect(pending.popleft().result(), results, writer)
+                while pending:
+                    self._collect(pending.popleft().result(), results, writer)
+            writer.finish(duration)
+        finally:
+            writer.close()
+
+        elapsed = time.perf_counter() - started
+        logger.info(f"{path}: {len(results)} segments, {duration:.1f}s d'audio en {elapsed:.1f}s "
+                    f"(x{duration / elapsed if elapsed else 0:.1f} temps réel)")
+        return results
+
+    @staticmethod
+    def _collect(segment: Optional[TranslatedSegment], results: List[TranslatedSegment], writer):
+        if segment is None:
+            return
+        results.append(segment)
+        writer.write(segment)
+        segment.audio = None  # Déjà écrit : libère la mémoire
+
+
+class _OutputWriter:
+    """Écrit JSONL, SRT et WAV doublé de façon incrémentale, dans l'ordre des segments."""
+
+    def __init__(self, jsonl_path=None, srt_path=None, dub_path=None, dub_rate=24000):
+        self.jsonl = open(jsonl_path, "w", encoding="utf-8") if jsonl_path else None
+        self.srt = open(srt_path, "w", encoding="utf-8") if srt_path else None
+        self.dub = sf.SoundFile(dub_path, "w", samplerate=dub_rate, channels=1, subtype="PCM_16") if dub_path else None
+        self.dub_rate = dub_rate
+        self._dub_position = 0
+        self._count = 0
+
+    def write(self, segment: TranslatedSegment):
+        self._count += 1
+        if self.jsonl:
+            self.jsonl.write(json.dumps(segment.to_dict(), ensure_ascii=False) + "\n")
+        if self.srt:
+            self.srt.write(segment.to_srt(self._count) + "\n")
+        if self.dub and segment.audio is not None:
+            # La voix est placée au début du segment source, ou à la suite si la précédente déborde
+            self._pad_to(int(segment.start * self.dub_rate))
+            audio = resample_linear(np.asarray(segment.audio, dtype=np.float32).reshape(-1),
+                                    segment.sample_rate, self.dub_rate)
+            self.dub.write(audio)
+            self._dub_position += len(audio)
+
+    def _pad_to(self, position: int):
+        if position > self._dub_position:
+            self.dub.write(np.zeros(position - self._dub_position, dtype=np.float32))
+            self._dub_position = position
+
+    def finish(self, duration: float):
+        if self.dub:
+            self._pad_to(int(duration * self.dub_rate))
+
+    def close(self):
+        for f in (self.jsonl, self.srt, self.dub):
+            if f is not None:
+                f.close()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Traduction hors-ligne d'un fichier audio")
+    parser.add_argument("input")
+    parser.add_argument("--jsonl", help="Transcriptions traduites (une ligne JSON par segment)")
+    parser.add_argument("--srt", help="Sous-titres traduits")
+    parser.add_argument("--dub", help="WAV doublé (voix de synthèse calée sur les segments)")
+    parser.add_argument("--model-size", default="large-v3")
+    parser.add_argument("--device", default="auto")
+    parser.add_argument("--workers", type=int, default=None, help="Segments traités en parallèle (défaut: nb de cœurs)")
+    parser.add_argument("--language", default="fr", help="Langue source, 'auto' pour la détection")
+    parser.add_argument("--vad-backend", default="torch", choices=("torch", "onnx"))
+    args = parser.parse_args(argv)
+
+    if not (args.jsonl or args.srt or args.dub):
+        base = os.path.splitext(args.input)[0]
+        args.jsonl = f"{base}.jsonl"
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    translator = FileTranslator(model_size=args.model_size, device=args.device, workers=args.workers,
+                                language=None if args.language == "auto" else args.language,
+                                vad_backend=args.vad_backend, dub=bool(args.dub))
+    translator.translate_file(args.input, jsonl_path=args.jsonl, srt_path=args.srt, dub_path=args.dub)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
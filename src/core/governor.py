@@ -0,0 +1,128 @@
+"""
+Gouverneur de modèle STT : choisit dynamiquement le palier Whisper
+(ex: large-v3 -> distil-large-v3 -> small -> tiny) selon le facteur temps
+réel mesuré et la profondeur de la file, pour tenir une cible de latence.
+"""
+import logging
+import time
+from collections import deque
+from typing import Deque, Dict, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+
+class ModelGovernor:
+    """
+    Les paliers sont ordonnés du plus précis au plus rapide.
+
+    Sur une fenêtre glissante de `window` décodages :
+    - descente d'un palier si le RTF moyen dépasse `rtf_high`, si la latence
+      fin de parole -> fin STT dépasse `target_latency_ms`, ou si la file STT
+      atteint `max_queue_depth`. `target_latency_ms` est la part STT du budget
+      de bout en bout, pas ce budget entier (MT et TTS s'y ajoutent) ;
+    - remontée si la file est vide, la latence sous la moitié de la cible et
+      le RTF estimé du palier supérieur (dernier RTF mesuré, ou RTF courant
+      multiplié par `upgrade_cost` si jamais mesuré) sous `rtf_low`.
+    Au moins `min_dwell` décodages séparent deux changements (hystérésis).
+    Un RTF mesuré expire après `rtf_ttl` décodages : celui relevé pendant une
+    surcharge passagère n'empêche pas indéfiniment la remontée.
+    Seuls les `history` derniers changements sont conservés (`switch_count`
+    les compte tous).
+    """
+
+    def __init__(self, tiers: Sequence[str], initial: Optional[str] = None, target_latency_ms: float = 1200,
+                 rtf_high: float = 0.7, rtf_low: float = 0.35, max_queue_depth: int = 3,
+                 window: int = 8, min_dwell: int = 4, upgrade_cost: float = 2.0, rtf_ttl: int = 32,
+                 history: int = 100):
+        if not tiers:
+            raise ValueError("Au moins un palier de modèle est requis.")
+        if initial is not None and initial not in tiers:
+            raise ValueError(f"Palier initial inconnu: {initial}. Utilisation: {list(tiers)}")
+        if rtf_low >= rtf_high:
+            raise ValueError("rtf_low doit être inférieur à rtf_high.")
+        self.tiers = list(tiers)
+        self.index = self.tiers.index(initial) if initial is not None else 0
+        self.target_latency = target_latency_ms / 1000
+        self.rtf_high = rtf_high
+        self.rtf_low = rtf_low
+        self.max_queue_depth = max_queue_depth
+        self.min_dwell = min_dwell
+        self.upgrade_cost = upgrade_cost
+        self.rtf_ttl = rtf_ttl
+        self._rtf = deque(maxlen=window)
+        self._latency = deque(maxlen=window)
+        self._since_switch = 0
+        self._observations = 0
+        self.tier_rtf: Dict[str, float] = {}
+        self._tier_rtf_at: Dict[str, int] = {}  # Palier -> n° du décodage de la dernière mesure
+        self.switches: Deque[dict] = deque(maxlen=history)
+        self.switch_count = 0
+
+    @property
+    def tier(self) -> str:
+        return self.tiers[self.index]
+
+    def observe(self, audio_s: float, decode_s: float, latency_s: Optional[float] = None,
+                queue_depth: int = 0) -> Optional[str]:
+        """Intègre une mesure ; retourne le nouveau palier en cas de changement."""
+        if audio_s <= 0:
+            return None
+        rtf = decode_s / audio_s
+        self._rtf.append(rtf)
+        if latency_s is not None:
+            self._latency.append(latency_s)
+        self._since_switch += 1
+        self._observations += 1
+        mean_rtf = sum(self._rtf) / len(self._rtf)
+        self.tier_rtf[self.tier] = round(mean_rtf, 3)
+        self._tier_rtf_at[self.tier] = self._observations
+        if self._since_switch < self.min_dwell:
+            # Surcharge franche : on n'attend pas la fin de la période minimale
+            if queue_depth < 2 * self.max_queue_depth:
+                return None
+
+        worst_latency = max(self._latency) if self._latency else 0.0
+        if self.index < len(self.tiers) - 1:
+            if mean_rtf > self.rtf_high:
+                return self._switch(self.index + 1, f"RTF {mean_rtf:.2f} > {self.rtf_high}")
+            if worst_latency > self.target_latency:
+                return self._switch(self.index + 1, f"latence {worst_latency * 1000:.0f}ms > cible")
+            if queue_depth >= self.max_queue_depth:
+                return self._switch(self.index + 1, f"file STT {queue_depth}")
+
+        if self.index > 0 and queue_depth == 0 and worst_latency < self.target_latency / 2:
+            better = self.tiers[self.index - 1]
+            estimated = self._measured_rtf(better)
+            if estimated is None:
+                estimated = mean_rtf * self.upgrade_cost
+            if estimated < self.rtf_low:
+                return self._switch(self.index - 1, f"RTF estimé {estimated:.2f} < {self.rtf_low}")
+        return None
+
+    def _measured_rtf(self, tier: str) -> Optional[float]:
+        """Dernier RTF mesuré du palier, None s'il n'existe pas ou a expiré."""
+        measured_at = self._tier_rtf_at.get(tier)
+        if measured_at is None or self._observations - measured_at > self.rtf_ttl:
+            return None
+        return self.tier_rtf[tier]
+
+    def _switch(self, index: int, reason: str) -> str:
+        previous = self.tier
+        self.index = index
+        self._rtf.clear()
+        self._latency.clear()
+        self._since_switch = 0
+        self.switch_count += 1
+        self.switches.append({"time": time.time(), "from": previous, "to": self.tier, "reason": reason})
+        logger.info(f"Gouverneur STT: {previous} -> {self.tier} ({reason})")
+        return self.tier
+
+    def get_status(self) -> dict:
+        return {
+            "tier": self.tier,
+            "tiers": self.tiers,
+            "rtf": round(sum(self._rtf) / len(self._rtf), 3) if self._rtf else None,
+            "tier_rtf": dict(self.tier_rtf),
+            "switches": list(self.switches)[-10:],
+            "switch_count": self.switch_count,
+        }
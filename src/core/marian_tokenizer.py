@@ -0,0 +1,92 @@
+"""
+Tokenizers MarianMT pour CTranslate2.
+
+SentencePieceTokenizer charge directement les modèles source.spm/target.spm
+copiés dans le dossier CT2 et produit les jetons attendus par le modèle en
+une étape : ni import de transformers, ni accès réseau au démarrage.
+HFTokenizer (transformers.AutoTokenizer) reste en repli pour les dossiers
+convertis sans les fichiers SentencePiece.
+"""
+import json
+import logging
+import os
+import shutil
+from typing import List, Optional, Set
+
+import sentencepiece as spm
+
+logger = logging.getLogger(__name__)
+
+SPM_FILES = ("source.spm", "target.spm")
+# Vocabulaires écrits par le convertisseur CTranslate2, selon la version et le partage source/cible
+VOCABULARY_FILES = ("shared_vocabulary.json", "source_vocabulary.json",
+                    "shared_vocabulary.txt", "source_vocabulary.txt")
+
+
+def read_source_vocabulary(model_dir: str) -> Optional[Set[str]]:
+    """Jetons connus de l'encodeur CT2, None si aucun fichier de vocabulaire."""
+    for filename in VOCABULARY_FILES:
+        path = os.path.join(model_dir, filename)
+        if not os.path.exists(path):
+            continue
+        with open(path, encoding="utf-8") as f:
+            if filename.endswith(".json"):
+                return set(json.load(f))
+            return {line.rstrip("\n") for line in f}
+    return None
+
+
+class SentencePieceTokenizer:
+    """Tokenizer Marian natif (thread-safe) : texte -> pièces SentencePiece -> texte."""
+    EOS = "</s>"
+    UNK = "<unk>"
+    SPECIAL_TOKENS = frozenset(("</s>", "<pad>", "<unk>"))
+    thread_safe = True
+
+    def __init__(self, model_dir: str):
+        self.source = spm.SentencePieceProcessor(model_file=os.path.join(model_dir, "source.spm"))
+        self.target = spm.SentencePieceProcessor(model_file=os.path.join(model_dir, "target.spm"))
+        self.vocabulary = read_source_vocabulary(model_dir)
+
+    def tokenize(self, text: str) -> List[str]:
+        pieces = self.source.encode(text, out_type=str)
+        if self.vocabulary is not None:
+            # Comme MarianTokenizer : pièce absente du vocabulaire -> <unk>
+            pieces = [piece if piece in self.vocabulary else self.UNK for piece in pieces]
+        return pieces + [self.EOS]
+
+    def detokenize(self, tokens: List[str]) -> str:
+        return self.target.decode_pieces([t for t in tokens if t not in self.SPECIAL_TOKENS]).strip()
+
+
+class HFTokenizer:
+    """Repli sur transformers.AutoTokenizer (import lourd, non thread-safe)."""
+    thread_safe = False
+
+    def __init__(self, model_name: str):
+        import transformers
+        self._tokenizer = transformers.AutoTokenizer.from_pretrained(model_name)
+
+    def tokenize(self, text: str) -> List[str]:
+        return self._tokenizer.convert_ids_to_tokens(self._tokenizer.encode(text))
+
+    def detokenize(self, tokens: List[str]) -> str:
+        return self._tokenizer.decode(self._tokenizer.convert_tokens_to_ids(tokens), skip_special_tokens=True)
+
+
+def _fetch_spm_files(model_name: str, model_dir: str):
+    """Copie les modèles SentencePiece (cache Hugging Face) dans un dossier converti sans eux."""
+    from huggingface_hub import hf_hub_download
+    for filename in SPM_FILES:
+        shutil.copyfile(hf_hub_download(model_name, filename), os.path.join(model_dir, filename))
+
+
+def load_tokenizer(model_name: str, model_dir: str):
+    """SentencePieceTokenizer depuis le dossier CT2 si possible, sinon HFTokenizer."""
+    if not all(os.path.exists(os.path.join(model_dir, f)) for f in SPM_FILES):
+        try:
+            _fetch_spm_files(model_name, model_dir)
+        except Exception as e:
+            logger.warning(f"Modèles SentencePiece indisponibles pour {model_name} ({e}) : repli sur transformers")
+            return HFTokenizer(model_name)
+    return SentencePieceTokenizer(model_dir)
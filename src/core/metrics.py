@@ -0,0 +1,180 @@
+"""
+Instrumentation de latence par étage.
+Chaque segment porte un SegmentTrace horodaté à chaque étape du pipeline ;
+les durées entre étapes sont agrégées dans des histogrammes (p50/p95/p99),
+avec la profondeur des files, et exportées en JSON.
+"""
+import bisect
+import itertools
+import json
+import os
+import threading
+import time
+from collections import deque
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+
+# Étapes horodatées, dans l'ordre du pipeline
+MARKS = (
+    "capture", "vad_onset", "endpoint",
+    "stt_start", "stt_end", "mt_start", "mt_end",
+    "tts_start", "tts_end", "first_audio",
+)
+
+# Durées agrégées : nom -> (étape de début, étape de fin)
+SPANS = {
+    "vad": ("capture", "endpoint"),        # attente audio_queue + VAD du chunk de fin
+    "utterance": ("vad_onset", "endpoint"),
+    "stt_queue": ("endpoint", "stt_start"),
+    "stt": ("stt_start", "stt_end"),
+    "mt_queue": ("stt_end", "mt_start"),
+    "mt": ("mt_start", "mt_end"),
+    "tts_queue": ("mt_end", "tts_start"),
+    "tts": ("tts_start", "tts_end"),
+    "playout": ("tts_end", "first_audio"),
+    "e2e": ("endpoint", "first_audio"),    # fin de parole -> premier son traduit
+}
+
+LATENCY_BUCKETS_MS = (10, 25, 50, 100, 200, 300, 500, 750, 1000, 1500, 2000, 3000, 5000)
+QUEUE_BUCKETS = (0, 1, 2, 4, 8, 16, 32, 64)
+
+
+class SegmentTrace:
+    """Horodatages (time.monotonic) d'un segment ou d'une transcription partielle."""
+    __slots__ = ("segment_id", "partial", "marks", "decode", "recorded", "tts_pending", "tts_streaming")
+
+    def __init__(self, segment_id: int, partial: bool = False):
+        self.segment_id = segment_id
+        self.partial = partial
+        self.marks: Dict[str, float] = {}
+        self.decode: Optional[dict] = None  # DecodeStats.to_dict() du décodage STT
+        self.recorded = False
+        # Propositions mises en file de synthèse (jetées exclues), traduction en flux en cours
+        self.tts_pending = 0
+        self.tts_streaming = False
+
+    def mark(self, name: str, t: Optional[float] = None):
+        if name not in MARKS:
+            raise ValueError(f"Étape inconnue: {name}. Utilisation: {MARKS}")
+        self.marks[name] = time.monotonic() if t is None else t
+
+    def span(self, start: str, end: str) -> Optional[float]:
+        """Durée en secondes entre deux étapes, None si l'une manque."""
+        if start in self.marks and end in self.marks:
+            return self.marks[end] - self.marks[start]
+        return None
+
+    def to_dict(self) -> dict:
+        """Étapes en ms relatives à la première étape horodatée."""
+        origin = min(self.marks.values()) if self.marks else 0.0
+        data = {
+            "segment_id": self.segment_id,
+            "partial": self.partial,
+            "marks_ms": {name: round((self.marks[name] - origin) * 1000, 1) for name in MARKS if name in self.marks},
+        }
+        if self.decode is not None:
+            data["decode"] = self.decode
+        return data
+
+
+class Histogram:
+    """
+    Histogramme à seaux fixes (cumul depuis le démarrage) et fenêtre glissante
+    des dernières valeurs pour les percentiles.
+    """
+
+    def __init__(self, bounds: Sequence[float], window: int = 1024):
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self._recent = deque(maxlen=window)
+
+    def record(self, value: float):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+        self._recent.append(value)
+
+    def summary(self) -> dict:
+        if not self.count:
+            return {"count": 0}
+        p50, p95, p99 = np.percentile(np.fromiter(self._recent, dtype=np.float64), [50, 95, 99])
+        labels = [f"<={b}" for b in self.bounds] + ["+inf"]
+        return {
+            "count": self.count,
+            "mean": round(self.total / self.count, 2),
+            "p50": round(float(p50), 2),
+            "p95": round(float(p95), 2),
+            "p99": round(float(p99), 2),
+            "max": round(max(self._recent), 2),
+            "buckets": dict(zip(labels, self.counts)),
+        }
+
+
+class PipelineMetrics:
+    """
+    Agrège les traces de segments et la profondeur des files.
+    Thread-safe : record() est appelé depuis le callback audio (premier son).
+    """
+
+    def __init__(self, window: int = 1024, keep_traces: int = 20):
+        self._lock = threading.Lock()
+        self._ids = itertools.count()
+        self.window = window
+        self.stages = {name: Histogram(LATENCY_BUCKETS_MS, window) for name in SPANS}
+        self.queues: Dict[str, Histogram] = {}
+        self.segments = 0
+        self.partials = 0
+        self.stt_fallbacks = 0  # Passes de repli en température
+        self.stt_timeouts = 0   # Décodages interrompus par l'échéance
+        self.recent_traces = deque(maxlen=keep_traces)
+
+    def new_trace(self, partial: bool = False) -> SegmentTrace:
+        return SegmentTrace(next(self._ids), partial=partial)
+
+    def record(self, trace: SegmentTrace):
+        """Intègre une trace terminée (son joué ou segment abandonné), une seule fois."""
+        with self._lock:
+            if trace.recorded:
+                return
+            trace.recorded = True
+            if trace.partial:
+                self.partials += 1
+            else:
+                self.segments += 1
+            if trace.decode is not None:
+                self.stt_fallbacks += trace.decode.get("fallbacks", 0)
+                self.stt_timeouts += int(trace.decode.get("timed_out", False))
+            for name, (start, end) in SPANS.items():
+                duration = trace.span(start, end)
+                if duration is not None:
+                    self.stages[name].record(duration * 1000)
+            self.recent_traces.append(trace.to_dict())
+
+    def sample_queues(self, depths: Dict[str, int]):
+        with self._lock:
+            for name, depth in depths.items():
+                if name not in self.queues:
+                    self.queues[name] = Histogram(QUEUE_BUCKETS, self.window)
+                self.queues[name].record(depth)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "timestamp": time.time(),
+                "segments": self.segments,
+                "partials": self.partials,
+                "stt": {"fallbacks": self.stt_fallbacks, "timeouts": self.stt_timeouts},
+                "stages_ms": {name: h.summary() for name, h in self.stages.items()},
+                "queue_depths": {name: h.summary() for name, h in self.queues.items()},
+                "recent_traces": list(self.recent_traces),
+            }
+
+    def dump_json(self, path: str):
+        """Écrit un instantané de façon atomique (lecture concurrente sans JSON tronqué)."""
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.snapshot(), f, indent=2)
+        os.replace(tmp_path, path)
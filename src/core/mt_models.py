@@ -0,0 +1,219 @@
+"""
+Préparation hors-ligne des modèles de traduction CTranslate2.
+
+Chaque modèle MarianMT est converti une fois par quantification (int8,
+int8_float32, float32), puis chaque variante est chronométrée sur le CPU
+local avec plusieurs valeurs d'intra_threads. La variante la plus rapide
+dont les traductions restent proches de la référence float32 est inscrite
+dans un manifeste que Translator lit au démarrage : la première traduction
+ne déclenche jamais de conversion.
+
+Usage:
+    python -m src.core.mt_models --model-dir models/translate
+"""
+import argparse
+import difflib
+import json
+import logging
+import os
+import platform
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import ctranslate2
+import numpy as np
+
+from src.core.marian_tokenizer import SPM_FILES, load_tokenizer
+
+logger = logging.getLogger(__name__)
+
+VARIANTS = ("int8", "int8_float32", "float32")
+REFERENCE_VARIANT = "float32"
+MANIFEST_FILE = "manifest.json"
+
+# Phrases de calibration : longueurs typiques d'un énoncé de réunion
+CALIBRATION = {
+    ("fr", "en"): [
+        "Bonjour à tous, merci d'être venus.",
+        "Est-ce que vous m'entendez bien ?",
+        "On passe à la diapositive suivante.",
+        "Je pense que nous devrions revoir le budget avant la fin du trimestre.",
+        "Pouvez-vous partager votre écran pour que tout le monde voie le tableau ?",
+    ],
+    ("en", "fr"): [
+        "Hello everyone, thanks for joining.",
+        "Can you hear me clearly?",
+        "Let's move on to the next slide.",
+        "I think we should review the budget before the end of the quarter.",
+        "Could you share your screen so that everyone can see the chart?",
+    ],
+}
+
+
+def pair_key(source_lang: str, target_lang: str) -> str:
+    return f"{source_lang}-{target_lang}"
+
+
+def variant_dir(model_dir: str, model_name: str, variant: str) -> str:
+    return os.path.join(model_dir, f"{model_name.replace('/', '_')}_ct2_{variant}")
+
+
+def load_manifest(model_dir: str) -> dict:
+    """Manifeste de sélection, vide si la préparation n'a pas été faite."""
+    try:
+        with open(os.path.join(model_dir, MANIFEST_FILE), encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def write_manifest(model_dir: str, manifest: dict):
+    """Écriture atomique : un Translator qui démarre ne lit jamais un manifeste tronqué."""
+    path = os.path.join(model_dir, MANIFEST_FILE)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def convert_variants(model_name: str, model_dir: str, variants: Sequence[str] = VARIANTS,
+                     force: bool = False) -> Dict[str, str]:
+    """Convertit un modèle MarianMT dans chaque quantification ; retourne variante -> dossier."""
+    unknown = set(variants) - set(VARIANTS)
+    if unknown:
+        raise ValueError(f"Quantification inconnue: {sorted(unknown)}. Utilisation: {VARIANTS}")
+    paths = {}
+    for variant in variants:
+        output_dir = variant_dir(model_dir, model_name, variant)
+        if force or not os.path.exists(os.path.join(output_dir, "model.bin")):
+            logger.info(f"Conversion de {model_name} ({variant}) vers {output_dir}...")
+            # Les modèles SentencePiece accompagnent le modèle converti : tokenization sans transformers
+            converter = ctranslate2.converters.TransformersConverter(model_name, copy_files=list(SPM_FILES))
+            converter.convert(output_dir, quantization=variant, force=True)
+        paths[variant] = output_dir
+    return paths
+
+
+def thread_candidates(cpu_count: Optional[int] = None) -> List[int]:
+    cpu_count = cpu_count or os.cpu_count() or 1
+    return sorted({n for n in (1, 2, 4, cpu_count) if n <= cpu_count})
+
+
+def benchmark_variant(path: str, compute_type: str, tokenizer, sentences: Sequence[str],
+                      intra_threads: int, repeat: int = 3) -> Tuple[float, List[str]]:
+    """Latence médiane (ms) d'une phrase seule, et traductions produites."""
+    translator = ctranslate2.Translator(path, device="cpu", compute_type=compute_type,
+                                        inter_threads=1, intra_threads=intra_threads)
+    tokens = [tokenizer.tokenize(sentence) for sentence in sentences]
+    translator.translate_batch(tokens[:1])  # Warm-up
+    latencies = []
+    for _ in range(repeat):
+        for source in tokens:
+            start = time.perf_counter()
+            translator.translate_batch([source])
+            latencies.append(time.perf_counter() - start)
+    outputs = [tokenizer.detokenize(result.hypotheses[0]) for result in translator.translate_batch(tokens)]
+    return float(np.percentile(latencies, 50)) * 1000, outputs
+
+
+def agreement(outputs: Sequence[str], reference: Sequence[str]) -> float:
+    """Similarité moyenne (difflib) des traductions avec la référence float32."""
+    if not reference:
+        return 1.0
+    return float(np.mean([difflib.SequenceMatcher(None, a, b).ratio() for a, b in zip(outputs, reference)]))
+
+
+def select_variant(model_name: str, paths: Dict[str, str], sentences: Sequence[str],
+                   min_agreement: float = 0.9, repeat: int = 3, threads: Optional[Sequence[int]] = None) -> dict:
+    """
+    Chronomètre chaque variante (meilleur intra_threads de chacune) et retient
+    la plus rapide dont l'accord avec la référence atteint `min_agreement`.
+    """
+    threads = list(threads or thread_candidates())
+    # La tokenization est identique entre variantes : mêmes fichiers .spm
+    tokenizer = load_tokenizer(model_name, next(iter(paths.values())))
+    reference = None
+    if REFERENCE_VARIANT in paths:
+        _, reference = benchmark_variant(paths[REFERENCE_VARIANT], REFERENCE_VARIANT, tokenizer, sentences,
+                                         threads[-1], repeat=1)
+
+    candidates = {}
+    for variant, path in paths.items():
+        best = None
+        for intra_threads in threads:
+            p50_ms, outputs = benchmark_variant(path, variant, tokenizer, sentences, intra_threads, repeat)
+            if best is None or p50_ms < best["p50_ms"]:
+                best = {"p50_ms": round(p50_ms, 2), "intra_threads": intra_threads, "outputs": outputs}
+        best["agreement"] = round(agreement(best.pop("outputs"), reference), 4) if reference else None
+        candidates[variant] = best
+        logger.info(f"{model_name} [{variant}]: {best}")
+
+    acceptable = [v for v, c in candidates.items() if c["agreement"] is None or c["agreement"] >= min_agreement]
+    if not acceptable:
+        raise RuntimeError(f"Aucune variante de {model_name} n'atteint l'accord minimal {min_agreement}.")
+    variant = min(acceptable, key=lambda v: candidates[v]["p50_ms"])
+    return {
+        "model_name": model_name,
+        "variant": variant,
+        "path": os.path.basename(paths[variant]),
+        "compute_type": variant,
+        "intra_threads": candidates[variant]["intra_threads"],
+        "p50_ms": candidates[variant]["p50_ms"],
+        "agreement": candidates[variant]["agreement"],
+        "candidates": candidates,
+    }
+
+
+def prepare(models: Dict[Tuple[str, str], str], model_dir: str, variants: Sequence[str] = VARIANTS,
+            min_agreement: float = 0.9, repeat: int = 3, skip_convert: bool = False, force: bool = False) -> dict:
+    """Conversion puis sélection pour chaque paire ; écrit et retourne le manifeste."""
+    os.makedirs(model_dir, exist_ok=True)
+    manifest = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "min_agreement": min_agreement,
+        "models": {},
+    }
+    for (source_lang, target_lang), model_name in models.items():
+        if skip_convert:
+            paths = {v: variant_dir(model_dir, model_name, v) for v in variants
+                     if os.path.exists(os.path.join(variant_dir(model_dir, model_name, v), "model.bin"))}
+        else:
+            paths = convert_variants(model_name, model_dir, variants, force=force)
+        if not paths:
+            raise FileNotFoundError(f"Aucune variante convertie de {model_name} dans {model_dir}.")
+        manifest["models"][pair_key(source_lang, target_lang)] = select_variant(
+            model_name, paths, CALIBRATION[(source_lang, target_lang)], min_agreement=min_agreement, repeat=repeat)
+    write_manifest(model_dir, manifest)
+    return manifest
+
+
+def main(argv=None) -> int:
+    from src.core.translator import Translator
+
+    parser = argparse.ArgumentParser(description="Conversion et sélection des modèles de traduction CTranslate2")
+    parser.add_argument("--model-dir", default="models/translate")
+    parser.add_argument("--variants", default=",".join(VARIANTS),
+                        type=lambda s: [x for x in s.split(",") if x], help=f"Parmi {VARIANTS}")
+    parser.add_argument("--min-agreement", type=float, default=0.9,
+                        help="Similarité minimale avec la référence float32 (0-1)")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--skip-convert", action="store_true", help="Sélection seule, sur les variantes déjà converties")
+    parser.add_argument("--force", action="store_true", help="Reconvertit même si la variante existe")
+    args = parser.parse_args(argv)
+
+    unknown = set(args.variants) - set(VARIANTS)
+    if unknown:
+        parser.error(f"Quantifications inconnues: {sorted(unknown)}. Utilisation: {VARIANTS}")
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    manifest = prepare(Translator.MODELS, args.model_dir, args.variants, min_agreement=args.min_agreement,
+                       repeat=args.repeat, skip_convert=args.skip_convert, force=args.force)
+    for pair, entry in manifest["models"].items():
+        logger.info(f"{pair}: {entry['variant']} (intra_threads={entry['intra_threads']}, {entry['p50_ms']} ms)")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,12 +1,24 @@
 import asyncio
+import functools
+import itertools
 import numpy as np
 import time
 import logging
 import torch
 import torchaudio.transforms as T
-from src.core.vad import VADDetector
-from src.stt.transcriber import Transcriber
-from src.core.translator import Translator
+from src.core.vad import VADDetector, OnnxVADDetector
+from src.core.energy_gate import EnergyGate
+from src.core.endpointer import Endpointer
+from src.core.ring_buffer import AudioRingBuffer
+from src.core.executors import StageExecutors
+from src.core.metrics import PipelineMetrics
+from src.core.tracing import tracer
+from src.core.stage_queue import StageQueue
+from src.core.governor import ModelGovernor
+from src.stt.transcriber import Transcriber, DecodeStats
+from src.stt.streaming import StreamingTranscriber
+from src.core.translator import Translator, split_sentences
+from src.core.translation_cache import TranslationCache
 from src.core.tts import TTS
 
 # Configuration du logger pour éviter la pollution de la console
@@ -14,10 +26,73 @@ logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(
 logger = logging.getLogger(__name__)
 
 class AsyncPipeline:
-    def __init__(self, vad_threshold=0.5, model_size="large-v3", device="auto", input_sample_rate=16000):
-        self.vad = VADDetector(threshold=vad_threshold)
-        self.transcriber = Transcriber(model_size=model_size, device=device)
-        self.translator = Translator(device=device)
+    VAD_BACKENDS = ("torch", "onnx")
+    # Files entre étages : taille max, politique de délestage et âge max (ms)
+    DEFAULT_QUEUE_POLICIES = {
+        "audio": {"maxsize": 256, "policy": "drop_oldest"},
+        "transcription": {"maxsize": 16, "policy": "drop_stale", "max_age_ms": 5000},
+        "translation": {"maxsize": 16, "policy": "drop_stale", "max_age_ms": 5000},
+        "tts": {"maxsize": 8, "policy": "drop_stale", "max_age_ms": 5000},
+    }
+
+    def __init__(self, vad_threshold=0.5, model_size="large-v3", device="auto", input_sample_rate=16000,
+                 vad_backend="torch", use_energy_gate=True, min_silence_ms=500, max_segment_ms=15000,
+                 buffer_capacity_ms=None, buffer_overflow="truncate",
+                 streaming_stt=False, partial_interval_ms=500,
+                 stt_batch_size=8, stt_batch_wait_ms=0, mt_batch_size=16, mt_batch_wait_ms=0,
+                 streaming_mt=False, mt_clause_tokens=24, stage_workers=None,
+                 metrics_path=None, metrics_interval_s=5.0, trace_path=None, queue_policies=None,
+                 model_tiers=None, latency_target_ms=1200, stt_latency_share=0.5, direct_translation=False,
+                 translation_cache_size=2048, translation_cache_path=None):
+        if vad_backend not in self.VAD_BACKENDS:
+            raise ValueError(f"Backend VAD inconnu: {vad_backend}. Utilisation: {self.VAD_BACKENDS}")
+        # Appels modèles exécutés hors de la boucle asyncio, un pool par étage ;
+        # les modèles CTranslate2 acceptent autant d'appels concurrents que de workers
+        self.executors = StageExecutors(stage_workers)
+        stt_workers = self.executors.workers["stt"]
+        # Pré-filtre énergétique : évite d'appeler Silero sur le bruit de fond
+        self.energy_gate = EnergyGate() if use_energy_gate else None
+        if vad_backend == "onnx":
+            # Modèle Silero ONNX local : pas de torch.hub, démarrage hors-ligne
+            self.vad = OnnxVADDetector(threshold=vad_threshold, energy_gate=self.energy_gate)
+        else:
+            self.vad = VADDetector(threshold=vad_threshold, energy_gate=self.energy_gate)
+        # Paliers Whisper préchargés (du plus précis au plus rapide) pilotés par le gouverneur
+        self.governor = None
+        if model_tiers:
+            if not 0 < stt_latency_share <= 1:
+                raise ValueError(f"Part STT du budget de latence invalide: {stt_latency_share}. Utilisation: ]0, 1]")
+            initial = model_size if model_size in model_tiers else model_tiers[0]
+            # latency_target_ms vise le premier son ; le gouverneur ne mesure que fin de parole -> fin STT
+            self.governor = ModelGovernor(model_tiers, initial=initial,
+                                          target_latency_ms=latency_target_ms * stt_latency_share)
+            self.transcribers = {tier: Transcriber(model_size=tier, device=device, num_workers=stt_workers)
+                                 for tier in model_tiers}
+            self.transcriber = self.transcribers[initial]
+        else:
+            self.transcriber = Transcriber(model_size=model_size, device=device, num_workers=stt_workers)
+            self.transcribers = {model_size: self.transcriber}
+        # Batch STT : segments déjà en attente décodés ensemble (attente max en ms)
+        self.stt_batch_size = stt_batch_size
+        self.stt_batch_wait = stt_batch_wait_ms / 1000
+        # Transcription partielle du segment en cours (accord local entre hypothèses)
+        self.streaming_stt = None
+        if streaming_stt:
+            self.streaming_stt = StreamingTranscriber(self.transcriber, interval_ms=partial_interval_ms)
+        # X -> en traduit par Whisper (task="translate") : MarianMT court-circuité
+        self.direct_translation = direct_translation
+        # Batch MT : énoncés en attente découpés en phrases et traduits ensemble
+        self.mt_batch_size = mt_batch_size
+        self.mt_batch_wait = mt_batch_wait_ms / 1000
+        # Traduction en flux : chaque proposition part en synthèse dès qu'elle est décodée
+        self.streaming_mt = streaming_mt
+        self.mt_clause_tokens = mt_clause_tokens
+        # Cache des traductions (LRU mémoire + SQLite si translation_cache_path) ; taille 0 : désactivé
+        self.translation_cache = None
+        if translation_cache_size:
+            self.translation_cache = TranslationCache(capacity=translation_cache_size, db_path=translation_cache_path)
+        self.translator = Translator(device=device, max_batch_size=mt_batch_size, cache=self.translation_cache,
+                                     inter_threads=self.executors.workers["mt"])
         self.tts = TTS(device=device)
         
         self.input_sample_rate = input_sample_rate
@@ -26,18 +101,81 @@ class AsyncPipeline:
         if self.input_sample_rate != self.target_sample_rate:
             self.resampler = T.Resample(self.input_sample_rate, self.target_sample_rate)
         
-        self.audio_queue = asyncio.Queue()
-        self.transcription_queue = asyncio.Queue()
-        self.translation_queue = asyncio.Queue()
-        self.tts_queue = asyncio.Queue()
-        
+        # Files bornées : sous surcharge la latence reste bornée au lieu de croître
+        policies = self._queue_policies(queue_policies)
+        self.audio_queue = self._make_queue("audio", policies["audio"], lambda item: item[1])
+        self.transcription_queue = self._make_queue("transcription", policies["transcription"], lambda item: item[1])
+        self.translation_queue = self._make_queue("translation", policies["translation"], lambda item: item[2])
+        self.tts_queue = self._make_queue("tts", policies["tts"], lambda item: item[2])
+        self._stream_reset_pending = False
+
+        # Timeline Chrome trace (Perfetto) écrite à l'arrêt ; désactivée par défaut
+        self.trace_path = trace_path
+        if trace_path:
+            tracer.enable()
+
         self.is_running = True
         self._last_error_msg = None
+
+        # Trace de latence par segment, agrégée en histogrammes (export JSON si metrics_path)
+        self.metrics = PipelineMetrics()
+        self.metrics_path = metrics_path
+        self.metrics_interval = metrics_interval_s
+        self._onset_time = None
         
-        # Accumulateur de segments audio
-        self.current_segment = []
-        self.silence_chunks = 0
-        self.MAX_SILENCE_CHUNKS = 25  # Environ 800ms de silence (25 * 32ms)
+        # Endpointing temporel piloté par les trames VAD (indépendant de la taille des chunks)
+        self.endpointer = Endpointer(sampling_rate=self.target_sample_rate, threshold=vad_threshold,
+                                     min_silence_ms=min_silence_ms, max_segment_ms=max_segment_ms)
+        # Buffer circulaire préalloué : segment en cours + pré-roll, plafond mémoire fixe
+        if buffer_capacity_ms is None:
+            buffer_capacity_ms = max_segment_ms + 1000
+        self.segment_buffer = AudioRingBuffer(
+            capacity=int(buffer_capacity_ms * self.target_sample_rate / 1000),
+            overflow=buffer_overflow,
+        )
+        self._last_partial_pos = 0
+
+    def _queue_policies(self, overrides) -> dict:
+        overrides = overrides or {}
+        unknown = set(overrides) - set(self.DEFAULT_QUEUE_POLICIES)
+        if unknown:
+            raise ValueError(f"Files inconnues: {sorted(unknown)}. Utilisation: {list(self.DEFAULT_QUEUE_POLICIES)}")
+        return {name: {**default, **overrides.get(name, {})} for name, default in self.DEFAULT_QUEUE_POLICIES.items()}
+
+    def _make_queue(self, name, config, item_of) -> StageQueue:
+        """item_of(item) : chunk horodaté (audio) ou SegmentTrace de l'élément."""
+        def timestamp_of(item):
+            origin = item_of(item)
+            if name == "audio":
+                return origin
+            return origin.marks.get("endpoint", origin.marks.get("capture"))
+
+        def on_drop(item, reason):
+            logger.warning(f"File {name} saturée : élément jeté ({reason})")
+            if name == "audio":
+                return
+            trace = item_of(item)
+            if name == "tts":
+                trace.tts_pending -= 1
+                # Traduction en flux : une autre proposition du même énoncé est (ou sera)
+                # synthétisée et clôt la trace ; seule la perte de la dernière l'abandonne
+                if "tts_start" in trace.marks or trace.tts_pending > 0 or trace.tts_streaming:
+                    return
+            self.metrics.record(trace)
+            if name == "transcription" and item[2] and self.streaming_stt is not None:
+                # Segment final perdu : l'état du STT en flux doit repartir de zéro
+                self._stream_reset_pending = True
+
+        max_age_ms = config.get("max_age_ms")
+        return StageQueue(name, maxsize=config.get("maxsize", 0), policy=config.get("policy", "block"),
+                          max_age_s=max_age_ms / 1000 if max_age_ms is not None else None,
+                          timestamp_of=timestamp_of, on_drop=on_drop)
+
+    def get_queue_stats(self) -> dict:
+        """Taille, politique et compteurs de délestage de chaque file."""
+        queues = {"audio": self.audio_queue, "transcription": self.transcription_queue,
+                  "translation": self.translation_queue, "tts": self.tts_queue}
+        return {name: q.get_stats() for name, q in queues.items() if isinstance(q, StageQueue)}
 
     async def add_audio_chunk(self, chunk: np.ndarray):
         """Ajoute un chunk audio au pipeline. Normalisation mono automatique."""
@@ -55,7 +193,7 @@ class AsyncPipeline:
                 tensor_chunk = torch.from_numpy(chunk.astype(np.float32)).unsqueeze(0)
                 chunk = self.resampler(tensor_chunk).squeeze(0).numpy()
             
-            await self.audio_queue.put(chunk)
+            await self.audio_queue.put((chunk, time.monotonic()))
         except Exception as e:
             msg = f"Error adding audio chunk: {e}"
             if msg != self._last_error_msg:
@@ -67,27 +205,34 @@ class AsyncPipeline:
         logger.info("Starting audio processing loop...")
         while self.is_running:
             try:
-                chunk = await self.audio_queue.get()
-                is_speech = self.vad.is_speech(chunk)
-                
-                if is_speech:
-                    self.current_segment.append(chunk)
-                    self.silence_chunks = 0
-                else:
-                    if self.current_segment:
-                        self.silence_chunks += 1
-                        self.current_segment.append(chunk)
-                        
-                        if self.silence_chunks >= self.MAX_SILENCE_CHUNKS:
-                            # Fin de segment détectée
-                            actual_segment = self.current_segment[:-self.MAX_SILENCE_CHUNKS]
-                            if actual_segment:
-                                full_segment = np.concatenate(actual_segment)
-                                start_time = time.time()
-                                await self.transcription_queue.put((full_segment, start_time))
-                            self.current_segment = []
-                            self.silence_chunks = 0
-                
+                chunk, captured_at = await self.audio_queue.get()
+                self.segment_buffer.write(chunk)
+
+                frames = await self.executors.run("vad", self.vad.process_chunk, chunk)
+                was_in_segment = self.endpointer.in_segment
+                segments = self.endpointer.process(frames)
+                now = time.monotonic()
+                onset_time = (self._onset_time or now) if was_in_segment else now
+                for start, end in segments:
+                    # Fin de segment détectée
+                    full_segment = self.segment_buffer.read(start, end)
+                    if full_segment.size:
+                        trace = self.metrics.new_trace()
+                        trace.mark("capture", captured_at)
+                        trace.mark("vad_onset", onset_time)
+                        trace.mark("endpoint", now)
+                        await self.transcription_queue.put((full_segment, trace, True))
+                    onset_time = now
+
+                if not self.endpointer.in_segment:
+                    self._onset_time = None
+                elif not was_in_segment or segments:
+                    self._onset_time = now
+
+                if self.streaming_stt is not None and self.endpointer.in_segment:
+                    await self._submit_partial(captured_at)
+
+                self.metrics.sample_queues(self._queue_depths())
                 self.audio_queue.task_done()
             except Exception as e:
                 msg = f"Error in process_audio_loop: {e}"
@@ -96,34 +241,259 @@ class AsyncPipeline:
                     self._last_error_msg = msg
                 await asyncio.sleep(0.5) # Ralentir en cas d'erreur persistante
 
+    async def _submit_partial(self, captured_at):
+        """Envoie le buffer du segment en cours au STT toutes les partial_interval_ms."""
+        position = self.segment_buffer.write_pos
+        start = max(self.endpointer.segment_start, self._last_partial_pos)
+        if position - start < self.streaming_stt.interval_samples:
+            return
+        self._last_partial_pos = position
+        partial = self.segment_buffer.read(self.endpointer.segment_start, position)
+        trace = self.metrics.new_trace(partial=True)
+        trace.mark("capture", captured_at)
+        trace.mark("vad_onset", self._onset_time or captured_at)
+        # Pour une partielle, la "fin" est la coupe du buffer soumis
+        trace.mark("endpoint")
+        await self.transcription_queue.put((partial, trace, False))
+
+    def _queue_depths(self) -> dict:
+        return {
+            "audio": self.audio_queue.qsize(),
+            "transcription": self.transcription_queue.qsize(),
+            "translation": self.translation_queue.qsize(),
+            "tts": self.tts_queue.qsize(),
+        }
+
+    @staticmethod
+    async def _collect_batch(queue, first, max_items, wait) -> list:
+        """Complète le batch avec les éléments en attente, dans la limite du budget (secondes)."""
+        batch = [first]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + wait
+        while len(batch) < max_items:
+            try:
+                item = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+            batch.append(item)
+        return batch
+
     async def transcription_loop(self):
         """Boucle de transcription."""
         logger.info("Starting transcription loop...")
         while self.is_running:
             try:
-                segment, start_time = await self.transcription_queue.get()
-                text, info = self.transcriber.transcribe(segment)
-                if text:
-                    logger.info(f"STT [{info.language}]: {text}")
-                    await self.translation_queue.put((text, info.language, start_time))
+                item = await self.transcription_queue.get()
+                task = self._stt_task()
+                language = self._stt_language(task)
+                if self.streaming_stt is None:
+                    batch = await self._collect_batch(self.transcription_queue, item,
+                                                      self.stt_batch_size, self.stt_batch_wait)
+                    segments = [segment for segment, _, _ in batch]
+                    traces = [trace for _, trace, _ in batch]
+                    stats = DecodeStats()
+                    self._mark_all(traces, "stt_start")
+                    if len(segments) == 1 or language is None:
+                        # Détection de langue : le batch n'en détecte qu'une pour tous les segments
+                        results = [await self.executors.run("stt", self.transcriber.transcribe, segment,
+                                                            language=language, task=task, stats=stats)
+                                   for segment in segments]
+                    else:
+                        logger.debug(f"STT batch: {len(segments)} segments")
+                        results = await self.executors.run("stt", self.transcriber.transcribe_batch, segments,
+                                                           language=language, task=task, stats=stats)
+                    self._mark_all(traces, "stt_end")
+                    self._attach_decode_stats(traces, stats)
+                    self._observe_stt(segments, traces)
+                    for trace, (text, info) in zip(traces, results):
+                        await self._emit_transcription(text, info, trace, task)
+                    for _ in batch:
+                        self.transcription_queue.task_done()
+                    continue
+
+                segment, trace, is_final = item
+                text, info = None, None
+                if self._stream_reset_pending or task != self.streaming_stt.task:
+                    self._stream_reset_pending = False
+                    self.streaming_stt.reset()
+                    self.streaming_stt.task = task
+                    self.streaming_stt.language = language
+                if is_final:
+                    stats = DecodeStats()
+                    trace.mark("stt_start")
+                    text, info = await self.executors.run("stt", self.streaming_stt.finish, segment, stats=stats)
+                    trace.mark("stt_end")
+                    self._attach_decode_stats([trace], stats)
+                    self._observe_stt([segment], [trace])
+                elif self.transcription_queue.qsize() == 0:
+                    # Sinon un buffer plus récent attend déjà : inutile de décoder celui-ci
+                    stats = DecodeStats()
+                    trace.mark("stt_start")
+                    text, info = await self.executors.run("stt", self.streaming_stt.feed, segment, stats=stats)
+                    trace.mark("stt_end")
+                    self._attach_decode_stats([trace], stats)
+                    self._observe_stt([segment], [trace])
+                await self._emit_transcription(text, info, trace, task)
                 self.transcription_queue.task_done()
             except Exception as e:
                 logger.error(f"Error in transcription_loop: {e}")
                 await asyncio.sleep(0.5)
 
+    def _observe_stt(self, segments, traces):
+        """Transmet RTF, latence et profondeur de file au gouverneur ; change de palier si demandé."""
+        if self.governor is None:
+            return
+        audio_s = sum(len(segment) for segment in segments) / self.target_sample_rate
+        decode_s = traces[0].span("stt_start", "stt_end")
+        latencies = [t.span("endpoint", "stt_end") for t in traces if not t.partial]
+        tier = self.governor.observe(audio_s, decode_s, max(latencies) if latencies else None,
+                                     self.transcription_queue.qsize())
+        if tier is not None:
+            self.transcriber = self.transcribers[tier]
+            if self.streaming_stt is not None:
+                self.streaming_stt.transcriber = self.transcriber
+
+    @staticmethod
+    def _attach_decode_stats(traces, stats):
+        decode = stats.to_dict()
+        for trace in traces:
+            trace.decode = decode
+        if stats.timed_out:
+            tracer.instant("stt.deadline", "stt", attempts=stats.attempts)
+
+    @staticmethod
+    def _mark_all(traces, name):
+        now = time.monotonic()
+        for trace in traces:
+            trace.mark(name, now)
+
+    def _stt_task(self) -> str:
+        """Tâche Whisper du prochain décodage."""
+        return "translate" if self.direct_translation else "transcribe"
+
+    def _stt_language(self, task: str):
+        """
+        Langue imposée à Whisper. En traduction directe, la langue est détectée
+        (None) : la parole anglaise est reconnue comme telle et passe par la
+        cascade en -> fr au lieu d'être « traduite » en anglais.
+        """
+        return None if task == "translate" else "fr"
+
+    async def _emit_transcription(self, text, info, trace, task="transcribe"):
+        if not text:
+            self.metrics.record(trace)
+        elif task == "translate" and info.language != "en":
+            # Texte déjà en anglais : directement vers la synthèse
+            logger.info(f"STT+TRAD [{info.language}->en]: {text}")
+            await self._queue_tts(text, "en", trace)
+        else:
+            logger.info(f"STT [{info.language}]: {text}")
+            await self.translation_queue.put((text, info.language, trace))
+
+    def _target_lang(self, source_lang):
+        """Langue cible d'un énoncé, None pour ne pas le traduire."""
+        return "en" if source_lang == "fr" else "fr"
+
+    async def _translate_batch_to_tts(self, batch):
+        """Traduit un lot de (texte, langue, trace) phrase par phrase et met chaque énoncé en file de synthèse."""
+        jobs, requests = [], []
+        for text, source_lang, trace in batch:
+            target_lang = self._target_lang(source_lang)
+            if target_lang is None:
+                logger.debug(f"Ignoré [{source_lang}]: {text}")
+                self.metrics.record(trace)
+                continue
+            sentences = split_sentences(text)
+            requests.extend((sentence, source_lang, target_lang) for sentence in sentences)
+            jobs.append((trace, target_lang, len(sentences)))
+        if not jobs:
+            return
+
+        traces = [trace for trace, _, _ in jobs]
+        self._mark_all(traces, "mt_start")
+        if len(requests) == 1:
+            # Énoncé isolé d'une phrase : chemin direct, sans regroupement
+            translations = [await self.executors.run("mt", self.translator.translate, *requests[0])]
+        else:
+            logger.debug(f"MT batch: {len(jobs)} énoncés, {len(requests)} phrases")
+            translations = await self.executors.run("mt", self.translator.translate_many, requests)
+        self._mark_all(traces, "mt_end")
+
+        position = 0
+        for trace, target_lang, count in jobs:
+            translation = " ".join(t for t in translations[position:position + count] if t)
+            position += count
+            if translation:
+                logger.info(f"TRAD [{target_lang}]: {translation}")
+                await self._queue_tts(translation, target_lang, trace)
+            else:
+                self.metrics.record(trace)
+
+    async def _stream_translation_to_tts(self, text, source_lang, trace):
+        """Traduit un énoncé en flux : chaque proposition est mise en file de synthèse dès qu'elle est prête."""
+        target_lang = self._target_lang(source_lang)
+        if target_lang is None:
+            logger.debug(f"Ignoré [{source_lang}]: {text}")
+            self.metrics.record(trace)
+            return
+        # Générateurs paresseux : le décodage avance à chaque next(), dans le thread MT
+        clauses = itertools.chain.from_iterable(
+            self.translator.translate_stream(sentence, source_lang, target_lang, self.mt_clause_tokens)
+            for sentence in split_sentences(text)
+        )
+        trace.mark("mt_start")
+        emitted = 0
+        trace.tts_streaming = True
+        try:
+            while True:
+                clause = await self.executors.run("mt", next, clauses, None)
+                if clause is None:
+                    break
+                if not emitted:
+                    trace.mark("mt_end")  # Première proposition prête : la synthèse peut commencer
+                emitted += 1
+                logger.info(f"TRAD [{target_lang}] ({emitted}): {clause}")
+                await self._queue_tts(clause, target_lang, trace)
+        finally:
+            trace.tts_streaming = False
+        if not emitted:
+            trace.mark("mt_end")
+            self.metrics.record(trace)
+        elif trace.tts_pending == 0 and "tts_start" not in trace.marks:
+            # Toutes les propositions ont été jetées de la file pendant la traduction
+            self.metrics.record(trace)
+
+    async def _queue_tts(self, text, lang, trace):
+        """Met une proposition en file de synthèse en tenant le compte de celles de l'énoncé."""
+        trace.tts_pending += 1
+        await self.tts_queue.put((text, lang, trace))
+
+    def _on_first_audio(self, trace, t):
+        """Appelé par le lecteur quand le premier sample du segment sort."""
+        trace.mark("first_audio", t)
+        self.metrics.record(trace)
+
     async def translation_loop(self):
         """Boucle de traduction."""
         logger.info("Starting translation loop...")
         while self.is_running:
             try:
-                text, source_lang, start_time = await self.translation_queue.get()
-                target_lang = "en" if source_lang == "fr" else "fr"
-                
-                translation = self.translator.translate(text, source_lang, target_lang)
-                if translation:
-                    logger.info(f"TRAD [{target_lang}]: {translation}")
-                    await self.tts_queue.put((translation, target_lang, start_time))
-                self.translation_queue.task_done()
+                item = await self.translation_queue.get()
+                if self.streaming_mt:
+                    await self._stream_translation_to_tts(*item)
+                    self.translation_queue.task_done()
+                    continue
+                batch = await self._collect_batch(self.translation_queue, item,
+                                                  self.mt_batch_size, self.mt_batch_wait)
+                await self._translate_batch_to_tts(batch)
+                for _ in batch:
+                    self.translation_queue.task_done()
             except Exception as e:
                 logger.error(f"Error in translation_loop: {e}")
                 await asyncio.sleep(0.5)
@@ -133,18 +503,29 @@ class AsyncPipeline:
         logger.info("Starting TTS loop...")
         while self.is_running:
             try:
-                text, lang, start_time = await self.tts_queue.get()
+                text, lang, trace = await self.tts_queue.get()
                 
                 # Mapping pour Kokoro
                 voice = "af_sarah"
                 kk_lang = "en-us" if lang == "en" else "fr-fr"
                 
-                samples, sample_rate = self.tts.generate(text, voice=voice, lang=kk_lang)
+                # Traduction en flux : seule la première proposition d'un énoncé est horodatée
+                first_clause = "tts_start" not in trace.marks
+                if first_clause:
+                    trace.mark("tts_start")
+                samples, sample_rate = await self.executors.run("tts", self.tts.generate, text, voice=voice, lang=kk_lang)
+                if first_clause:
+                    trace.mark("tts_end")
                 if samples is not None:
-                    end_time = time.time()
-                    latency = end_time - start_time
-                    logger.info(f"E2E Latency: {latency:.2f}s")
-                    self.tts.play(samples, sample_rate)
+                    on_start = None
+                    if first_clause:
+                        logger.info(f"E2E Latency: {trace.span('endpoint', 'tts_end'):.2f}s")
+                        on_start = functools.partial(self._on_first_audio, trace)
+                    # Non bloquant : lecteur persistant
+                    self.tts.play(samples, sample_rate, on_start=on_start)
+                elif first_clause:
+                    # Sans son : la trace est close ici ; sinon _on_first_audio la clôt au premier son
+                    self.metrics.record(trace)
                 
                 self.tts_queue.task_done()
             except Exception as e:
@@ -154,12 +535,35 @@ class AsyncPipeline:
     async def start(self):
         """Lance toutes les boucles du pipeline."""
         tasks = [
-            asyncio.create_task(self.process_audio_loop()),
-            asyncio.create_task(self.transcription_loop()),
-            asyncio.create_task(self.translation_loop()),
-            asyncio.create_task(self.tts_loop())
+            asyncio.create_task(self.process_audio_loop(), name="audio_loop"),
+            asyncio.create_task(self.transcription_loop(), name="transcription_loop"),
+            asyncio.create_task(self.translation_loop(), name="translation_loop"),
+            asyncio.create_task(self.tts_loop(), name="tts_loop")
         ]
+        if self.metrics_path:
+            tasks.append(asyncio.create_task(self.metrics_loop(), name="metrics_loop"))
         await asyncio.gather(*tasks)
 
+    async def metrics_loop(self):
+        """Export périodique des métriques de latence (JSON, écriture atomique)."""
+        while self.is_running:
+            await asyncio.sleep(self.metrics_interval)
+            try:
+                self.metrics.dump_json(self.metrics_path)
+            except Exception as e:
+                logger.error(f"Error in metrics_loop: {e}")
+
     def stop(self):
         self.is_running = False
+        self.executors.shutdown()
+        self.tts.stop()
+        if self.trace_path:
+            self.dump_trace(self.trace_path)
+
+    def dump_trace(self, path):
+        """Écrit la timeline en mémoire (format Chrome trace-event)."""
+        try:
+            tracer.dump(path)
+            logger.info(f"Trace écrite: {path} (ouvrir dans https://ui.perfetto.dev)")
+        except Exception as e:
+            logger.error(f"Error writing trace: {e}")
@@ -2,6 +2,7 @@
 Pipeline étendu pour Google Meet avec micro virtuel.
 """
 import asyncio
+import functools
 import numpy as np
 import time
 import logging
@@ -23,14 +24,16 @@ class MeetPipeline(AsyncPipeline):
     """
     
     def __init__(self, vad_threshold=0.5, model_size="large-v3", device="auto", 
-                 input_sample_rate=16000, virtual_mic_name="vox-transync-mic"):
+                 input_sample_rate=16000, virtual_mic_name="vox-transync-mic", **pipeline_kwargs):
         """
         Initialise le pipeline Google Meet.
         
         Args:
             virtual_mic_name: Nom du micro virtuel à créer
+            pipeline_kwargs: Options transmises à AsyncPipeline (vad_backend,
+                use_energy_gate, min_silence_ms, max_segment_ms, ...)
         """
-        super().__init__(vad_threshold, model_size, device, input_sample_rate)
+        super().__init__(vad_threshold, model_size, device, input_sample_rate, **pipeline_kwargs)
         
         self.virtual_mic_name = virtual_mic_name
         self.virtual_mic: Optional[VirtualMicrophone] = None
@@ -64,7 +67,7 @@ class MeetPipeline(AsyncPipeline):
     async def stop(self):
         """Arrête le pipeline et nettoie le micro virtuel."""
         # Arrêter le pipeline parent
-        self.is_running = False
+        super().stop()
         
         # Nettoyer le micro virtuel
         if self.virtual_mic and self.use_virtual_mic:
@@ -79,7 +82,7 @@ class MeetPipeline(AsyncPipeline):
         logger.info("Starting TTS loop (Google Meet mode)...")
         while self.is_running:
             try:
-                text, lang, start_time = await self.tts_queue.get()
+                text, lang, trace = await self.tts_queue.get()
                 
                 # Mapping pour Kokoro basé sur la langue
                 if lang == "en":
@@ -89,21 +92,30 @@ class MeetPipeline(AsyncPipeline):
                     voice = "ff_siwis"
                     kk_lang = "fr-fr"
                 
-                # Générer l'audio TTS
-                samples, sample_rate = self.tts.generate(text, voice=voice, lang=kk_lang)
+                # Générer l'audio TTS (traduction en flux : seule la première proposition est horodatée)
+                first_clause = "tts_start" not in trace.marks
+                if first_clause:
+                    trace.mark("tts_start")
+                samples, sample_rate = await self.executors.run("tts", self.tts.generate, text, voice=voice, lang=kk_lang)
+                if first_clause:
+                    trace.mark("tts_end")
                 
                 if samples is not None:
-                    end_time = time.time()
-                    latency = end_time - start_time
-                    logger.info(f"E2E Latency: {latency:.2f}s")
+                    on_start = None
+                    if first_clause:
+                        logger.info(f"E2E Latency: {trace.span('endpoint', 'tts_end'):.2f}s")
+                        on_start = functools.partial(self._on_first_audio, trace)
                     
                     # Jouer l'audio via micro virtuel ou sortie par défaut
                     if self.use_virtual_mic and self.virtual_mic:
-                        self.virtual_mic.play_audio(samples, sample_rate)
+                        self.virtual_mic.play_audio(samples, sample_rate, on_start=on_start)
                         logger.debug(f"Audio injecté dans micro virtuel: {len(samples)} samples")
                     else:
-                        self.tts.play(samples, sample_rate)
+                        self.tts.play(samples, sample_rate, on_start=on_start)  # Non bloquant : lecteur persistant
                         logger.debug(f"Audio joué sur sortie par défaut: {len(samples)} samples")
+                elif first_clause:
+                    # Sans son : la trace est close ici ; sinon _on_first_audio la clôt au premier son
+                    self.metrics.record(trace)
                 
                 self.tts_queue.task_done()
                 
@@ -111,6 +123,12 @@ class MeetPipeline(AsyncPipeline):
                 logger.error(f"Error in tts_loop: {e}")
                 await asyncio.sleep(0.5)
     
+    def _stt_task(self) -> str:
+        # Whisper ne traduit que vers l'anglais : seul le mode fr-en peut court-circuiter MarianMT
+        if self.direct_translation and self.translation_mode == "fr-en":
+            return "translate"
+        return "transcribe"
+    
     def set_translation_mode(self, mode: str):
         """
         Définit le mode de traduction.
@@ -126,48 +144,14 @@ class MeetPipeline(AsyncPipeline):
         self.translation_mode = mode
         logger.info(f"Mode de traduction défini: {mode}")
     
-    async def translation_loop(self):
-        """Boucle de traduction étendue avec gestion de mode."""
-        logger.info("Starting translation loop (Google Meet mode)...")
-        while self.is_running:
-            try:
-                text, source_lang, start_time = await self.translation_queue.get()
-                
-                # Déterminer la langue cible basée sur le mode
-                if self.translation_mode == "fr-en":
-                    # Seulement traduire si source est français
-                    if source_lang == "fr":
-                        target_lang = "en"
-                        translated = self.translator.translate(text, source_lang, target_lang)
-                        logger.info(f"TRAD [{target_lang}]: {translated}")
-                        await self.tts_queue.put((translated, target_lang, start_time))
-                    else:
-                        # Ignorer l'anglais en mode fr-en
-                        logger.debug(f"Ignoré (mode fr-en): {text}")
-                
-                elif self.translation_mode == "en-fr":
-                    # Seulement traduire si source est anglais
-                    if source_lang == "en":
-                        target_lang = "fr"
-                        translated = self.translator.translate(text, source_lang, target_lang)
-                        logger.info(f"TRAD [{target_lang}]: {translated}")
-                        await self.tts_queue.put((translated, target_lang, start_time))
-                    else:
-                        # Ignorer le français en mode en-fr
-                        logger.debug(f"Ignoré (mode en-fr): {text}")
-                
-                else:
-                    # Mode bidirectionnel (hérité)
-                    target_lang = "en" if source_lang == "fr" else "fr"
-                    translated = self.translator.translate(text, source_lang, target_lang)
-                    logger.info(f"TRAD [{target_lang}]: {translated}")
-                    await self.tts_queue.put((translated, target_lang, start_time))
-                
-                self.translation_queue.task_done()
-                
-            except Exception as e:
-                logger.error(f"Error in translation_loop: {e}")
-                await asyncio.sleep(0.5)
+    def _target_lang(self, source_lang):
+        """Langue cible selon le mode ; la langue déjà cible n'est pas traduite."""
+        if self.translation_mode == "fr-en":
+            return "en" if source_lang == "fr" else None
+        if self.translation_mode == "en-fr":
+            return "fr" if source_lang == "en" else None
+        # Mode bidirectionnel (hérité)
+        return super()._target_lang(source_lang)
     
     def get_status(self) -> dict:
         """
@@ -185,6 +169,12 @@ class MeetPipeline(AsyncPipeline):
             "transcription_queue_size": self.transcription_queue.qsize(),
             "translation_queue_size": self.translation_queue.qsize(),
             "tts_queue_size": self.tts_queue.qsize(),
+            "vad_gate": self.energy_gate.get_stats() if self.energy_gate else None,
+            "virtual_mic_playback": self.virtual_mic.get_playback_stats() if self.virtual_mic else None,
+            "latency_ms": self.metrics.snapshot()["stages_ms"],
+            "queues": self.get_queue_stats(),
+            "stt_governor": self.governor.get_status() if self.governor else None,
+            "translation_cache": self.translation_cache.get_stats() if self.translation_cache else None,
         }
         return status
 
@@ -0,0 +1,124 @@
+"""
+Lecture audio non bloquante.
+Un flux de sortie PortAudio unique reste ouvert ; les buffers synthétisés sont
+mis en file et enchaînés sans trou depuis le callback audio.
+"""
+import queue
+import threading
+import time
+import logging
+import numpy as np
+import sounddevice as sd
+from typing import Callable, Optional
+
+from src.core.tracing import tracer
+
+logger = logging.getLogger(__name__)
+
+
+def resample_linear(samples: np.ndarray, source_rate: int, target_rate: int) -> np.ndarray:
+    """Rééchantillonnage linéaire (suffisant pour de la voix de synthèse)."""
+    if source_rate == target_rate or len(samples) == 0:
+        return samples
+    n_out = int(round(len(samples) * target_rate / source_rate))
+    positions = np.arange(n_out) * (source_rate / target_rate)
+    return np.interp(positions, np.arange(len(samples)), samples).astype(np.float32)
+
+
+class AudioPlayer:
+    """
+    Lecteur persistant : play() met le buffer en file et rend la main
+    immédiatement ; le callback de l'OutputStream lit les buffers à la suite
+    et complète par du silence quand la file est vide.
+    """
+
+    def __init__(self, sample_rate: int = 24000, device: Optional[int] = None, channels: int = 1):
+        self.sample_rate = sample_rate
+        self.device = device
+        self.channels = channels
+        self.stream: Optional[sd.OutputStream] = None
+        self._queue: "queue.Queue[tuple]" = queue.Queue()
+        self._current: Optional[np.ndarray] = None
+        self._position = 0
+        self._drained = threading.Event()
+        self._drained.set()
+        # Rend atomiques « file + _drained » entre play() et le callback audio
+        self._drain_lock = threading.Lock()
+
+    def start(self):
+        """Ouvre le flux de sortie (une seule fois)."""
+        if self.stream is not None:
+            return
+        self.stream = sd.OutputStream(
+            samplerate=self.sample_rate,
+            channels=self.channels,
+            dtype="float32",
+            device=self.device,
+            callback=self._callback,
+        )
+        self.stream.start()
+
+    def play(self, samples: np.ndarray, sample_rate: int,
+             on_start: Optional[Callable[[float], None]] = None):
+        """
+        Ajoute un buffer à la file de lecture (non bloquant).
+        on_start(t) est appelé depuis le callback audio quand le buffer
+        commence à sortir (t en time.monotonic()).
+        """
+        self.start()
+        samples = np.asarray(samples, dtype=np.float32).reshape(-1)
+        samples = resample_linear(samples, sample_rate, self.sample_rate)
+        # _drained baissé avant la mise en file : si le callback vide la file
+        # aussitôt, c'est lui qui le relève, jamais l'inverse
+        with self._drain_lock:
+            self._drained.clear()
+            self._queue.put((samples, on_start))
+
+    def _callback(self, outdata, frames, time_info, status):
+        if status:
+            logger.debug(f"Playback status: {status}")
+        filled = 0
+        while filled < frames:
+            if self._current is None:
+                try:
+                    self._current, on_start = self._queue.get_nowait()
+                    self._position = 0
+                except queue.Empty:
+                    break
+                tracer.instant("player.buffer_start", "playback", samples=len(self._current))
+                if on_start is not None:
+                    on_start(time.monotonic())
+            n = min(frames - filled, len(self._current) - self._position)
+            outdata[filled:filled + n] = self._current[self._position:self._position + n, None]
+            filled += n
+            self._position += n
+            if self._position >= len(self._current):
+                self._current = None
+        outdata[filled:] = 0
+        if self._current is None and not self._drained.is_set():
+            with self._drain_lock:
+                if self._queue.empty():
+                    tracer.instant("player.drained", "playback")
+                    self._drained.set()
+
+    @property
+    def is_playing(self) -> bool:
+        return not self._drained.is_set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Attend la fin de la lecture de tous les buffers en file."""
+        return self._drained.wait(timeout)
+
+    def stop(self):
+        """Vide la file et ferme le flux."""
+        while not self._queue.empty():
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                break
+        self._current = None
+        self._drained.set()
+        if self.stream is not None:
+            self.stream.stop()
+            self.stream.close()
+            self.stream = None
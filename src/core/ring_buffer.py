@@ -0,0 +1,140 @@
+"""
+Buffer circulaire préalloué pour l'accumulation des segments audio.
+Les samples sont adressés par leur offset absolu dans le flux.
+"""
+import numpy as np
+
+
+class AudioRingBuffer:
+    """
+    Buffer float32 de capacité fixe, écrit en place.
+
+    Seuls les `capacity` derniers samples du flux sont disponibles. Lire une
+    plage partiellement écrasée applique la politique `overflow` :
+    - "truncate" : retourne la partie encore disponible (compte les pertes)
+    - "raise" : lève BufferError
+    """
+    OVERFLOW_POLICIES = ("truncate", "raise")
+
+    def __init__(self, capacity: int, overflow: str = "truncate"):
+        if capacity <= 0:
+            raise ValueError("La capacité du buffer doit être positive.")
+        if overflow not in self.OVERFLOW_POLICIES:
+            raise ValueError(f"Politique de débordement inconnue: {overflow}. Utilisation: {self.OVERFLOW_POLICIES}")
+        self.capacity = capacity
+        self.overflow = overflow
+        self._buffer = np.zeros(capacity, dtype=np.float32)
+        self.write_pos = 0  # Nombre total de samples écrits (offset du prochain sample)
+        self.overflowed_samples = 0
+
+    @property
+    def oldest(self) -> int:
+        """Offset du plus ancien sample encore disponible."""
+        return max(self.write_pos - self.capacity, 0)
+
+    def write(self, chunk: np.ndarray) -> int:
+        """Copie le chunk dans le buffer et retourne l'offset de son premier sample."""
+        start = self.write_pos
+        n = len(chunk)
+        if n > self.capacity:
+            # Seule la fin du chunk tient dans le buffer
+            chunk = chunk[-self.capacity:]
+            self.write_pos += n - self.capacity
+            n = self.capacity
+
+        pos = self.write_pos % self.capacity
+        first = min(n, self.capacity - pos)
+        self._buffer[pos:pos + first] = chunk[:first]
+        if first < n:
+            self._buffer[:n - first] = chunk[first:]
+        self.write_pos += n
+        return start
+
+    def read(self, start: int, end: int, copy: bool = True) -> np.ndarray:
+        """
+        Retourne les samples [start, end) du flux.
+
+        Avec copy=False, une vue sans copie est retournée quand la plage ne
+        traverse pas la fin du buffer ; elle sera écrasée par les écritures
+        suivantes et ne doit donc pas être conservée par un consommateur
+        asynchrone. Sinon, une seule copie est faite.
+        """
+        end = min(end, self.write_pos)
+        if start < self.oldest:
+            if self.overflow == "raise":
+                raise BufferError(
+                    f"Samples [{start}, {self.oldest}) écrasés (capacité {self.capacity} dépassée)."
+                )
+            self.overflowed_samples += self.oldest - start
+            start = self.oldest
+        if end <= start:
+            return np.zeros(0, dtype=np.float32)
+
+        pos = start % self.capacity
+        n = end - start
+        if pos + n <= self.capacity:
+            view = self._buffer[pos:pos + n]
+            return view.copy() if copy else view
+        return np.concatenate((self._buffer[pos:], self._buffer[:n - (self.capacity - pos)]))
+
+    def reset(self):
+        self.write_pos = 0
+        self.overflowed_samples = 0
+
+
+class SpscRingBuffer:
+    """
+    Buffer circulaire sans verrou, un seul producteur et un seul consommateur
+    (ex: thread d'alimentation -> callback PortAudio).
+
+    Le producteur ne modifie que `_write_idx`, le consommateur que `_read_idx` ;
+    les index sont des compteurs croissants dont l'affectation est atomique
+    sous le GIL.
+    """
+
+    def __init__(self, capacity: int, dtype=np.float32):
+        if capacity <= 0:
+            raise ValueError("La capacité du buffer doit être positive.")
+        self.capacity = capacity
+        self._buffer = np.zeros(capacity, dtype=dtype)
+        self._write_idx = 0
+        self._read_idx = 0
+
+    @property
+    def fill(self) -> int:
+        """Nombre de samples en attente de lecture."""
+        return self._write_idx - self._read_idx
+
+    @property
+    def free(self) -> int:
+        return self.capacity - self.fill
+
+    def write(self, data: np.ndarray) -> int:
+        """Écrit autant de samples que possible ; retourne le nombre écrit."""
+        n = min(len(data), self.free)
+        if n == 0:
+            return 0
+        pos = self._write_idx % self.capacity
+        first = min(n, self.capacity - pos)
+        self._buffer[pos:pos + first] = data[:first]
+        if first < n:
+            self._buffer[:n - first] = data[first:n]
+        self._write_idx += n
+        return n
+
+    def read_into(self, out: np.ndarray) -> int:
+        """Copie jusqu'à len(out) samples dans out ; retourne le nombre lu."""
+        n = min(len(out), self.fill)
+        if n == 0:
+            return 0
+        pos = self._read_idx % self.capacity
+        first = min(n, self.capacity - pos)
+        out[:first] = self._buffer[pos:pos + first]
+        if first < n:
+            out[first:n] = self._buffer[:n - first]
+        self._read_idx += n
+        return n
+
+    def clear(self):
+        """Vide le buffer (côté consommateur)."""
+        self._read_idx = self._write_idx
@@ -0,0 +1,104 @@
+"""
+Files bornées entre étages du pipeline, avec politique de délestage.
+Sous surcharge, on préfère perdre un énoncé que prononcer une traduction
+des minutes après coup : la latence reste bornée.
+"""
+import asyncio
+import time
+from typing import Callable, Optional
+
+from src.core.tracing import TracedQueue, tracer
+
+
+class StageQueue(TracedQueue):
+    """
+    File bornée d'un étage. Politiques :
+    - "block" : put() attend qu'une place se libère (contre-pression)
+    - "drop_oldest" : put() sur file pleine jette l'élément le plus ancien
+    - "drop_stale" : les éléments plus vieux que max_age_s sont jetés à la
+      lecture, et en tête de file avant d'attendre sur une file pleine
+
+    `timestamp_of(item)` donne l'instant (time.monotonic) de création de
+    l'élément, None si inconnu (jamais considéré périmé). `on_drop(item,
+    reason)` est appelé pour chaque élément jeté.
+    """
+    POLICIES = ("block", "drop_oldest", "drop_stale")
+
+    def __init__(self, name: str, maxsize: int = 0, policy: str = "block",
+                 max_age_s: Optional[float] = None,
+                 timestamp_of: Optional[Callable[[object], Optional[float]]] = None,
+                 on_drop: Optional[Callable[[object, str], None]] = None):
+        if policy not in self.POLICIES:
+            raise ValueError(f"Politique de file inconnue: {policy}. Utilisation: {self.POLICIES}")
+        if policy == "drop_oldest" and maxsize <= 0:
+            raise ValueError("La politique drop_oldest nécessite une file bornée (maxsize > 0).")
+        if policy == "drop_stale" and (max_age_s is None or timestamp_of is None):
+            raise ValueError("La politique drop_stale nécessite max_age_s et timestamp_of.")
+        super().__init__(name, maxsize)
+        self.policy = policy
+        self.max_age_s = max_age_s
+        self.timestamp_of = timestamp_of
+        self.on_drop = on_drop
+        self.dropped_oldest = 0
+        self.dropped_stale = 0
+
+    def _is_stale(self, item) -> bool:
+        created = self.timestamp_of(item)
+        return created is not None and time.monotonic() - created > self.max_age_s
+
+    def _drop(self, item, reason: str):
+        if reason == "oldest":
+            self.dropped_oldest += 1
+        else:
+            self.dropped_stale += 1
+        self.task_done()  # L'élément ne sera jamais traité : join() ne doit pas l'attendre
+        tracer.instant(f"{self.name}.drop", "queue", reason=reason)
+        if self.on_drop is not None:
+            self.on_drop(item, reason)
+
+    def _purge_stale(self):
+        while self._queue and self._is_stale(self._queue[0]):
+            self._drop(asyncio.Queue.get_nowait(self), "stale")
+
+    def get_nowait(self):
+        if self.policy == "drop_stale":
+            # Peut lever QueueEmpty si seuls des éléments périmés étaient en file
+            self._purge_stale()
+        return super().get_nowait()
+
+    async def get(self):
+        while True:
+            try:
+                return await super().get()
+            except asyncio.QueueEmpty:
+                continue
+
+    def put_nowait(self, item):
+        if self.policy == "drop_oldest" and self.full():
+            self._drop(asyncio.Queue.get_nowait(self), "oldest")
+        elif self.policy == "drop_stale" and self.full():
+            self._purge_stale()
+        super().put_nowait(item)
+
+    async def put(self, item):
+        if self.policy == "drop_oldest":
+            # Jamais bloquant : on fait de la place
+            self.put_nowait(item)
+            tracer.counter(f"{self.name}_queue", depth=self.qsize())
+            return
+        if self.policy == "drop_stale" and self.full():
+            self._purge_stale()
+        await super().put(item)
+
+    @property
+    def dropped(self) -> int:
+        return self.dropped_oldest + self.dropped_stale
+
+    def get_stats(self) -> dict:
+        return {
+            "size": self.qsize(),
+            "maxsize": self.maxsize,
+            "policy": self.policy,
+            "dropped_oldest": self.dropped_oldest,
+            "dropped_stale": self.dropped_stale,
+        }
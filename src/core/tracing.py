@@ -0,0 +1,142 @@
+"""
+Traceur de timeline au format Chrome trace-event (ouvrable dans Perfetto).
+Désactivé par défaut : chaque point d'instrumentation se limite alors à un
+test de booléen. Activé, les événements sont gardés dans un buffer circulaire
+en mémoire et écrits en JSON à la demande.
+"""
+import asyncio
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import nullcontext
+from typing import Dict, Optional
+
+_NULL_SPAN = nullcontext()
+
+
+def _now_us() -> float:
+    return time.perf_counter_ns() / 1000
+
+
+class _Span:
+    __slots__ = ("_tracer", "_name", "_cat", "_args", "_start", "_tid")
+
+    def __init__(self, tracer, name, cat, args):
+        self._tracer = tracer
+        self._name = name
+        self._cat = cat
+        self._args = args
+
+    def __enter__(self):
+        self._tid = self._tracer._track()
+        self._start = _now_us()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end = _now_us()
+        event = {"name": self._name, "cat": self._cat, "ph": "X", "ts": self._start,
+                 "dur": end - self._start, "pid": self._tracer.pid, "tid": self._tid}
+        if self._args:
+            event["args"] = self._args
+        self._tracer.events.append(event)
+        return False
+
+
+class Tracer:
+    """
+    Enregistre des spans ("X"), instants ("i") et compteurs ("C").
+
+    Chaque tâche asyncio et chaque thread a sa propre piste : les coroutines
+    du pipeline, qui partagent le thread de la boucle, restent lisibles
+    séparément et les spans y sont correctement imbriqués.
+    """
+
+    def __init__(self, capacity: int = 100_000):
+        self.enabled = False
+        self.pid = os.getpid()
+        self.events = deque(maxlen=capacity)
+        self._tracks: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def enable(self, capacity: Optional[int] = None):
+        if capacity is not None and capacity != self.events.maxlen:
+            self.events = deque(self.events, maxlen=capacity)
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def clear(self):
+        self.events.clear()
+
+    def _track(self) -> int:
+        try:
+            task = asyncio.current_task()
+        except RuntimeError:
+            task = None
+        key = task.get_name() if task is not None else threading.current_thread().name
+        tid = self._tracks.get(key)
+        if tid is None:
+            with self._lock:
+                tid = self._tracks.setdefault(key, len(self._tracks) + 1)
+        return tid
+
+    def span(self, name: str, cat: str = "stage", **args):
+        """Context manager mesurant un intervalle ; no-op si désactivé."""
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name, cat, args)
+
+    def instant(self, name: str, cat: str = "event", **args):
+        if not self.enabled:
+            return
+        event = {"name": name, "cat": cat, "ph": "i", "s": "t", "ts": _now_us(),
+                 "pid": self.pid, "tid": self._track()}
+        if args:
+            event["args"] = args
+        self.events.append(event)
+
+    def counter(self, name: str, **values):
+        if not self.enabled:
+            return
+        self.events.append({"name": name, "ph": "C", "ts": _now_us(), "pid": self.pid, "args": values})
+
+    def to_dict(self) -> dict:
+        metadata = [
+            {"name": "thread_name", "ph": "M", "pid": self.pid, "tid": tid, "args": {"name": key}}
+            for key, tid in list(self._tracks.items())
+        ]
+        return {"traceEvents": metadata + list(self.events), "displayTimeUnit": "ms"}
+
+    def dump(self, path: str):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f)
+
+
+class TracedQueue(asyncio.Queue):
+    """asyncio.Queue dont les put/get et la profondeur apparaissent dans la timeline."""
+
+    def __init__(self, name: str, maxsize: int = 0):
+        super().__init__(maxsize)
+        self.name = name
+
+    async def get(self):
+        if not tracer.enabled:
+            return await super().get()
+        with tracer.span(f"{self.name}.get", "queue"):
+            item = await super().get()
+        tracer.counter(f"{self.name}_queue", depth=self.qsize())
+        return item
+
+    async def put(self, item):
+        if not tracer.enabled:
+            return await super().put(item)
+        with tracer.span(f"{self.name}.put", "queue"):
+            await super().put(item)
+        tracer.counter(f"{self.name}_queue", depth=self.qsize())
+
+
+# Traceur du processus (comme un logger) : partagé par les threads audio
+tracer = Tracer()
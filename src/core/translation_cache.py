@@ -0,0 +1,140 @@
+"""
+Cache de traductions à deux niveaux : LRU en mémoire, et table SQLite
+optionnelle qui survit aux redémarrages. Les réunions répètent les mêmes
+phrases (« Vous m'entendez ? », « Merci », noms propres) : une traduction déjà
+faite est servie sans tokenisation ni décodage.
+
+Chaque paire de langues est associée à l'empreinte du modèle qui l'a
+produite ; si le modèle change, les entrées de la paire sont invalidées.
+"""
+import os
+import re
+import sqlite3
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+
+def normalize_text(text: str) -> str:
+    """Clé de cache : Unicode NFC et blancs réduits (la casse est conservée)."""
+    return re.sub(r"\s+", " ", unicodedata.normalize("NFC", text)).strip()
+
+
+class TranslationCache:
+    """
+    LRU mémoire de `capacity` entrées devant une table SQLite optionnelle
+    (`db_path`) bornée à `max_disk_entries` (les plus anciennes écritures sont
+    évincées). Thread-safe.
+    """
+
+    def __init__(self, capacity: int = 2048, db_path: Optional[str] = None, max_disk_entries: int = 100_000):
+        if capacity <= 0:
+            raise ValueError("La capacité du cache doit être positive.")
+        self.capacity = capacity
+        self.max_disk_entries = max_disk_entries
+        self._memory: "OrderedDict[Tuple[str, str, str], str]" = OrderedDict()
+        self._models = {}  # (source, cible) -> empreinte du modèle
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._db = None
+        if db_path:
+            directory = os.path.dirname(db_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.execute("CREATE TABLE IF NOT EXISTS models (pair TEXT PRIMARY KEY, fingerprint TEXT)")
+            self._db.execute("CREATE TABLE IF NOT EXISTS translations "
+                             "(pair TEXT, source TEXT, translation TEXT, PRIMARY KEY (pair, source))")
+            self._db.commit()
+
+    @staticmethod
+    def _pair(source_lang: str, target_lang: str) -> str:
+        return f"{source_lang}-{target_lang}"
+
+    def set_model(self, source_lang: str, target_lang: str, fingerprint: str):
+        """Déclare le modèle courant d'une paire ; invalide les entrées produites par un autre."""
+        key = (source_lang, target_lang)
+        pair = self._pair(source_lang, target_lang)
+        with self._lock:
+            previous = self._models.get(key)
+            if previous is None and self._db is not None:
+                row = self._db.execute("SELECT fingerprint FROM models WHERE pair = ?", (pair,)).fetchone()
+                previous = row[0] if row else None
+            self._models[key] = fingerprint
+            if previous == fingerprint:
+                return
+            for entry in [k for k in self._memory if k[:2] == key]:
+                del self._memory[entry]
+            if self._db is not None:
+                self._db.execute("DELETE FROM translations WHERE pair = ?", (pair,))
+                self._db.execute("INSERT OR REPLACE INTO models VALUES (?, ?)", (pair, fingerprint))
+                self._db.commit()
+
+    def get(self, text: str, source_lang: str, target_lang: str) -> Optional[str]:
+        key = (source_lang, target_lang, normalize_text(text))
+        with self._lock:
+            translation = self._memory.get(key)
+            if translation is not None:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return translation
+            if self._db is not None:
+                row = self._db.execute("SELECT translation FROM translations WHERE pair = ? AND source = ?",
+                                       (self._pair(source_lang, target_lang), key[2])).fetchone()
+                if row is not None:
+                    self.disk_hits += 1
+                    self._remember(key, row[0])
+                    return row[0]
+            self.misses += 1
+            return None
+
+    def put(self, text: str, source_lang: str, target_lang: str, translation: str):
+        key = (source_lang, target_lang, normalize_text(text))
+        with self._lock:
+            self._remember(key, translation)
+            if self._db is not None:
+                self._db.execute("INSERT OR REPLACE INTO translations VALUES (?, ?, ?)",
+                                 (self._pair(source_lang, target_lang), key[2], translation))
+                # Le rowid croît à chaque écriture : on garde les max_disk_entries plus récentes
+                self._db.execute("DELETE FROM translations WHERE rowid <= (SELECT MAX(rowid) FROM translations) - ?",
+                                 (self.max_disk_entries,))
+                self._db.commit()
+
+    def _remember(self, key, translation: str):
+        self._memory[key] = translation
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.capacity:
+            self._memory.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM translations")
+                self._db.commit()
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            disk_entries = None
+            if self._db is not None:
+                disk_entries = self._db.execute("SELECT COUNT(*) FROM translations").fetchone()[0]
+            return {
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": round((self.memory_hits + self.disk_hits) / lookups, 3) if lookups else None,
+                "memory_entries": len(self._memory),
+                "disk_entries": disk_entries,
+            }
@@ -1,7 +1,26 @@
 import os
+import re
+import threading
+from contextlib import nullcontext
+
 import ctranslate2
-import transformers
-from typing import Literal
+from typing import Iterator, List, Literal, Sequence, Tuple
+
+from src.core.marian_tokenizer import load_tokenizer
+from src.core.mt_models import load_manifest, pair_key
+
+# Fin de phrase : ponctuation forte suivie d'un blanc (« Ça va ? Oui. » -> 2 phrases)
+SENTENCE_END = re.compile(r"(?<=[.!?…])\s+")
+# Jeton cible qui clôt une proposition en traduction en flux
+CLAUSE_END = re.compile(r"[,;:.!?…]$")
+# Marqueur SentencePiece de début de mot
+WORD_START = "\u2581"
+
+
+def split_sentences(text: str) -> List[str]:
+    """Découpe une transcription en phrases, unité de traduction de MarianMT."""
+    return [sentence for sentence in SENTENCE_END.split(text.strip()) if sentence]
+
 
 class Translator:
     """
@@ -12,67 +31,191 @@ class Translator:
         ("en", "fr"): "Helsinki-NLP/opus-mt-en-fr",
     }
 
-    def __init__(self, device="auto", model_dir="models/translate"):
+    def __init__(self, device="auto", model_dir="models/translate", inter_threads=1, max_batch_size=16, cache=None,
+                 compute_type=None, intra_threads=None):
         self.device = device
         self.model_dir = model_dir
+        # Nombre de traductions exécutées en parallèle par modèle CTranslate2
+        self.inter_threads = inter_threads
+        # None : variante et threads retenus dans le manifeste (python -m src.core.mt_models)
+        self.compute_type = compute_type
+        self.intra_threads = intra_threads
+        # Phrases par appel translate_batch dans translate_many
+        self.max_batch_size = max_batch_size
+        # TranslationCache optionnel : phrases répétées servies sans décodage
+        self.cache = cache
         self.translators = {}
         self.tokenizers = {}
+        # Chargement paresseux et tokenizer HF de repli (non thread-safe) protégés ;
+        # SentencePiece et l'inférence CT2 restent parallèles
+        self._lock = threading.Lock()
         
         if not os.path.exists(self.model_dir):
             os.makedirs(self.model_dir)
+        self.manifest = load_manifest(self.model_dir)
 
     def _get_model_paths(self, source_lang: str, target_lang: str):
+        """Nom du modèle, dossier CT2 et options de chargement (manifeste, sinon conversion par défaut)."""
         model_name = self.MODELS.get((source_lang, target_lang))
         if not model_name:
             raise ValueError(f"Traduction de {source_lang} vers {target_lang} non supportée.")
         
-        safe_name = model_name.replace("/", "_")
-        ct2_model_path = os.path.join(self.model_dir, f"{safe_name}_ct2")
-        return model_name, ct2_model_path
+        entry = self.manifest.get("models", {}).get(pair_key(source_lang, target_lang))
+        if entry is not None:
+            ct2_model_path = os.path.join(self.model_dir, entry["path"])
+            compute_type = self.compute_type or entry["compute_type"]
+            intra_threads = self.intra_threads if self.intra_threads is not None else entry["intra_threads"]
+            # intra_threads mesuré pour une traduction seule : pas de sursouscription des cœurs
+            intra_threads = max(1, min(intra_threads, (os.cpu_count() or 1) // max(self.inter_threads, 1)))
+        else:
+            safe_name = model_name.replace("/", "_")
+            ct2_model_path = os.path.join(self.model_dir, f"{safe_name}_ct2")
+            compute_type = self.compute_type or "default"
+            intra_threads = self.intra_threads or 0
+        return model_name, ct2_model_path, compute_type, intra_threads
 
     def _load_model(self, source_lang: str, target_lang: str):
         key = (source_lang, target_lang)
         if key in self.translators:
             return
 
-        model_name, ct2_model_path = self._get_model_paths(source_lang, target_lang)
+        with self._lock:
+            if key in self.translators:
+                return
 
-        # Vérifier si le modèle converti existe
-        if not os.path.exists(ct2_model_path):
-            self._convert_model(model_name, ct2_model_path)
+            model_name, ct2_model_path, compute_type, intra_threads = self._get_model_paths(source_lang, target_lang)
 
-        # Charger le traducteur CTranslate2
-        self.translators[key] = ctranslate2.Translator(ct2_model_path, device=self.device)
-        
-        # Charger le tokenizer (Transformers)
-        self.tokenizers[key] = transformers.AutoTokenizer.from_pretrained(model_name)
+            # Conversion hors du chemin critique : étape préalable explicite
+            if not os.path.exists(ct2_model_path):
+                raise FileNotFoundError(f"Modèle CTranslate2 absent: {ct2_model_path}. "
+                                        f"Préparer les modèles avec: python -m src.core.mt_models")
+
+            # Charger le tokenizer (SentencePiece du dossier CT2) avant le traducteur, dont la présence marque le modèle prêt
+            self.tokenizers[key] = load_tokenizer(model_name, ct2_model_path)
 
-    def _convert_model(self, model_name: str, output_dir: str):
-        """Convertit un modèle MarianMT vers le format CTranslate2."""
-        print(f"Conversion du modèle {model_name} vers {output_dir}...")
-        converter = ctranslate2.converters.TransformersConverter(model_name)
-        converter.convert(output_dir, force=True)
+            if self.cache is not None:
+                self.cache.set_model(source_lang, target_lang, self._fingerprint(model_name, ct2_model_path))
+
+            # Charger le traducteur CTranslate2
+            self.translators[key] = ctranslate2.Translator(ct2_model_path, device=self.device,
+                                                           compute_type=compute_type,
+                                                           inter_threads=self.inter_threads,
+                                                           intra_threads=intra_threads)
+
+    @staticmethod
+    def _fingerprint(model_name: str, ct2_model_path: str) -> str:
+        """Identifie le modèle converti : une reconversion ou une autre variante invalide le cache de la paire."""
+        variant = os.path.basename(os.path.normpath(ct2_model_path))
+        try:
+            stat = os.stat(os.path.join(ct2_model_path, "model.bin"))
+            return f"{model_name}:{variant}:{stat.st_size}:{stat.st_mtime_ns}"
+        except OSError:
+            return f"{model_name}:{variant}"
 
     def translate(self, text: str, source_lang: Literal["fr", "en"], target_lang: Literal["fr", "en"]) -> str:
         """
         Traduit le texte source vers la langue cible.
         """
-        if not text.strip():
-            return ""
+        return self.translate_many([(text, source_lang, target_lang)])[0]
+
+    def translate_many(self, requests: Sequence[Tuple[str, str, str]]) -> List[str]:
+        """
+        Traduit une liste de (texte, langue source, langue cible) ; retourne les
+        traductions dans l'ordre des requêtes.
+
+        Les textes sont regroupés par paire de langues puis triés par longueur
+        en tokens : chaque appel CTranslate2 traite jusqu'à `max_batch_size`
+        phrases de longueurs voisines (peu de padding).
+        """
+        translations = [""] * len(requests)
+        groups = {}
+        for index, (text, source_lang, target_lang) in enumerate(requests):
+            if text.strip():
+                groups.setdefault((source_lang, target_lang), []).append(index)
+
+        for key, indices in groups.items():
+            self._load_model(*key)
+            if self.cache is not None:
+                missing = []
+                for i in indices:
+                    cached = self.cache.get(requests[i][0], *key)
+                    if cached is None:
+                        missing.append(i)
+                    else:
+                        translations[i] = cached
+                indices = missing
+                if not indices:
+                    continue
+            tokenizer = self.tokenizers[key]
+            translator = self.translators[key]
+
+            # Tokenization
+            with self._tokenizer_guard(tokenizer):
+                source_tokens = {i: tokenizer.tokenize(requests[i][0]) for i in indices}
+            indices.sort(key=lambda i: len(source_tokens[i]))
+
+            for start in range(0, len(indices), self.max_batch_size):
+                chunk = indices[start:start + self.max_batch_size]
+                # Inférence
+                results = translator.translate_batch([source_tokens[i] for i in chunk])
+                # Detokenization
+                for i, result in zip(chunk, results):
+                    translations[i] = self._detokenize(tokenizer, result.hypotheses[0])
+                if self.cache is not None:
+                    for i in chunk:
+                        self.cache.put(requests[i][0], *key, translations[i])
+        return translations
 
+    def translate_stream(self, text: str, source_lang: Literal["fr", "en"], target_lang: Literal["fr", "en"],
+                         max_clause_tokens: int = 24) -> Iterator[str]:
+        """
+        Traduit en flux : produit le texte détokenisé proposition par
+        proposition pendant que CTranslate2 décode la suite. Une proposition se
+        termine sur une ponctuation, ou au premier début de mot après
+        `max_clause_tokens` jetons. Une traduction déjà en cache (faisceau de
+        translate_batch) est resservie d'un bloc ; la sortie gloutonne, elle,
+        n'est jamais mise en cache pour ne pas remplacer celle du faisceau.
+        """
+        if not text.strip():
+            return
         self._load_model(source_lang, target_lang)
         key = (source_lang, target_lang)
-        
+        if self.cache is not None:
+            cached = self.cache.get(text, *key)
+            if cached is not None:
+                yield cached
+                return
         tokenizer = self.tokenizers[key]
         translator = self.translators[key]
 
         # Tokenization
-        source_tokens = tokenizer.convert_ids_to_tokens(tokenizer.encode(text))
-        
-        # Inférence
-        results = translator.translate_batch([source_tokens])
-        target_tokens = results[0].hypotheses[0]
-        
-        # Detokenization
-        translation = tokenizer.decode(tokenizer.convert_tokens_to_ids(target_tokens), skip_special_tokens=True)
-        return translation
+        with self._tokenizer_guard(tokenizer):
+            source_tokens = tokenizer.tokenize(text)
+
+        pending = []
+        # Inférence jeton par jeton (décodage glouton)
+        for step in translator.generate_tokens(source_tokens):
+            if len(pending) >= max_clause_tokens and step.token.startswith(WORD_START):
+                clause = self._detokenize(tokenizer, pending)
+                pending = []
+                if clause:
+                    yield clause
+            pending.append(step.token)
+            if CLAUSE_END.search(step.token):
+                clause = self._detokenize(tokenizer, pending)
+                pending = []
+                if clause:
+                    yield clause
+        clause = self._detokenize(tokenizer, pending)
+        if clause:
+            yield clause
+
+    def _tokenizer_guard(self, tokenizer):
+        """Verrou pour le seul tokenizer HF de repli ; SentencePiece est thread-safe."""
+        return nullcontext() if getattr(tokenizer, "thread_safe", False) is True else self._lock
+
+    def _detokenize(self, tokenizer, tokens: List[str]) -> str:
+        if not tokens:
+            return ""
+        with self._tokenizer_guard(tokenizer):
+            return tokenizer.detokenize(tokens).strip()
@@ -1,11 +1,11 @@
 import os
 import numpy as np
-import sounddevice as sd
 from kokoro_onnx import Kokoro
 from huggingface_hub import hf_hub_download
 import time
 from typing import Tuple
 import logging
+from src.core.playback import AudioPlayer
 
 # Monkey-patch np.load pour allow_pickle=True car kokoro-onnx ne le fait pas
 # et NumPy 2.0+ l'interdit par défaut pour les objets.
@@ -84,6 +84,9 @@ class TTS:
         # Utiliser la version patchée de Kokoro
         self.kokoro = PatchedKokoro(self.model_path, self.voices_path)
 
+        # Lecteur persistant (flux ouvert à la première lecture)
+        self.player = AudioPlayer(sample_rate=24000)
+
     def _ensure_model(self):
         path = os.path.join(self.model_dir, "model.onnx")
         if not os.path.exists(path):
@@ -142,13 +145,22 @@ class TTS:
             
         return samples, sample_rate
 
-    def play(self, samples, sample_rate):
+    def play(self, samples, sample_rate, on_start=None):
         """
         Joue l'audio sur la sortie par défaut.
+        Non bloquant : le buffer est mis en file du lecteur persistant.
+        on_start(t) est appelé quand le premier sample sort.
         """
         if samples is not None:
             try:
-                sd.play(samples, sample_rate)
-                sd.wait()
+                self.player.play(samples, sample_rate, on_start=on_start)
             except Exception as e:
                 print(f"TTS: Lecture audio impossible (Pas de carte son ?): {e}")
+
+    def wait(self, timeout=None):
+        """Attend la fin de la lecture en cours."""
+        return self.player.wait(timeout)
+
+    def stop(self):
+        """Interrompt la lecture et ferme le flux de sortie."""
+        self.player.stop()
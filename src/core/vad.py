@@ -1,12 +1,36 @@
+import argparse
+import logging
+import os
+import importlib.util
+import shutil
+import urllib.request
+from typing import Optional
+
 import torch
 import numpy as np
 
+logger = logging.getLogger(__name__)
+
+DEFAULT_ONNX_MODEL = "models/vad/silero_vad.onnx"
+# Même fichier que celui embarqué par le paquet pip silero-vad
+SILERO_ONNX_URL = "https://github.com/snakers4/silero-vad/raw/master/src/silero_vad/data/silero_vad.onnx"
+
+# Structure des résultats de process_chunk : offset (en samples depuis le début
+# du flux) et probabilité de parole de chaque trame de FRAME_SIZE samples.
+FRAME_DTYPE = np.dtype([("offset", np.int64), ("prob", np.float32)])
+
+
 class VADDetector:
     """
     Détecteur de voix utilisant Silero VAD.
     Optimisé pour fonctionner à 16kHz.
+
+    Fonctionne en flux : les samples qui ne remplissent pas une trame complète
+    sont conservés pour l'appel suivant au lieu d'être complétés par des zéros.
     """
-    def __init__(self, threshold=0.5, sampling_rate=16000):
+    FRAME_SIZE = 512  # Silero VAD attend des trames de 512 samples à 16kHz
+
+    def __init__(self, threshold=0.5, sampling_rate=16000, energy_gate=None):
         self.model, utils = torch.hub.load(repo_or_dir='snakers4/silero-vad',
                                           model='silero_vad',
                                           force_reload=False,
@@ -14,43 +38,217 @@ class VADDetector:
                                           trust_repo=True)
         self.threshold = threshold
         self.sampling_rate = sampling_rate
-        
+        # Pré-filtre optionnel (EnergyGate) : les trames écartées ont une probabilité 0
+        self.energy_gate = energy_gate
+
         # Passer le modèle en mode évaluation
         self.model.eval()
 
-    def is_speech(self, audio_chunk: np.ndarray) -> bool:
-        """
-        Détermine si le chunk audio contient de la parole.
-        audio_chunk: tableau numpy (float32).
-        Supporte des chunks de taille arbitraire en les découpant.
-        """
+        # Re-framer : reliquat de samples et position courante dans le flux
+        self._pending = np.zeros(0, dtype=np.float32)
+        self._stream_offset = 0
+        # Dernière trame écartée par le gate : l'état du modèle ne la reflète pas
+        self._last_gated = False
+
+    def reset(self):
+        """Réinitialise le flux (reliquat, offsets et état RNN du modèle)."""
+        self._pending = np.zeros(0, dtype=np.float32)
+        self._stream_offset = 0
+        self._last_gated = False
+        self._reset_model_state()
+        if self.energy_gate is not None:
+            self.energy_gate.reset()
+
+    def _reset_model_state(self):
+        if hasattr(self.model, "reset_states"):
+            self.model.reset_states()
+
+    @staticmethod
+    def _prepare(audio_chunk: np.ndarray) -> np.ndarray:
+        """Normalise un chunk en mono float32 dans [-1, 1]."""
         # Normalisation Mono automatique
         if audio_chunk.ndim > 1:
             audio_chunk = audio_chunk.mean(axis=-1)
 
         if audio_chunk.dtype != np.float32:
             audio_chunk = audio_chunk.astype(np.float32)
-            
+
         # Normalisation si nécessaire (Silero attend du [-1, 1])
-        if np.max(np.abs(audio_chunk)) > 1.0:
+        if audio_chunk.size and np.max(np.abs(audio_chunk)) > 1.0:
             audio_chunk = audio_chunk / 32768.0
 
-        # Silero VAD attend des chunks de 512 samples pour 16kHz
-        chunk_size = 512
-        
-        # On divise l'audio_chunk en sous-chunks de 512
-        for i in range(0, len(audio_chunk), chunk_size):
-            sub_chunk = audio_chunk[i:i+chunk_size]
-            if len(sub_chunk) < chunk_size:
-                # Pad with zeros if last chunk is too small
-                sub_chunk = np.pad(sub_chunk, (0, chunk_size - len(sub_chunk)))
-            
-            tensor_chunk = torch.from_numpy(sub_chunk).unsqueeze(0) # Ajouter dimension batch
-            
-            with torch.no_grad():
-                speech_prob = self.model(tensor_chunk, self.sampling_rate).item()
-            
-            if speech_prob > self.threshold:
-                return True
-        
-        return False
+        return audio_chunk
+
+    def _infer_frames(self, frames: np.ndarray) -> np.ndarray:
+        """
+        Calcule la probabilité de parole de chaque trame.
+        frames: tableau (n_frames, FRAME_SIZE) float32.
+
+        Le bloc est converti une seule fois en tenseur et toutes ses trames
+        passent dans un même contexte d'inférence. Silero étant récurrent,
+        les trames d'un même flux restent évaluées dans l'ordre pour que
+        l'état du modèle soit propagé de l'une à l'autre.
+        """
+        probs = np.empty(len(frames), dtype=np.float32)
+        tensor_frames = torch.from_numpy(frames)
+        with torch.inference_mode():
+            for i in range(len(frames)):
+                probs[i] = self.model(tensor_frames[i:i + 1], self.sampling_rate).item()
+        return probs
+
+    def process_chunk(self, audio_chunk: np.ndarray) -> np.ndarray:
+        """
+        Analyse un chunk de taille arbitraire et retourne un tableau structuré
+        (FRAME_DTYPE) avec l'offset et la probabilité de parole de chaque trame
+        complète. Les samples restants sont conservés pour l'appel suivant.
+        """
+        audio_chunk = self._prepare(audio_chunk)
+        if self._pending.size:
+            audio_chunk = np.concatenate((self._pending, audio_chunk))
+
+        n_frames = len(audio_chunk) // self.FRAME_SIZE
+        used = n_frames * self.FRAME_SIZE
+        self._pending = audio_chunk[used:].copy()
+
+        result = np.empty(n_frames, dtype=FRAME_DTYPE)
+        if n_frames == 0:
+            return result
+
+        frames = np.ascontiguousarray(audio_chunk[:used]).reshape(n_frames, self.FRAME_SIZE)
+        result["offset"] = self._stream_offset + np.arange(n_frames, dtype=np.int64) * self.FRAME_SIZE
+        if self.energy_gate is None:
+            result["prob"] = self._infer_frames(frames)
+        else:
+            active = self.energy_gate.process(frames)
+            result["prob"] = 0.0
+            # Plages contiguës de trames actives : [début, fin[
+            edges = np.flatnonzero(np.diff(np.concatenate(([0], active.astype(np.int8), [0]))))
+            for start, end in zip(edges[::2], edges[1::2]):
+                if start > 0 or self._last_gated:
+                    # Trames écartées juste avant : état RNN et contexte périmés, on repart de zéro
+                    self._reset_model_state()
+                result["prob"][start:end] = self._infer_frames(frames[start:end])
+            self._last_gated = not active[-1]
+        self._stream_offset += used
+        return result
+
+    def is_speech(self, audio_chunk: np.ndarray) -> bool:
+        """
+        Détermine si le chunk audio contient de la parole.
+        audio_chunk: tableau numpy (float32).
+        Supporte des chunks de taille arbitraire (voir process_chunk).
+        """
+        frames = self.process_chunk(audio_chunk)
+        return bool(np.any(frames["prob"] > self.threshold))
+
+
+class OnnxVADDetector(VADDetector):
+    """
+    Détecteur de voix Silero exécuté via ONNX Runtime.
+    Charge un fichier ONNX local (pas de torch.hub ni de réseau) et gère
+    explicitement l'état RNN et le contexte entre les trames.
+    """
+    CONTEXT_SIZE = 64  # Samples de la trame précédente attendus par Silero v5 à 16kHz
+    STATE_SHAPE = (2, 1, 128)
+
+    def __init__(self, threshold=0.5, sampling_rate=16000, model_path=DEFAULT_ONNX_MODEL,
+                 energy_gate=None):
+        import onnxruntime
+
+        self.model_path = self._ensure_model(model_path)
+        self.threshold = threshold
+        self.sampling_rate = sampling_rate
+        self.energy_gate = energy_gate
+
+        # Un seul thread suffit pour des trames de 512 samples
+        opts = onnxruntime.SessionOptions()
+        opts.inter_op_num_threads = 1
+        opts.intra_op_num_threads = 1
+        self.model = onnxruntime.InferenceSession(self.model_path, sess_options=opts,
+                                                  providers=["CPUExecutionProvider"])
+        self._sr = np.array(sampling_rate, dtype=np.int64)
+
+        self.reset()
+
+    @staticmethod
+    def _ensure_model(model_path: str) -> str:
+        """
+        Retourne le chemin du modèle ONNX. À défaut de fichier local, utilise
+        celui fourni par le paquet pip `silero-vad` s'il est installé.
+        """
+        if os.path.exists(model_path):
+            return model_path
+        bundled = bundled_onnx_model()
+        if bundled is not None:
+            return bundled
+        raise FileNotFoundError(
+            f"Modèle Silero ONNX introuvable: {model_path}. "
+            "Lancez `python -m src.core.vad` ou installez le paquet silero-vad."
+        )
+
+    def _reset_model_state(self):
+        self._state = np.zeros(self.STATE_SHAPE, dtype=np.float32)
+        self._context = np.zeros(self.CONTEXT_SIZE, dtype=np.float32)
+
+    def _infer_frames(self, frames: np.ndarray) -> np.ndarray:
+        probs = np.empty(len(frames), dtype=np.float32)
+        # Buffer d'entrée réutilisé : [contexte | trame]
+        model_input = np.empty((1, self.CONTEXT_SIZE + self.FRAME_SIZE), dtype=np.float32)
+        for i, frame in enumerate(frames):
+            model_input[0, :self.CONTEXT_SIZE] = self._context
+            model_input[0, self.CONTEXT_SIZE:] = frame
+            out, self._state = self.model.run(
+                None, {"input": model_input, "state": self._state, "sr": self._sr}
+            )
+            probs[i] = out[0, 0]
+            self._context = frame[-self.CONTEXT_SIZE:].copy()
+        return probs
+
+
+def bundled_onnx_model() -> Optional[str]:
+    """Modèle ONNX embarqué par le paquet pip `silero-vad`, None s'il est absent."""
+    spec = importlib.util.find_spec("silero_vad")
+    if spec is not None and spec.submodule_search_locations:
+        for location in spec.submodule_search_locations:
+            bundled = os.path.join(location, "data", "silero_vad.onnx")
+            if os.path.exists(bundled):
+                return bundled
+    return None
+
+
+def prepare_onnx_model(model_path: str = DEFAULT_ONNX_MODEL, force: bool = False) -> str:
+    """
+    Place le modèle Silero ONNX à `model_path` : copie depuis le paquet
+    silero-vad, sinon téléchargement. Écriture atomique, sans effet si le
+    fichier existe déjà (sauf `force`).
+    """
+    if os.path.exists(model_path) and not force:
+        return model_path
+    directory = os.path.dirname(model_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{model_path}.tmp"
+    bundled = bundled_onnx_model()
+    if bundled is not None:
+        logger.info(f"Copie du modèle Silero ONNX depuis {bundled}")
+        shutil.copyfile(bundled, tmp_path)
+    else:
+        logger.info(f"Téléchargement du modèle Silero ONNX depuis {SILERO_ONNX_URL}")
+        urllib.request.urlretrieve(SILERO_ONNX_URL, tmp_path)
+    os.replace(tmp_path, model_path)
+    return model_path
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Préparation du modèle Silero VAD ONNX")
+    parser.add_argument("--model-path", default=DEFAULT_ONNX_MODEL)
+    parser.add_argument("--force", action="store_true", help="Remplace le fichier existant")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    logger.info(f"Modèle VAD ONNX prêt: {prepare_onnx_model(args.model_path, force=args.force)}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,25 +1,30 @@
 """
 Module de gestion du micro virtuel pour Google Meet.
-Utilise pulsectl/pactl pour créer un sink virtuel et injecter l'audio traduit.
-Inclut une logique de redirection de secours "Brute Force" via pactl.
+Utilise pulsectl pour créer un sink virtuel et injecter l'audio traduit.
+Inclut une redirection de secours pilotée par les événements PulseAudio.
 """
 import os
 import time
 import logging
 import threading
 import queue
-import subprocess
+from collections import deque
 import numpy as np
 import sounddevice as sd
 import pulsectl
 from typing import Optional, List
 
+from src.core.ring_buffer import SpscRingBuffer
+from src.core.playback import resample_linear
+from src.core.tracing import tracer
+
 logger = logging.getLogger(__name__)
 
 class VirtualMicrophone:
     """
     Gère la création et l'utilisation d'un micro virtuel pour Google Meet.
     """
+    READY_TIMEOUT_S = 2.0
     
     def __init__(self, sink_name: str = "vox-transync-mic"):
         self.sink_name = sink_name
@@ -31,77 +36,116 @@ class VirtualMicrophone:
         self.stop_playback = threading.Event()
         self.sample_rate = 48000
         self._module_indices: List[int] = []
+
+        # Flux de sortie persistant (48kHz s16le) alimenté par un buffer circulaire
+        self.output_stream: Optional[sd.OutputStream] = None
+        self.ring_buffer = SpscRingBuffer(capacity=self.sample_rate * 10, dtype=np.int16)
+        self.underruns = 0
+        self._feeding = False
+
+        # Routage événementiel : connexion pulsectl persistante dans un thread dédié
+        self.routing_thread: Optional[threading.Thread] = None
+        self._pending_events = deque()
+        self._sink_index: Optional[int] = None
+        self._stream_index: Optional[int] = None
         
     def create_virtual_sink(self) -> bool:
-        """Crée l'architecture audio via pulsectl."""
-        logger.info("Initialisation Brute Force de l'environnement audio...")
-        self.destroy_virtual_sink() # Nettoyage agressif préalable
-        time.sleep(0.5)
+        """Crée l'architecture audio via pulsectl, en attendant que le serveur l'expose."""
+        logger.info("Initialisation de l'environnement audio...")
+        self.destroy_virtual_sink()
 
         try:
             with pulsectl.Pulse('vox-transync-setup') as pulse:
+                self._unload_stale_modules(pulse)
+                self._subscribe_readiness(pulse, 'sink', 'source')
+
                 # 1. Null Sink
                 sink_args = f"sink_name={self.output_sink_name} rate={self.sample_rate} format=s16le sink_properties=device.description={self.output_sink_name}"
                 sink_idx = pulse.module_load('module-null-sink', sink_args)
                 self._module_indices.append(sink_idx)
+                sink = self._wait_until(pulse, lambda: self._find(pulse.get_sink_by_name, self.output_sink_name))
                 
                 # 2. Remap Source
                 source_props = "device.description=\"Vox Transync Microphone\" device.class=\"audio.input\" device.icon_name=\"audio-input-microphone\" device.form_factor=\"microphone\" media.role=\"communication\""
                 source_args = f"source_name={self.sink_name} master={self.output_sink_name}.monitor source_properties='{source_props}'"
                 source_idx = pulse.module_load('module-remap-source', source_args)
                 self._module_indices.append(source_idx)
+                source = self._wait_until(pulse, lambda: self._find(pulse.get_source_by_name, self.sink_name))
 
                 # 3. Unmute & Volume
-                time.sleep(0.2)
-                for sink in pulse.sink_list():
-                    if sink.name == self.output_sink_name:
-                        pulse.sink_mute(sink.index, mute=False)
-                        pulse.volume_set_all_chans(sink, 1.0)
-                
-                for source in pulse.source_list():
-                    if source.name == self.sink_name:
-                        pulse.source_mute(source.index, mute=False)
-                        pulse.volume_set_all_chans(source, 1.0)
+                pulse.sink_mute(sink.index, mute=False)
+                pulse.volume_set_all_chans(sink, 1.0)
+                pulse.source_mute(source.index, mute=False)
+                pulse.volume_set_all_chans(source, 1.0)
 
             self.is_created = True
-            self._refresh_sounddevice()
             return True
 
         except Exception as e:
             logger.error(f"Erreur lors de la création du micro: {e}")
             return False
 
-    def _refresh_sounddevice(self):
-        """Rafraîchit la liste des périphériques sounddevice."""
+    @staticmethod
+    def _subscribe_readiness(pulse, *facilities):
+        """Abonne la connexion aux événements : chacun réveille event_listen()."""
+        def _wake(event):
+            raise pulsectl.PulseLoopStop
+        pulse.event_mask_set(*facilities)
+        pulse.event_callback_set(_wake)
+
+    def _wait_until(self, pulse, check, timeout: Optional[float] = None):
+        """
+        Retourne le résultat de check() dès qu'il est vrai, en dormant sur les
+        événements PulseAudio entre deux essais ; lève TimeoutError sinon.
+        """
+        timeout = self.READY_TIMEOUT_S if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        while True:
+            result = check()
+            if result:
+                return result
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise TimeoutError(f"État PulseAudio attendu non atteint après {timeout}s")
+            pulse.event_listen(timeout=remaining)
+
+    @staticmethod
+    def _find(lookup, name):
         try:
-            time.sleep(0.5)
-            sd._terminate()
-            sd._initialize()
-        except:
-            pass
+            return lookup(name)
+        except pulsectl.PulseIndexError:
+            return None
+
+    def _unload_stale_modules(self, pulse):
+        """Décharge les modules laissés par une exécution précédente avec nos noms."""
+        names = (f"sink_name={self.output_sink_name}", f"source_name={self.sink_name}")
+        for module in pulse.module_list():
+            if module.argument and any(name in module.argument for name in names):
+                logger.info(f"Déchargement du module résiduel {module.index}")
+                pulse.module_unload(module.index)
 
     def destroy_virtual_sink(self) -> bool:
-        """Nettoyage Agressif : décharge tous les modules contenant 'vox'."""
-        logger.info("Nettoyage Agressif des modules audio 'vox'...")
+        """Décharge les modules enregistrés et attend leur retrait effectif."""
+        if not self._module_indices:
+            self.is_created = False
+            return True
         try:
-            # Récupérer la liste des modules via pactl (plus direct pour le nettoyage agressif)
-            cmd = ["pactl", "list", "modules", "short"]
-            result = subprocess.run(cmd, capture_output=True, text=True)
-            
-            if result.returncode == 0:
-                for line in result.stdout.strip().split('\n'):
-                    if "vox" in line:
-                        parts = line.split()
-                        if parts:
-                            mod_id = parts[0]
-                            logger.info(f"Déchargement forcé du module {mod_id}")
-                            subprocess.run(["pactl", "unload-module", mod_id], capture_output=True)
-            
+            with pulsectl.Pulse('vox-transync-teardown') as pulse:
+                self._subscribe_readiness(pulse, 'sink', 'source')
+                # La source remappée dépend du sink : ordre inverse du chargement
+                for mod_id in reversed(self._module_indices):
+                    try:
+                        pulse.module_unload(mod_id)
+                    except pulsectl.PulseOperationFailed:
+                        logger.debug(f"Module {mod_id} déjà déchargé")
+                self._wait_until(pulse, lambda: self._find(pulse.get_source_by_name, self.sink_name) is None)
+                self._wait_until(pulse, lambda: self._find(pulse.get_sink_by_name, self.output_sink_name) is None)
+
             self.is_created = False
             self._module_indices = []
             return True
         except Exception as e:
-            logger.error(f"Erreur lors du nettoyage agressif: {e}")
+            logger.error(f"Erreur lors du nettoyage: {e}")
             return False
 
     def start_playback(self):
@@ -112,56 +156,145 @@ class VirtualMicrophone:
         self.playback_thread.start()
         logger.info("Thread de playback démarré (Prêt pour Redirection de secours)")
 
-    def _force_redirect_stream(self):
-        """Redirection de secours : arrache le flux audio de Python et le branche sur le micro virtuel."""
+    def start_stream_routing(self):
+        """Démarre le thread qui garde notre flux de sortie sur le sink virtuel."""
+        if self.routing_thread and self.routing_thread.is_alive():
+            return
+        self.routing_thread = threading.Thread(target=self._routing_loop, daemon=True)
+        self.routing_thread.start()
+
+    def _routing_loop(self):
+        """Redirection de secours : abonnement aux événements sink-input via pulsectl."""
         try:
-            pid = os.getpid()
-            # 1. Lister les sink-inputs
-            cmd = ["pactl", "list", "sink-inputs"]
-            result = subprocess.run(cmd, capture_output=True, text=True)
-            
-            if result.returncode != 0:
-                return
-
-            # Parsing simple pour trouver l'ID du flux de notre PID
-            current_id = None
-            for line in result.stdout.split('\n'):
-                line = line.strip()
-                if line.startswith("Entrée de la destination #") or line.startswith("Sink Input #"):
-                    current_id = line.split('#')[-1]
-                
-                if f"application.process.id = \"{pid}\"" in line or f"application.process.id = {pid}" in line:
-                    if current_id:
-                        logger.info(f"Flux audio détecté (ID: {current_id}). Tentative de redirection vers {self.output_sink_name}...")
-                        subprocess.run(["pactl", "move-sink-input", current_id, self.output_sink_name], capture_output=True)
-                        # On ne s'arrête pas au premier au cas où il y en aurait plusieurs
+            with pulsectl.Pulse('vox-transync-router') as pulse:
+                self._sink_index = pulse.get_sink_by_name(self.output_sink_name).index
+                # Flux déjà existants, puis uniquement les créations/changements
+                for sink_input in pulse.sink_input_list():
+                    self._route_sink_input(pulse, sink_input)
+                pulse.event_mask_set('sink_input')
+                pulse.event_callback_set(self._on_pulse_event)
+                while not self.stop_playback.is_set():
+                    pulse.event_listen(timeout=0.5)
+                    self._process_pending_events(pulse)
         except Exception as e:
-            logger.debug(f"Erreur redirection: {e}")
+            logger.error(f"Erreur routage du flux: {e}")
 
-    def _playback_loop(self):
+    def _on_pulse_event(self, event):
+        # Aucun appel pulsectl n'est permis dans le callback : on sort de event_listen
+        self._pending_events.append((event.t, event.index))
+        raise pulsectl.PulseLoopStop
+
+    def _process_pending_events(self, pulse):
+        while self._pending_events:
+            event_type, index = self._pending_events.popleft()
+            if event_type == 'remove':
+                if index == self._stream_index:
+                    self._stream_index = None
+                continue
+            if event_type not in ('new', 'change'):
+                continue
+            try:
+                sink_input = pulse.sink_input_info(index)
+            except pulsectl.PulseIndexError:
+                continue
+            self._route_sink_input(pulse, sink_input)
+
+    def _route_sink_input(self, pulse, sink_input):
+        """Déplace le sink-input vers le sink virtuel s'il appartient à notre processus."""
+        if sink_input.proplist.get('application.process.id') != str(os.getpid()):
+            return
+        self._stream_index = sink_input.index
+        if sink_input.sink != self._sink_index:
+            logger.info(f"Flux audio détecté (ID: {sink_input.index}). Redirection vers {self.output_sink_name}...")
+            pulse.sink_input_move(sink_input.index, self._sink_index)
+
+    def _open_output_stream(self):
+        """Ouvre le flux de sortie unique vers le sink virtuel."""
         device_id = self._find_sounddevice_device_id()
-        
+        self.output_stream = sd.OutputStream(
+            samplerate=self.sample_rate,
+            channels=1,
+            dtype="int16",
+            device=device_id,
+            callback=self._stream_callback,
+        )
+        self.output_stream.start()
+
+        # Redirection de secours (si device non trouvé, le flux part sur la sortie par défaut)
+        self.start_stream_routing()
+
+    def _stream_callback(self, outdata, frames, time_info, status):
+        """Callback PortAudio : lit le buffer circulaire, silence en cas de manque."""
+        n = self.ring_buffer.read_into(outdata[:, 0])
+        if n < frames:
+            outdata[n:] = 0
+            # Manque de données alors qu'un énoncé est encore en cours d'envoi
+            if self._feeding or not self.audio_queue.empty():
+                self.underruns += 1
+                tracer.instant("vmic.underrun", "playback", missing=frames - n)
+
+    @staticmethod
+    def _to_int16(audio_data: np.ndarray) -> np.ndarray:
+        audio_data = np.clip(audio_data, -1.0, 1.0)
+        return (audio_data * 32767).astype(np.int16)
+
+    def _playback_loop(self):
+        try:
+            self._open_output_stream()
+        except Exception as e:
+            logger.error(f"Erreur ouverture du flux de sortie: {e}")
+            return
+
         while not self.stop_playback.is_set():
             try:
                 item = self.audio_queue.get(timeout=0.1)
-                audio_data, sample_rate = item
+                audio_data, sample_rate, on_start = item
                 
                 if audio_data is not None:
-                    # Logique de Brute Force : si device non trouvé, joue sur défaut et redirige
-                    if device_id is not None:
-                        sd.play(audio_data, sample_rate, device=device_id)
-                    else:
-                        sd.play(audio_data, sample_rate) # Sortie par défaut
-                    
-                    # Redirection de secours immédiate
-                    self._force_redirect_stream()
-                    
-                    sd.wait()
+                    self._feeding = True
+                    pcm = self._to_int16(resample_linear(audio_data.astype(np.float32), sample_rate, self.sample_rate))
+                    if on_start is not None:
+                        # Premier sample joué après ce qui est déjà dans le buffer
+                        on_start(time.monotonic() + self.ring_buffer.fill / self.sample_rate)
+                    written = 0
+                    with tracer.span("vmic.feed", "playback", samples=len(pcm)):
+                        while written < len(pcm) and not self.stop_playback.is_set():
+                            n = self.ring_buffer.write(pcm[written:])
+                            written += n
+                            tracer.counter("vmic_buffer", fill=self.ring_buffer.fill)
+                            if n == 0:
+                                # Buffer plein : on laisse le callback consommer
+                                time.sleep(0.01)
+                    self._feeding = False
             except queue.Empty:
                 continue
             except Exception as e:
+                self._feeding = False
                 logger.error(f"Erreur playback: {e}")
 
+        self._close_output_stream()
+
+    def _close_output_stream(self):
+        if self.output_stream is not None:
+            try:
+                self.output_stream.stop()
+                self.output_stream.close()
+            except Exception as e:
+                logger.debug(f"Erreur fermeture du flux: {e}")
+            self.output_stream = None
+        self.ring_buffer.clear()
+
+    def get_buffer_fill(self) -> float:
+        """Taux de remplissage du buffer de sortie (0.0 à 1.0)."""
+        return self.ring_buffer.fill / self.ring_buffer.capacity
+
+    def get_playback_stats(self) -> dict:
+        return {
+            "buffer_fill": self.get_buffer_fill(),
+            "buffered_ms": self.ring_buffer.fill * 1000 / self.sample_rate,
+            "underruns": self.underruns,
+        }
+
     def _find_sounddevice_device_id(self) -> Optional[int]:
         try:
             devices = sd.query_devices()
@@ -172,13 +305,13 @@ class VirtualMicrophone:
             pass
         return None
 
-    def play_audio(self, audio_data: np.ndarray, sample_rate: int):
+    def play_audio(self, audio_data: np.ndarray, sample_rate: int, on_start=None):
         if not self.is_created:
             self.create_virtual_sink()
         
         if audio_data.ndim > 1:
             audio_data = audio_data.squeeze()
-        self.audio_queue.put((audio_data, sample_rate))
+        self.audio_queue.put((audio_data, sample_rate, on_start))
 
     def get_setup_instructions(self) -> str:
         return f"Sélectionnez '{self.sink_name}' dans Google Meet."
@@ -187,6 +320,8 @@ class VirtualMicrophone:
         self.stop_playback.set()
         if self.playback_thread:
             self.playback_thread.join(timeout=2.0)
+        if self.routing_thread:
+            self.routing_thread.join(timeout=2.0)
 
     def __enter__(self):
         self.create_virtual_sink()
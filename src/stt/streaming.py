@@ -0,0 +1,94 @@
+"""
+Transcription en flux : re-décodage périodique du segment en cours et
+validation des mots par accord local entre hypothèses successives.
+"""
+import re
+import numpy as np
+from typing import List, Optional, Tuple
+
+# Un mot terminé par l'une de ces ponctuations clôt une proposition
+CLAUSE_END = re.compile(r"[.!?;:,…]$")
+
+
+def _normalize(word: str) -> str:
+    return re.sub(r"[^\w']", "", word.lower())
+
+
+class LocalAgreement:
+    """
+    Politique d'accord local : un mot est validé dès que deux hypothèses
+    consécutives s'accordent sur lui (au-delà des mots déjà validés).
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.committed: List[str] = []
+        self._previous: List[str] = []
+
+    def update(self, words: List[str]) -> List[str]:
+        """Intègre une nouvelle hypothèse et retourne les mots nouvellement validés."""
+        n = len(self.committed)
+        agreed = []
+        for new, old in zip(words[n:], self._previous[n:]):
+            if _normalize(new) != _normalize(old):
+                break
+            agreed.append(new)
+        self.committed.extend(agreed)
+        self._previous = words
+        return agreed
+
+    def finish(self, words: List[str]) -> List[str]:
+        """Hypothèse finale : retourne les mots restants et réinitialise."""
+        remaining = words[len(self.committed):]
+        self.reset()
+        return remaining
+
+
+class StreamingTranscriber:
+    """
+    Produit des transcriptions partielles stables pendant qu'un segment grandit.
+
+    feed() re-décode le buffer complet du segment si au moins `interval_ms`
+    d'audio nouveau est disponible ; les mots validés ne sont émis qu'à une
+    frontière de proposition pour que la traduction reçoive du texte cohérent.
+    finish() décode le segment final et émet tout ce qui n'a pas été émis.
+    """
+
+    def __init__(self, transcriber, interval_ms=500, sampling_rate=16000, language="fr", task="transcribe"):
+        self.transcriber = transcriber
+        self.interval_samples = int(interval_ms * sampling_rate / 1000)
+        self.language = language
+        self.task = task  # "translate" : hypothèses directement en anglais
+        self.agreement = LocalAgreement()
+        self.reset()
+
+    def reset(self):
+        self.agreement.reset()
+        self._decoded_samples = 0
+        self._unemitted: List[str] = []
+
+    def feed(self, audio: np.ndarray, stats=None) -> Tuple[str, Optional[object]]:
+        """Traite le buffer courant du segment ; retourne (texte stable, info)."""
+        if len(audio) - self._decoded_samples < self.interval_samples:
+            return "", None
+        self._decoded_samples = len(audio)
+
+        text, info = self.transcriber.transcribe(audio, language=self.language, task=self.task, stats=stats)
+        self._unemitted.extend(self.agreement.update(text.split()))
+
+        # On n'émet que jusqu'à la dernière fin de proposition validée
+        cut = 0
+        for i, word in enumerate(self._unemitted):
+            if CLAUSE_END.search(word):
+                cut = i + 1
+        emitted, self._unemitted = self._unemitted[:cut], self._unemitted[cut:]
+        return " ".join(emitted), info
+
+    def finish(self, audio: np.ndarray, stats=None) -> Tuple[str, Optional[object]]:
+        """Décode le segment complet et retourne le texte non encore émis."""
+        text, info = self.transcriber.transcribe(audio, language=self.language, task=self.task, stats=stats)
+        remaining = self._unemitted + self.agreement.finish(text.split())
+        self.reset()
+        return " ".join(remaining), info
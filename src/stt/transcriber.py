@@ -1,13 +1,83 @@
-from faster_whisper import WhisperModel
+import logging
+import math
+import time
+from bisect import bisect_right
+from typing import List, Optional, Sequence
+from faster_whisper import WhisperModel, BatchedInferencePipeline
 import numpy as np
 
 import torch
 
+logger = logging.getLogger(__name__)
+
+
+class DecodeBudget:
+    """
+    Budget de décodage d'un segment :
+    - jetons générés bornés à `min_new_tokens + tokens_per_second * durée`
+      (une boucle d'hallucination s'arrête au lieu de remplir la fenêtre) ;
+    - repli en température limité à `temperatures` (au lieu de 6 passes),
+      piloté par faster-whisper qui réutilise la sortie de l'encodeur ;
+    - `deadline_s` est converti en plafond de jetons d'après le débit de
+      décodage mesuré, pour que toutes les passes d'une fenêtre tiennent
+      dans l'échéance ; entre deux fenêtres de 30s, l'échéance dépassée
+      arrête le décodage.
+    """
+
+    def __init__(self, tokens_per_second: float = 12.0, min_new_tokens: int = 16, max_new_tokens: int = 224,
+                 temperatures: Sequence[float] = (0.0, 0.4), deadline_s: Optional[float] = 3.0,
+                 compression_ratio_threshold: float = 2.4, log_prob_threshold: float = -1.0):
+        if not temperatures:
+            raise ValueError("Au moins une température de décodage est requise.")
+        self.tokens_per_second = tokens_per_second
+        self.min_new_tokens = min_new_tokens
+        self.max_new_tokens = max_new_tokens
+        self.temperatures = tuple(temperatures)
+        self.deadline_s = deadline_s
+        self.compression_ratio_threshold = compression_ratio_threshold
+        self.log_prob_threshold = log_prob_threshold
+
+    def new_tokens(self, duration_s: float, decode_rate: Optional[float] = None) -> int:
+        """
+        Jetons autorisés par fenêtre de 30s pour un segment de `duration_s`
+        secondes. decode_rate (jetons/s mesurés) : le plafond est abaissé pour
+        que toutes les passes de repli tiennent dans `deadline_s`, sans
+        descendre sous `min_new_tokens`.
+        """
+        tokens = min(self.min_new_tokens + math.ceil(self.tokens_per_second * min(duration_s, 30.0)),
+                     self.max_new_tokens)
+        if self.deadline_s is not None and decode_rate:
+            within_deadline = int(self.deadline_s * decode_rate / len(self.temperatures))
+            tokens = min(tokens, max(within_deadline, self.min_new_tokens))
+        return tokens
+
+
+class DecodeStats:
+    """Compte rendu d'un décodage, rattaché à la trace du segment."""
+
+    def __init__(self):
+        self.attempts = 0
+        self.fallbacks = 0
+        self.timed_out = False
+        self.max_new_tokens: Optional[int] = None
+        self.temperature: Optional[float] = None  # Température de l'hypothèse retenue
+
+    def to_dict(self) -> dict:
+        return {
+            "attempts": self.attempts,
+            "fallbacks": self.fallbacks,
+            "timed_out": self.timed_out,
+            "max_new_tokens": self.max_new_tokens,
+            "temperature": self.temperature,
+        }
+
+
 class Transcriber:
     """
     Transicripteur utilisant Faster-Whisper.
     """
-    def __init__(self, model_size="large-v3", device="auto", compute_type="auto"):
+    def __init__(self, model_size="large-v3", device="auto", compute_type="auto", num_workers=1,
+                 budget: Optional[DecodeBudget] = None, cpu_threads=0):
         # Détection automatique du device
         if device == "auto":
             device = "cuda" if torch.cuda.is_available() else "cpu"
@@ -17,25 +87,137 @@ class Transcriber:
             compute_type = "float16" if device == "cuda" else "int8"
             
         print(f"STT: Initialisation de {model_size} sur {device} ({compute_type})...")
-        self.model = WhisperModel(model_size, device=device, compute_type=compute_type)
+        # num_workers > 1 : transcribe() peut être appelé en parallèle depuis plusieurs threads,
+        # chacun avec cpu_threads threads (0 : valeur par défaut de CTranslate2)
+        self.model = WhisperModel(model_size, device=device, compute_type=compute_type, num_workers=num_workers,
+                                  cpu_threads=cpu_threads)
+        self.sampling_rate = 16000
+        self.budget = budget or DecodeBudget()
+        self._batched = None  # BatchedInferencePipeline créé au premier batch
+        self.decode_rate: Optional[float] = None  # Jetons/s mesurés par transcribe()
+
+    TASKS = ("transcribe", "translate")
+    RATE_SMOOTHING = 0.3  # Poids de la dernière mesure dans le débit de décodage
 
-    def transcribe(self, audio: np.ndarray, language: str = "fr"):
+    def _update_decode_rate(self, segments, elapsed_s: float):
+        """Débit (jetons/s, encodeur et replis compris) lissé sur les décodages récents."""
+        tokens = sum(len(segment.tokens) for segment in segments)
+        if tokens == 0 or elapsed_s <= 0:
+            return
+        rate = tokens / elapsed_s
+        if self.decode_rate is None:
+            self.decode_rate = rate
+        else:
+            self.decode_rate += self.RATE_SMOOTHING * (rate - self.decode_rate)
+
+    def transcribe(self, audio: np.ndarray, language: Optional[str] = "fr", task: str = "transcribe",
+                   stats: Optional[DecodeStats] = None):
         """
-        Transcrit un segment audio.
+        Transcrit un segment audio dans les limites de `self.budget`.
         audio: tableau numpy (float32) à 16kHz.
+        language: None pour la détection automatique.
+        task: "translate" produit directement du texte anglais (X -> en) dans
+        la même passe de décodage.
+        stats: si fourni, reçoit le nombre de passes, de replis et le dépassement
+        éventuel du délai.
         """
-        # Paramètres optimisés pour la latence (beam_size=1) et forcer le langage
+        if task not in self.TASKS:
+            raise ValueError(f"Tâche Whisper inconnue: {task}. Utilisation: {self.TASKS}")
+        stats = stats if stats is not None else DecodeStats()
+        budget = self.budget
+        stats.max_new_tokens = budget.new_tokens(len(audio) / self.sampling_rate, self.decode_rate)
+
+        # Un seul appel : faster-whisper encode chaque fenêtre une fois et
+        # rejoue seulement le décodeur aux températures de repli
+        started = time.perf_counter()
         segments, info = self.model.transcribe(
-            audio, 
-            beam_size=1, 
-            language=language, 
-            task="transcribe",
-            vad_filter=False, 
+            audio,
+            beam_size=1,
+            language=language,
+            task=task,
+            temperature=list(budget.temperatures),
+            compression_ratio_threshold=budget.compression_ratio_threshold,
+            log_prob_threshold=budget.log_prob_threshold,
+            max_new_tokens=stats.max_new_tokens,
+            vad_filter=False,
             condition_on_previous_text=False,
             no_speech_threshold=0.3
         )
-        
+        decoded = []
+        for segment in segments:
+            decoded.append(segment)
+            # Fenêtre suivante (segments > 30s) : seulement si l'échéance le permet
+            if budget.deadline_s is not None and time.perf_counter() - started > budget.deadline_s:
+                stats.timed_out = True
+                break
+        elapsed = time.perf_counter() - started
+        self._update_decode_rate(decoded, elapsed)
+
+        temperatures = [s.temperature for s in decoded if getattr(s, "temperature", None) is not None]
+        stats.temperature = max(temperatures) if temperatures else budget.temperatures[0]
+        stats.fallbacks = budget.temperatures.index(stats.temperature) if stats.temperature in budget.temperatures else 0
+        stats.attempts = stats.fallbacks + 1
+        if budget.deadline_s is not None and elapsed > budget.deadline_s:
+            stats.timed_out = True
+        if stats.timed_out:
+            logger.warning(f"STT: échéance de {budget.deadline_s}s dépassée ({elapsed:.2f}s, "
+                           f"{stats.attempts} passe(s))")
+
         # On concatène les segments pour avoir le texte complet
-        full_text = " ".join([segment.text for segment in segments]).strip()
-        
+        full_text = " ".join([segment.text for segment in decoded]).strip()
+
         return full_text, info
+
+
+    def transcribe_batch(self, audios: List[np.ndarray], language: str = "fr", task: str = "transcribe",
+                         stats: Optional[DecodeStats] = None):
+        """
+        Transcrit plusieurs segments en une seule passe batchée.
+        Retourne une liste de (texte, info) dans l'ordre des segments.
+        Le batch est décodé en une passe, sans repli en température (non pris
+        en charge par BatchedInferencePipeline) ; l'échéance s'applique via le
+        même plafond de jetons que transcribe().
+        """
+        if task not in self.TASKS:
+            raise ValueError(f"Tâche Whisper inconnue: {task}. Utilisation: {self.TASKS}")
+        if len(audios) == 1:
+            return [self.transcribe(audios[0], language=language, task=task, stats=stats)]
+        stats = stats if stats is not None else DecodeStats()
+        stats.attempts = 1
+        stats.temperature = self.budget.temperatures[0]
+        stats.max_new_tokens = self.budget.new_tokens(max(len(audio) for audio in audios) / self.sampling_rate,
+                                                      self.decode_rate)
+
+        if self._batched is None:
+            self._batched = BatchedInferencePipeline(self.model)
+
+        # Les segments sont mis bout à bout ; chaque clip est décodé comme un
+        # élément du batch et repéré par sa position de départ.
+        clip_starts = []
+        clips = []
+        position = 0
+        for audio in audios:
+            start = position / self.sampling_rate
+            position += len(audio)
+            clip_starts.append(start)
+            clips.append({"start": start, "end": position / self.sampling_rate})
+
+        segments, info = self._batched.transcribe(
+            np.concatenate(audios).astype(np.float32),
+            beam_size=1,
+            language=language,
+            task=task,
+            temperature=stats.temperature,
+            max_new_tokens=stats.max_new_tokens,
+            vad_filter=False,
+            clip_timestamps=clips,
+            batch_size=len(audios),
+            no_speech_threshold=0.3
+        )
+
+        texts = [[] for _ in audios]
+        for segment in segments:
+            index = max(bisect_right(clip_starts, segment.start + 1e-3) - 1, 0)
+            texts[index].append(segment.text.strip())
+
+        return [(" ".join(parts).strip(), info) for parts in texts]
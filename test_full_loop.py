@@ -68,12 +68,12 @@ async def test_full_pipeline_fidelity():
     async def captured_transcription_loop():
         while pipeline.is_running:
             try:
-                segment, start_time = await pipeline.transcription_queue.get()
+                segment, trace, _ = await pipeline.transcription_queue.get()
                 text, info = pipeline.transcriber.transcribe(segment)
                 if text:
                     results["transcription"] = text
                     print(f"STT [fr]: {text}")
-                    await pipeline.translation_queue.put((text, info.language, start_time))
+                    await pipeline.translation_queue.put((text, info.language, trace))
                 pipeline.transcription_queue.task_done()
             except Exception:
                 break
@@ -82,9 +82,9 @@ async def test_full_pipeline_fidelity():
     async def captured_tts_loop():
         while pipeline.is_running:
             try:
-                text, lang, start_time = await pipeline.tts_queue.get()
+                text, lang, trace = await pipeline.tts_queue.get()
                 results["translation"] = text
-                results["latency"] = time.time() - start_time
+                results["latency"] = time.monotonic() - trace.marks["endpoint"]
                 print(f"TRAD [{lang}]: {text}")
                 print(f"⏱️ Latence mesurée: {results['latency']:.2f}s")
                 pipeline.tts_queue.task_done()
@@ -1,6 +1,7 @@
 import asyncio
 import numpy as np
 import sounddevice as sd
+from time import monotonic
 from src.core.pipeline import AsyncPipeline
 
 async def record_and_process():
@@ -29,7 +30,7 @@ async def record_and_process():
         if status:
             print(status)
         # On envoie le chunk dans la queue du pipeline de manière asynchrone
-        loop.call_soon_threadsafe(pipeline.audio_queue.put_nowait, indata.copy().flatten())
+        loop.call_soon_threadsafe(pipeline.audio_queue.put_nowait, (indata.copy().flatten(), monotonic()))
 
     loop = asyncio.get_running_loop()
     
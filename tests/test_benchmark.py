@@ -0,0 +1,95 @@
+import json
+import time
+import numpy as np
+import pytest
+from unittest.mock import patch
+from src.bench import benchmark
+from src.bench.benchmark import build_corpus, compare, parse_thresholds, run_stage, synthetic_clip
+
+def test_synthetic_corpus_is_reproducible():
+    a = synthetic_clip("a", 2, seed=3)
+    b = synthetic_clip("b", 2, seed=3)
+    np.testing.assert_array_equal(a.audio, b.audio)
+    assert a.duration == 2
+    corpus = build_corpus(paths=["absent.wav"], synthetic_seconds=(1, 2))
+    assert [c.name for c in corpus] == ["synthetic_1s", "synthetic_2s"]
+
+def test_run_stage_reports_rtf_and_percentiles():
+    calls = [lambda: None] * 4
+    result = run_stage(calls, audio_s=2.0, repeat=2)
+    assert result["runs"] == 8
+    assert result["rtf"] == pytest.approx(result["wall_s"] / 4.0, abs=1e-3)
+    assert result["p95_ms"] >= result["p50_ms"] >= 0
+    assert run_stage(calls)["rtf"] is None
+
+def test_compare_flags_regressions_above_threshold():
+    baseline = {"stages": {"stt": {"rtf": 0.20, "p95_ms": 100.0, "cpu_s": 1.0}}}
+    current = {"stages": {"stt": {"rtf": 0.21, "p95_ms": 150.0, "cpu_s": 0.5}}}
+    regressions = compare(current, baseline)
+    assert len(regressions) == 1 and regressions[0].startswith("stt.p95_ms")
+    assert compare(current, baseline, {"p95_ms": 0.6}) == []
+    # Étage absent du run courant : ignoré
+    assert compare({"stages": {}}, baseline) == []
+
+def test_parse_thresholds():
+    assert parse_thresholds(["p95_ms=0.2"]) == {"p95_ms": 0.2}
+    with pytest.raises(ValueError):
+        parse_thresholds(["latency=0.2"])
+
+def test_main_exit_code_on_regression(tmp_path):
+    baseline = tmp_path / "baseline.json"
+    baseline.write_text(json.dumps({"stages": {"vad": {"rtf": 0.01}}}))
+    report = {"meta": {}, "stages": {"vad": {"rtf": 0.05}}}
+    with patch.object(benchmark, "run", return_value=report):
+        assert benchmark.main(["--stages", "vad", "--output", str(tmp_path / "out.json"),
+                               "--baseline", str(baseline)]) == 1
+        assert benchmark.main(["--stages", "vad", "--output", str(tmp_path / "out.json"),
+                               "--baseline", str(baseline), "--threshold", "rtf=5"]) == 0
+
+def test_run_reports_stage_peak_rss_and_forwards_vad_backend():
+    args = benchmark.argparse.Namespace(seed=0, clips=[], synthetic=[1], stages=["pipeline"], model_size="tiny",
+                                        device="cpu", vad_backend="onnx", repeat=1)
+    samples = iter([100.0, 340.0, 120.0])  # Départ, pic transitoire, fin
+    with patch.object(benchmark, "bench_pipeline", return_value={"rtf": 0.1}) as bench, \
+         patch.object(benchmark, "current_rss_mb", side_effect=lambda: next(samples, 120.0)), \
+         patch.object(benchmark.PeakRssSampler, "_run", lambda self: self._sample()):
+        report = benchmark.run(args)
+    assert bench.call_args.kwargs["vad_backend"] == "onnx"
+    # Le pic survit à la libération de fin d'étage
+    assert report["stages"]["pipeline"]["peak_rss_mb"] == 340.0
+    assert report["stages"]["pipeline"]["rss_start_mb"] == 100.0
+
+def test_peak_rss_sampler_sees_transient_allocation():
+    if benchmark.current_rss_mb() is None:
+        pytest.skip("RSS courant indisponible")
+    with benchmark.PeakRssSampler(interval_s=0.001) as rss:
+        spike = np.ones(64 * 1024 * 1024 // 8)  # 64 Mo
+        time.sleep(0.05)
+        del spike
+    assert rss.peak_mb - rss.start_mb > 32
+
+def test_bench_pipeline_blocks_audio_queue_and_reports_drops():
+    from unittest.mock import AsyncMock
+    corpus = build_corpus(paths=[], synthetic_seconds=(1,))
+    with patch("src.core.pipeline.AsyncPipeline") as MockPipeline, \
+         patch.object(benchmark, "_drive_pipeline", new=AsyncMock(return_value=0.5)):
+        pipeline = MockPipeline.return_value
+        pipeline.metrics.snapshot.return_value = {"stages_ms": {"e2e": {"count": 1, "p50": 10.0, "p95": 12.0}}}
+        pipeline.get_queue_stats.return_value = {
+            "audio": {"dropped_oldest": 0, "dropped_stale": 0},
+            "tts": {"dropped_oldest": 0, "dropped_stale": 2},
+        }
+        result = benchmark.bench_pipeline(corpus, "tiny", "cpu", vad_backend="onnx")
+
+    kwargs = MockPipeline.call_args.kwargs
+    assert kwargs["queue_policies"]["audio"]["policy"] == "block"
+    assert kwargs["vad_backend"] == "onnx"
+    assert result["dropped"] == {"audio": 0, "tts": 2}
+
+def test_bench_vad_feeds_capture_sized_blocks():
+    corpus = build_corpus(paths=[], synthetic_seconds=(1,))
+    with patch("src.core.vad.VADDetector") as MockVAD:
+        benchmark.bench_vad(corpus)
+    sizes = {len(call.args[0]) for call in MockVAD.return_value.process_chunk.call_args_list}
+    # 16000 samples : blocs de 4096, le dernier plus court
+    assert sizes == {benchmark.CAPTURE_BLOCK, 16000 % benchmark.CAPTURE_BLOCK}
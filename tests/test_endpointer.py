@@ -0,0 +1,60 @@
+import numpy as np
+from src.core.endpointer import Endpointer
+from src.core.vad import FRAME_DTYPE
+
+FRAME_SIZE = 512
+
+def make_frames(probs, start_frame=0):
+    frames = np.empty(len(probs), dtype=FRAME_DTYPE)
+    frames["offset"] = (start_frame + np.arange(len(probs))) * FRAME_SIZE
+    frames["prob"] = probs
+    return frames
+
+def test_segment_closed_after_min_silence():
+    ep = Endpointer(min_silence_ms=500, pre_roll_ms=0)
+    # 500ms = 8000 samples = 15.6 trames : la 16e trame de silence ferme le segment
+    probs = [0.0] * 5 + [0.9] * 10 + [0.0] * 16
+    segments = ep.process(make_frames(probs))
+    assert segments == [(5 * FRAME_SIZE, 15 * FRAME_SIZE)]
+
+def test_latency_independent_of_block_size():
+    probs = [0.0] * 5 + [0.9] * 10 + [0.0] * 40
+    frames = make_frames(probs)
+    results = []
+    for block in (1, 8):
+        ep = Endpointer(min_silence_ms=500)
+        closed_at = None
+        for i in range(0, len(frames), block):
+            if ep.process(frames[i:i + block]) and closed_at is None:
+                closed_at = i
+        results.append((closed_at // 8, ep.retain_from()))
+    assert results[0] == results[1]
+
+def test_short_blip_ignored():
+    ep = Endpointer(min_speech_ms=64)
+    segments = ep.process(make_frames([0.0, 0.9, 0.0] + [0.0] * 20))
+    assert segments == []
+    assert not ep.in_segment
+
+def test_hysteresis_keeps_segment_open():
+    ep = Endpointer(threshold=0.5, min_silence_ms=100, pre_roll_ms=0)
+    # 0.4 est entre neg_threshold (0.35) et threshold : la parole continue
+    segments = ep.process(make_frames([0.9] * 4 + [0.4] * 10))
+    assert segments == []
+    assert ep.in_segment
+
+def test_pre_roll_prepended():
+    ep = Endpointer(min_silence_ms=100, pre_roll_ms=64)
+    segments = ep.process(make_frames([0.0] * 10 + [0.9] * 4 + [0.0] * 4))
+    assert segments[0][0] == 10 * FRAME_SIZE - 1024
+
+def test_max_segment_forces_split():
+    ep = Endpointer(max_segment_ms=320, pre_roll_ms=0)  # 10 trames
+    segments = ep.process(make_frames([0.9] * 25))
+    assert segments == [(0, 10 * FRAME_SIZE), (10 * FRAME_SIZE, 20 * FRAME_SIZE)]
+    assert ep.flush() == [(20 * FRAME_SIZE, 25 * FRAME_SIZE)]
+
+def test_retain_from_covers_pre_roll_when_idle():
+    ep = Endpointer(pre_roll_ms=200)
+    ep.process(make_frames([0.0] * 20))
+    assert ep.retain_from() == 20 * FRAME_SIZE - ep.pre_roll_samples
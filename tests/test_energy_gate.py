@@ -0,0 +1,55 @@
+import numpy as np
+from src.core.energy_gate import EnergyGate
+
+FRAME_SIZE = 512
+
+def make_frames(signal):
+    n = len(signal) // FRAME_SIZE
+    return signal[:n * FRAME_SIZE].reshape(n, FRAME_SIZE)
+
+def test_digital_silence_is_skipped():
+    gate = EnergyGate()
+    active = gate.process(np.zeros((8, FRAME_SIZE), dtype=np.float32))
+    assert not active.any()
+    assert gate.frames_skipped == 8
+    assert gate.skip_ratio == 1.0
+
+def test_noise_skipped_and_tone_passed():
+    rng = np.random.default_rng(0)
+    gate = EnergyGate()
+    noise = make_frames(rng.normal(0, 0.002, 16000).astype(np.float32))
+    assert gate.process(noise).mean() < 0.2
+
+    t = np.arange(8 * FRAME_SIZE) / 16000
+    tone = make_frames((0.3 * np.sin(2 * np.pi * 220 * t)).astype(np.float32))
+    assert gate.process(tone).all()
+
+def test_noise_floor_tracks_level_changes():
+    rng = np.random.default_rng(0)
+    gate = EnergyGate()
+    gate.process(make_frames(rng.normal(0, 0.01, 16000).astype(np.float32)))
+    high_floor = gate.noise_floor_db
+
+    # Le plancher redescend immédiatement quand le bruit baisse
+    gate.process(make_frames(rng.normal(0, 0.001, 16000).astype(np.float32)))
+    assert gate.noise_floor_db < high_floor - 10
+
+def test_stats_and_reset():
+    gate = EnergyGate()
+    gate.process(np.zeros((4, FRAME_SIZE), dtype=np.float32))
+    stats = gate.get_stats()
+    assert stats["frames_total"] == 4
+    assert stats["frames_skipped"] == 4
+    gate.reset()
+    assert gate.frames_total == 0
+    assert gate.noise_floor_db is None
+
+def test_stream_starting_mid_speech_keeps_low_floor():
+    """Un premier bloc de parole ne fixe pas le plancher au niveau de la voix."""
+    gate = EnergyGate()
+    t = np.arange(8 * FRAME_SIZE) / 16000
+    voice = make_frames((0.3 * np.sin(2 * np.pi * 220 * t)).astype(np.float32))
+    gate.process(voice)
+    assert gate.noise_floor_db < gate.max_initial_floor_db + 1
+    # La parole qui suit (plus faible de 6 dB) est toujours transmise à la VAD
+    assert gate.process(voice * 0.5).all()
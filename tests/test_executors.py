@@ -0,0 +1,34 @@
+import asyncio
+import threading
+import pytest
+from src.core.executors import StageExecutors
+
+@pytest.mark.asyncio
+async def test_run_executes_in_stage_thread():
+    executors = StageExecutors()
+    try:
+        name = await executors.run("stt", lambda: threading.current_thread().name)
+        assert name.startswith("vox-stt")
+        assert await executors.run("mt", lambda a, b=0: a + b, 1, b=2) == 3
+    finally:
+        executors.shutdown()
+
+@pytest.mark.asyncio
+async def test_unknown_stage_raises():
+    executors = StageExecutors()
+    try:
+        with pytest.raises(ValueError):
+            await executors.run("asr", print)
+    finally:
+        executors.shutdown()
+
+@pytest.mark.asyncio
+async def test_workers_configurable():
+    executors = StageExecutors({"mt": 2})
+    try:
+        assert executors.workers == {"vad": 1, "stt": 1, "mt": 2, "tts": 1}
+        barrier = threading.Barrier(2, timeout=1.0)
+        # Deux appels simultanés ne passent la barrière qu'avec deux workers
+        await asyncio.gather(executors.run("mt", barrier.wait), executors.run("mt", barrier.wait))
+    finally:
+        executors.shutdown()
@@ -0,0 +1,104 @@
+import json
+import numpy as np
+import pytest
+import soundfile as sf
+from unittest.mock import patch, MagicMock
+from src.core.file_translator import FileTranslator, format_srt_time
+from src.core.vad import FRAME_DTYPE
+
+class MockInfo:
+    def __init__(self, language="fr"):
+        self.language = language
+
+def make_frame_vad():
+    """Trames de 512 samples : parole si l'amplitude de la trame dépasse 0.1."""
+    state = {"offset": 0, "pending": np.zeros(0, dtype=np.float32)}
+
+    def process_chunk(chunk):
+        audio = np.concatenate((state["pending"], chunk))
+        n_frames = len(audio) // 512
+        state["pending"] = audio[n_frames * 512:]
+        frames = np.empty(n_frames, dtype=FRAME_DTYPE)
+        frames["offset"] = state["offset"] + np.arange(n_frames) * 512
+        frames["prob"] = np.abs(audio[:n_frames * 512].reshape(n_frames, 512)).max(axis=1) > 0.1
+        state["offset"] += n_frames * 512
+        return frames
+
+    return process_chunk
+
+@pytest.fixture
+def components():
+    with patch("src.core.file_translator.VADDetector") as MockVAD, \
+         patch("src.core.file_translator.Transcriber") as MockTranscriber, \
+         patch("src.core.file_translator.Translator") as MockTranslator:
+        MockVAD.return_value.process_chunk.side_effect = make_frame_vad()
+        transcriber = MockTranscriber.return_value
+        transcriber.transcribe.side_effect = lambda audio, language=None: (f"Phrase de {len(audio)} samples.", MockInfo("fr"))
+        MockTranslator.return_value.translate.side_effect = lambda text, src, tgt: f"[{tgt}] {text}"
+        yield {"transcriber": MockTranscriber, "translator": MockTranslator}
+
+@pytest.fixture
+def meeting_wav(tmp_path):
+    """Fichier 48 kHz stéréo : deux énoncés de 1 s séparés par du silence."""
+    sr = 48000
+    tone = 0.5 * np.sin(2 * np.pi * 220 * np.arange(sr) / sr)
+    silence = np.zeros(sr)
+    mono = np.concatenate((silence, tone, silence, tone, silence)).astype(np.float32)
+    path = tmp_path / "reunion.wav"
+    sf.write(path, np.stack((mono, mono), axis=1), sr)
+    return str(path)
+
+def test_format_srt_time():
+    assert format_srt_time(3725.5) == "01:02:05,500"
+
+def test_translate_file_writes_ordered_outputs(components, meeting_wav, tmp_path):
+    translator = FileTranslator(model_size="tiny", device="cpu", workers=3, min_silence_ms=200)
+    jsonl, srt = tmp_path / "out.jsonl", tmp_path / "out.srt"
+    segments = translator.translate_file(meeting_wav, jsonl_path=str(jsonl), srt_path=str(srt))
+
+    assert len(segments) == 2
+    # Les workers STT/MT sont configurés pour le parallélisme
+    with patch("src.core.file_translator.os.cpu_count", return_value=8):
+        FileTranslator(model_size="tiny", device="cpu", workers=3)
+    components["transcriber"].assert_called_with(model_size="tiny", device="cpu", num_workers=3, cpu_threads=2)
+    components["translator"].assert_called_with(device="cpu", inter_threads=3, intra_threads=2)
+
+    lines = [json.loads(line) for line in jsonl.read_text().splitlines()]
+    assert [line["index"] for line in lines] == [0, 1]
+    assert 0.7 < lines[0]["start"] < 1.0 and 1.9 < lines[0]["end"] < 2.7
+    assert lines[1]["start"] > lines[0]["end"]
+    assert lines[0]["translation"].startswith("[en] ")
+    assert srt.read_text().startswith("1\n00:00:00,")
+
+def test_dub_wav_matches_source_duration(components, meeting_wav, tmp_path):
+    with patch("src.core.tts.TTS") as MockTTS:
+        MockTTS.return_value.generate.return_value = (np.full(2400, 0.25, dtype=np.float32), 24000)
+        translator = FileTranslator(model_size="tiny", device="cpu", workers=2, min_silence_ms=200, dub=True)
+        dub = tmp_path / "dub.wav"
+        translator.translate_file(meeting_wav, dub_path=str(dub))
+
+    audio, sr = sf.read(dub)
+    assert sr == 24000
+    assert len(audio) == 5 * 24000
+    # Voix placée au début du premier segment (pré-roll inclus)
+    voiced = np.flatnonzero(np.abs(audio) > 0.2)
+    assert 0.7 * sr < voiced[0] < 1.0 * sr
+
+def test_dub_requires_tts(components, meeting_wav, tmp_path):
+    translator = FileTranslator(model_size="tiny", device="cpu")
+    with pytest.raises(ValueError):
+        translator.translate_file(meeting_wav, dub_path=str(tmp_path / "dub.wav"))
+
+def test_unsupported_language_segment_is_skipped(components, meeting_wav, tmp_path):
+    languages = iter(["de", "fr"])
+    components["transcriber"].return_value.transcribe.side_effect = \
+        lambda audio, language=None: ("Guten Tag.", MockInfo(next(languages)))
+    translator = FileTranslator(model_size="tiny", device="cpu", workers=1, language=None, min_silence_ms=200)
+    jsonl = tmp_path / "out.jsonl"
+    segments = translator.translate_file(meeting_wav, jsonl_path=str(jsonl))
+
+    # Le segment allemand n'interrompt pas le fichier : seul le second est traduit
+    assert [s.index for s in segments] == [1]
+    assert segments[0].source_lang == "fr"
+    assert all(call.args[1:] == ("fr", "en") for call in components["translator"].return_value.translate.call_args_list)
+    assert len(jsonl.read_text().splitlines()) == 1
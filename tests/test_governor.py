@@ -0,0 +1,62 @@
+import pytest
+from src.core.governor import ModelGovernor
+
+TIERS = ["large-v3", "small", "tiny"]
+
+def feed(governor, rtf, n, latency=0.2, depth=0):
+    switches = []
+    for _ in range(n):
+        tier = governor.observe(audio_s=2.0, decode_s=2.0 * rtf, latency_s=latency, queue_depth=depth)
+        if tier:
+            switches.append(tier)
+    return switches
+
+def test_downgrades_when_slower_than_real_time():
+    governor = ModelGovernor(TIERS, min_dwell=3)
+    assert feed(governor, rtf=1.5, n=2) == []  # Période minimale avant décision
+    assert feed(governor, rtf=1.5, n=1) == ["small"]
+    assert governor.switches[-1]["from"] == "large-v3"
+    assert governor.get_status()["tier_rtf"]["large-v3"] == 1.5
+
+def test_downgrades_on_latency_target_and_stays_at_fastest_tier():
+    governor = ModelGovernor(TIERS, initial="small", target_latency_ms=1000, min_dwell=1)
+    assert feed(governor, rtf=0.5, n=1, latency=1.5) == ["tiny"]
+    assert feed(governor, rtf=2.0, n=5) == []
+    assert governor.tier == "tiny"
+
+def test_deep_queue_overrides_dwell():
+    governor = ModelGovernor(TIERS, max_queue_depth=3, min_dwell=10)
+    assert feed(governor, rtf=0.1, n=1, depth=6) == ["small"]
+
+def test_upgrades_when_load_allows_with_hysteresis():
+    governor = ModelGovernor(TIERS, initial="tiny", min_dwell=2, rtf_low=0.35, upgrade_cost=2.0)
+    # RTF estimé de "small" = 0.25 * 2 = 0.5 : pas encore
+    assert feed(governor, rtf=0.25, n=4) == []
+    assert feed(governor, rtf=0.1, n=8)[0] == "small"
+    # File non vide : on ne remonte pas
+    count = governor.get_status()["switch_count"]
+    assert feed(governor, rtf=0.05, n=4, depth=1) == []
+    assert governor.get_status()["switch_count"] == count
+
+def test_upgrades_again_once_overloaded_rtf_expires():
+    governor = ModelGovernor(TIERS, min_dwell=2, rtf_ttl=10, upgrade_cost=2.0)
+    assert feed(governor, rtf=1.5, n=2) == ["small"]
+    # Charge retombée : le RTF 1.5 relevé en surcharge bloque la remontée tant qu'il est frais
+    assert feed(governor, rtf=0.1, n=10) == []
+    # Puis il expire : estimation 0.1 * 2 = 0.2 < rtf_low
+    assert feed(governor, rtf=0.1, n=1) == ["large-v3"]
+    assert governor.switches[-1]["reason"].startswith("RTF estimé 0.20")
+
+def test_switch_history_is_bounded():
+    governor = ModelGovernor(["large-v3", "tiny"], min_dwell=1, history=3, rtf_ttl=0)
+    for _ in range(5):
+        feed(governor, rtf=1.5, n=1)
+        feed(governor, rtf=0.05, n=1)
+    assert len(governor.switches) == 3
+    assert governor.get_status()["switch_count"] == 10
+
+def test_invalid_configuration():
+    with pytest.raises(ValueError):
+        ModelGovernor([])
+    with pytest.raises(ValueError):
+        ModelGovernor(TIERS, initial="medium")
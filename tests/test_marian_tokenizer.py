@@ -0,0 +1,48 @@
+import json
+import sys
+import pytest
+from unittest.mock import patch
+import sentencepiece as spm
+from src.core import marian_tokenizer
+from src.core.marian_tokenizer import SentencePieceTokenizer, load_tokenizer
+
+@pytest.fixture
+def ct2_dir(tmp_path):
+    """Dossier CT2 minimal : petits modèles SentencePiece et vocabulaire partagé."""
+    corpus = tmp_path / "corpus.txt"
+    corpus.write_text("\n".join(["bonjour à tous", "merci beaucoup", "la diapositive suivante",
+                                 "vous m'entendez", "hello everyone", "thank you very much"] * 20),
+                      encoding="utf-8")
+    spm.SentencePieceTrainer.train(input=str(corpus), model_prefix=str(tmp_path / "sp"), vocab_size=40,
+                                   model_type="unigram", minloglevel=2)
+    model_dir = tmp_path / "ct2"
+    model_dir.mkdir()
+    for name in ("source.spm", "target.spm"):
+        (model_dir / name).write_bytes((tmp_path / "sp.model").read_bytes())
+    processor = spm.SentencePieceProcessor(model_file=str(tmp_path / "sp.model"))
+    pieces = [processor.id_to_piece(i) for i in range(processor.get_piece_size())]
+    # Pièce volontairement absente du vocabulaire du modèle
+    vocabulary = [p for p in pieces if p != processor.encode("merci", out_type=str)[-1]]
+    (model_dir / "shared_vocabulary.json").write_text(json.dumps(["<pad>", "</s>", "<unk>"] + vocabulary))
+    return model_dir
+
+def test_tokenize_round_trip(ct2_dir):
+    tokenizer = SentencePieceTokenizer(str(ct2_dir))
+    tokens = tokenizer.tokenize("bonjour à tous")
+    assert tokens[-1] == "</s>"
+    assert tokenizer.detokenize(tokens + ["<pad>"]) == "bonjour à tous"
+
+def test_unknown_pieces_map_to_unk(ct2_dir):
+    tokenizer = SentencePieceTokenizer(str(ct2_dir))
+    assert "<unk>" in tokenizer.tokenize("merci")
+
+def test_load_tokenizer_avoids_transformers(ct2_dir):
+    with patch.dict(sys.modules, {"transformers": None}):
+        assert isinstance(load_tokenizer("Helsinki-NLP/opus-mt-fr-en", str(ct2_dir)), SentencePieceTokenizer)
+
+def test_load_tokenizer_falls_back_without_spm(tmp_path):
+    with patch.object(marian_tokenizer, "_fetch_spm_files", side_effect=OSError("hors-ligne")), \
+         patch.object(marian_tokenizer, "HFTokenizer") as MockHF:
+        tokenizer = load_tokenizer("Helsinki-NLP/opus-mt-fr-en", str(tmp_path))
+    MockHF.assert_called_once_with("Helsinki-NLP/opus-mt-fr-en")
+    assert tokenizer is MockHF.return_value
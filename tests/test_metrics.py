@@ -0,0 +1,73 @@
+import json
+import pytest
+from src.core.metrics import Histogram, PipelineMetrics, SegmentTrace, LATENCY_BUCKETS_MS
+
+def make_trace(metrics, **marks):
+    trace = metrics.new_trace()
+    for name, t in marks.items():
+        trace.mark(name, t)
+    return trace
+
+def test_trace_span_and_unknown_mark():
+    trace = SegmentTrace(0)
+    trace.mark("endpoint", 1.0)
+    trace.mark("stt_start", 1.25)
+    assert trace.span("endpoint", "stt_start") == pytest.approx(0.25)
+    assert trace.span("stt_start", "stt_end") is None
+    with pytest.raises(ValueError):
+        trace.mark("decode")
+
+def test_histogram_percentiles_and_buckets():
+    h = Histogram(LATENCY_BUCKETS_MS)
+    for value in range(1, 101):
+        h.record(float(value))
+    summary = h.summary()
+    assert summary["count"] == 100
+    assert summary["p50"] == pytest.approx(50.5)
+    assert summary["p99"] == pytest.approx(99.01)
+    assert summary["max"] == 100
+    assert summary["buckets"]["<=10"] == 10
+    assert summary["buckets"]["<=100"] == 50
+    assert Histogram(LATENCY_BUCKETS_MS).summary() == {"count": 0}
+
+def test_record_spans_once():
+    metrics = PipelineMetrics()
+    trace = make_trace(metrics, endpoint=0.0, stt_start=0.1, stt_end=0.4, first_audio=0.9)
+    metrics.record(trace)
+    metrics.record(trace)  # Double signalement (abandon puis lecture) ignoré
+
+    stages = metrics.snapshot()["stages_ms"]
+    assert metrics.segments == 1
+    assert stages["stt"]["p50"] == pytest.approx(300)
+    assert stages["e2e"]["p50"] == pytest.approx(900)
+    # Étapes non horodatées : pas de mesure
+    assert stages["mt"] == {"count": 0}
+
+def test_partial_traces_counted_separately():
+    metrics = PipelineMetrics()
+    trace = metrics.new_trace(partial=True)
+    metrics.record(trace)
+    assert (metrics.segments, metrics.partials) == (0, 1)
+
+def test_decode_fallbacks_and_timeouts_counted():
+    metrics = PipelineMetrics()
+    trace = make_trace(metrics, endpoint=0.0, stt_start=0.1, stt_end=0.5)
+    trace.decode = {"attempts": 2, "fallbacks": 1, "timed_out": True}
+    metrics.record(trace)
+    metrics.record(make_trace(metrics, endpoint=0.0))
+
+    snapshot = metrics.snapshot()
+    assert snapshot["stt"] == {"fallbacks": 1, "timeouts": 1}
+    assert snapshot["recent_traces"][0]["decode"]["timed_out"] is True
+    assert "decode" not in snapshot["recent_traces"][1]
+
+def test_queue_depths_and_dump_json(tmp_path):
+    metrics = PipelineMetrics()
+    for depth in (0, 1, 5):
+        metrics.sample_queues({"tts": depth})
+    path = tmp_path / "metrics.json"
+    metrics.dump_json(str(path))
+
+    data = json.loads(path.read_text())
+    assert data["queue_depths"]["tts"]["max"] == 5
+    assert not (tmp_path / "metrics.json.tmp").exists()
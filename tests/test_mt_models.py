@@ -0,0 +1,61 @@
+import pytest
+from unittest.mock import patch
+from src.core import mt_models
+from src.core.mt_models import (agreement, convert_variants, load_manifest, prepare, select_variant,
+                                thread_candidates, variant_dir)
+
+def test_convert_variants_quantizes_and_skips_existing(tmp_path):
+    existing = tmp_path / "org_model_ct2_float32"
+    existing.mkdir()
+    (existing / "model.bin").write_bytes(b"")
+
+    with patch("src.core.mt_models.ctranslate2") as mock_ct2:
+        paths = convert_variants("org/model", str(tmp_path))
+
+    converter = mock_ct2.converters.TransformersConverter
+    assert converter.call_args.kwargs["copy_files"] == ["source.spm", "target.spm"]
+    quantizations = [c.kwargs["quantization"] for c in converter.return_value.convert.call_args_list]
+    assert quantizations == ["int8", "int8_float32"]
+    assert paths["float32"] == str(existing)
+
+def test_convert_variants_rejects_unknown_quantization(tmp_path):
+    with pytest.raises(ValueError):
+        convert_variants("org/model", str(tmp_path), variants=("int4",))
+
+def test_select_fastest_acceptable_variant():
+    """int8 est le plus rapide mais trop éloigné de float32 : int8_float32 est retenu."""
+    reference = ["Hello everyone.", "Next slide."]
+    timings = {
+        ("float32", 1): 40.0, ("float32", 2): 30.0,
+        ("int8", 1): 15.0, ("int8", 2): 10.0,
+        ("int8_float32", 1): 18.0, ("int8_float32", 2): 20.0,
+    }
+    outputs = {"float32": reference, "int8": ["Hi all", "Then"], "int8_float32": reference}
+
+    def fake_benchmark(path, compute_type, tokenizer, sentences, intra_threads, repeat=3):
+        return timings[(compute_type, intra_threads)], outputs[compute_type]
+
+    paths = {v: f"/models/m_ct2_{v}" for v in ("float32", "int8", "int8_float32")}
+    with patch.object(mt_models, "benchmark_variant", side_effect=fake_benchmark), \
+         patch.object(mt_models, "load_tokenizer"):
+        entry = select_variant("org/model", paths, ["a", "b"], min_agreement=0.9, threads=[1, 2])
+
+    assert entry["variant"] == "int8_float32"
+    assert entry["path"] == "m_ct2_int8_float32"
+    assert entry["intra_threads"] == 1
+    assert entry["candidates"]["int8"]["agreement"] < 0.9
+    assert entry["candidates"]["float32"] == {"p50_ms": 30.0, "intra_threads": 2, "agreement": 1.0}
+
+def test_prepare_writes_manifest(tmp_path):
+    entry = {"variant": "int8", "path": "m_ct2_int8", "compute_type": "int8", "intra_threads": 2}
+    with patch.object(mt_models, "convert_variants", return_value={"int8": "m_ct2_int8"}), \
+         patch.object(mt_models, "select_variant", return_value=entry):
+        prepare({("fr", "en"): "org/model"}, str(tmp_path), variants=("int8",))
+
+    assert load_manifest(str(tmp_path))["models"] == {"fr-en": entry}
+    assert load_manifest(str(tmp_path / "absent")) == {}
+
+def test_helpers():
+    assert agreement(["abc"], ["abc"]) == 1.0
+    assert thread_candidates(3) == [1, 2, 3]
+    assert variant_dir("models", "org/model", "int8").endswith("org_model_ct2_int8")
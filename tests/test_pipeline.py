@@ -3,6 +3,7 @@ import asyncio
 import numpy as np
 from unittest.mock import patch, MagicMock
 from src.core.pipeline import AsyncPipeline
+from src.core.vad import FRAME_DTYPE
 
 @pytest.fixture
 def mock_pipeline_deps():
@@ -25,7 +26,10 @@ async def test_pipeline_basic_flow(mock_pipeline_deps):
     
     # Démarrer les boucles en tâche de fond (on ne lance pas tout le pipeline.start() car c'est bloquant)
     # On mocke les méthodes de traitement pour éviter les délais
-    pipeline.vad.is_speech = MagicMock(side_effect=[True]*20 + [False]*20)
+    probs = [0.9]*20 + [0.0]*25
+    pipeline.vad.process_chunk = MagicMock(side_effect=[
+        np.array([(i * 512, p)], dtype=FRAME_DTYPE) for i, p in enumerate(probs)
+    ])
     
     task1 = asyncio.create_task(pipeline.process_audio_loop())
     
@@ -34,7 +38,7 @@ async def test_pipeline_basic_flow(mock_pipeline_deps):
         await pipeline.add_audio_chunk(chunk_speech)
         
     # Envoyer du silence pour déclencher la fin du segment
-    for _ in range(25): # MAX_SILENCE_CHUNKS is 25
+    for _ in range(25): # 25 * 32ms > min_silence_ms (500ms)
         await pipeline.add_audio_chunk(chunk_silence)
         
     # Laisser un peu de temps pour le traitement
@@ -9,6 +9,12 @@ from unittest.mock import Mock, patch, AsyncMock, MagicMock
 from src.core.pipeline_meet import MeetPipeline
 
 
+def make_trace(pipeline):
+    trace = pipeline.metrics.new_trace()
+    trace.mark("endpoint")
+    return trace
+
+
 class TestMeetPipeline:
     """Test suite for MeetPipeline class."""
     
@@ -174,6 +180,15 @@ class TestMeetPipeline:
         # Should keep original mode
         assert pipeline.translation_mode == original_mode
     
+    def test_direct_translation_only_in_fr_en_mode(self, pipeline):
+        """Whisper ne traduit que vers l'anglais : en-fr garde la transcription."""
+        assert pipeline._stt_task() == "transcribe"
+        pipeline.direct_translation = True
+        pipeline.set_translation_mode("fr-en")
+        assert pipeline._stt_task() == "translate"
+        pipeline.set_translation_mode("en-fr")
+        assert pipeline._stt_task() == "transcribe"
+    
     @pytest.mark.asyncio
     async def test_translation_loop_fr_en_mode(self, pipeline):
         """Test translation loop in fr-en mode."""
@@ -192,7 +207,7 @@ class TestMeetPipeline:
         pipeline.tts_queue = asyncio.Queue()
         
         # Add test items to translation queue
-        await pipeline.translation_queue.put(("Bonjour, ceci est un test", "fr", 0.0))
+        await pipeline.translation_queue.put(("Bonjour, ceci est un test", "fr", make_trace(pipeline)))
         
         # Run translation loop as a background task
         loop_task = asyncio.create_task(pipeline.translation_loop())
@@ -236,7 +251,7 @@ class TestMeetPipeline:
         pipeline.tts_queue = asyncio.Queue()
         
         # Add test items to translation queue
-        await pipeline.translation_queue.put(("Hello, this is English", "en", 0.0))
+        await pipeline.translation_queue.put(("Hello, this is English", "en", make_trace(pipeline)))
         
         # Run translation loop as a background task
         loop_task = asyncio.create_task(pipeline.translation_loop())
@@ -284,7 +299,7 @@ class TestMeetPipeline:
         
         # Mock tts_queue
         pipeline.tts_queue = asyncio.Queue()
-        await pipeline.tts_queue.put(("Test text", "en", 0.0))
+        await pipeline.tts_queue.put(("Test text", "en", make_trace(pipeline)))
         
         # Run tts loop as a background task
         loop_task = asyncio.create_task(pipeline.tts_loop())
@@ -325,7 +340,7 @@ class TestMeetPipeline:
         
         # Mock tts_queue
         pipeline.tts_queue = asyncio.Queue()
-        await pipeline.tts_queue.put(("Test text", "en", 0.0))
+        await pipeline.tts_queue.put(("Test text", "en", make_trace(pipeline)))
         
         # Run tts loop as a background task
         loop_task = asyncio.create_task(pipeline.tts_loop())
@@ -372,6 +387,7 @@ class TestMeetPipeline:
         assert status["transcription_queue_size"] == 3
         assert status["translation_queue_size"] == 2
         assert status["tts_queue_size"] == 1
+        assert status["vad_gate"]["frames_skipped"] == 0
 
 
 if __name__ == "__main__":
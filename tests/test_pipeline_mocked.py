@@ -1,8 +1,11 @@
 import pytest
 import asyncio
+import json
+import time
 import numpy as np
 from unittest.mock import MagicMock, patch, AsyncMock
 from src.core.pipeline import AsyncPipeline
+from src.core.vad import FRAME_DTYPE
 
 # Helper pour simuler des objets complexes
 class MockInfo:
@@ -10,6 +13,20 @@ class MockInfo:
         self.language = language
         self.language_probability = language_probability
 
+def make_fake_process_chunk():
+    """Trames de 512 samples : parole si l'amplitude du chunk dépasse 0.1."""
+    position = {"offset": 0}
+
+    def fake_process_chunk(chunk):
+        n_frames = len(chunk) // 512
+        frames = np.empty(n_frames, dtype=FRAME_DTYPE)
+        frames["offset"] = position["offset"] + np.arange(n_frames) * 512
+        frames["prob"] = 0.9 if np.abs(chunk).max() > 0.1 else 0.0
+        position["offset"] += n_frames * 512
+        return frames
+
+    return fake_process_chunk
+
 @pytest.fixture
 def mock_pipeline_components():
     """Mocks all heavy dependencies of the pipeline."""
@@ -23,6 +40,7 @@ def mock_pipeline_components():
         vad_instance = MockVAD.return_value
         # Par défaut, on dit que c'est de la parole
         vad_instance.is_speech.return_value = True
+        vad_instance.process_chunk.side_effect = make_fake_process_chunk()
         
         # Transcriber Setup
         transcriber_instance = MockTranscriber.return_value
@@ -53,11 +71,8 @@ def mock_pipeline_components():
 async def test_full_pipeline_flow_mocked(mock_pipeline_components):
     """Test the full pipeline logic using mocks (CPU friendly)."""
     
-    # Init Pipeline
-    pipeline = AsyncPipeline(model_size="tiny", device="cpu")
-    
-    # Override MAX_SILENCE_CHUNKS to make test faster
-    pipeline.MAX_SILENCE_CHUNKS = 2
+    # Init Pipeline (silence de fin court pour accélérer le test)
+    pipeline = AsyncPipeline(model_size="tiny", device="cpu", min_silence_ms=64)
     
     # Start tasks
     tasks = [
@@ -83,7 +98,7 @@ async def test_full_pipeline_flow_mocked(mock_pipeline_components):
         mock_pipeline_components["vad"].is_speech.return_value = False
         silence_chunk = np.zeros(512, dtype=np.float32)
         
-        # Needs MAX_SILENCE_CHUNKS (2) + 1 to be sure
+        # 64ms de silence = 2 trames de 512 samples, +2 pour être sûr
         for _ in range(4):
             await pipeline.add_audio_chunk(silence_chunk)
             await asyncio.sleep(0.01)
@@ -114,3 +129,439 @@ async def test_full_pipeline_flow_mocked(mock_pipeline_components):
             t.cancel()
         # Wait for cancellation to complete (suppress CancelledError)
         await asyncio.gather(*tasks, return_exceptions=True)
+
+def test_pipeline_onnx_vad_backend(mock_pipeline_components):
+    """Le backend ONNX est sélectionnable depuis le constructeur."""
+    with patch("src.core.pipeline.OnnxVADDetector") as MockOnnxVAD:
+        pipeline = AsyncPipeline(model_size="tiny", device="cpu", vad_backend="onnx")
+        MockOnnxVAD.assert_called_once_with(threshold=0.5, energy_gate=pipeline.energy_gate)
+        assert pipeline.vad is MockOnnxVAD.return_value
+
+def test_pipeline_energy_gate_optional(mock_pipeline_components):
+    pipeline = AsyncPipeline(model_size="tiny", device="cpu")
+    assert pipeline.energy_gate is not None
+
+    pipeline = AsyncPipeline(model_size="tiny", device="cpu", use_energy_gate=False)
+    assert pipeline.energy_gate is None
+
+def test_stage_workers_forwarded_to_models(mock_pipeline_components):
+    """Les workers STT/MT élargis se retrouvent dans les modèles CTranslate2."""
+    with patch("src.core.pipeline.Transcriber") as MockTranscriber, \
+         patch("src.core.pipeline.Translator") as MockTranslator:
+        AsyncPipeline(model_size="tiny", device="cpu", stage_workers={"stt": 2, "mt": 3})
+    assert MockTranscriber.call_args.kwargs["num_workers"] == 2
+    assert MockTranslator.call_args.kwargs["inter_threads"] == 3
+
+def test_pipeline_invalid_vad_backend(mock_pipeline_components):
+    with pytest.raises(ValueError):
+        AsyncPipeline(model_size="tiny", device="cpu", vad_backend="webrtc")
+
+@pytest.mark.asyncio
+async def test_segment_includes_pre_roll_and_excludes_trailing_silence(mock_pipeline_components):
+    """Le segment envoyé au STT commence au pré-roll et s'arrête à la fin de parole."""
+    pipeline = AsyncPipeline(model_size="tiny", device="cpu", min_silence_ms=64)
+    task = asyncio.create_task(pipeline.process_audio_loop())
+
+    try:
+        for _ in range(10):
+            await pipeline.add_audio_chunk(np.zeros(512, dtype=np.float32))
+        for _ in range(4):
+            await pipeline.add_audio_chunk(np.full(512, 0.5, dtype=np.float32))
+        for _ in range(4):
+            await pipeline.add_audio_chunk(np.zeros(512, dtype=np.float32))
+
+        segment, _, is_final = await asyncio.wait_for(pipeline.transcription_queue.get(), timeout=1.0)
+        # La fin de parole est détectée avant le dernier chunk : on attend qu'il soit écrit
+        await asyncio.wait_for(pipeline.audio_queue.join(), timeout=1.0)
+    finally:
+        pipeline.stop()
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+    pre_roll = pipeline.endpointer.pre_roll_samples
+    assert is_final
+    assert len(segment) == pre_roll + 4 * 512
+    assert np.all(segment[:pre_roll] == 0.0)
+    assert np.all(segment[pre_roll:] == 0.5)
+    # Le buffer circulaire a été écrit en place, sans dépasser sa capacité
+    assert pipeline.segment_buffer.write_pos == 18 * 512
+    assert pipeline.segment_buffer.overflowed_samples == 0
+
+@pytest.mark.asyncio
+async def test_streaming_stt_emits_partial_before_segment_end(mock_pipeline_components):
+    """En mode flux, une proposition stable part en traduction avant la fin du segment."""
+    transcriber = mock_pipeline_components["transcriber"]
+    transcriber.transcribe.side_effect = lambda audio, **kw: (
+        "Bonjour à tous, je" if len(audio) < 16000 else "Bonjour à tous, je parle",
+        MockInfo(language="fr"),
+    )
+    pipeline = AsyncPipeline(model_size="tiny", device="cpu", streaming_stt=True, partial_interval_ms=100)
+    tasks = [
+        asyncio.create_task(pipeline.process_audio_loop()),
+        asyncio.create_task(pipeline.transcription_loop()),
+    ]
+
+    try:
+        speech = np.full(1024, 0.5, dtype=np.float32)
+        for _ in range(12):
+            await pipeline.add_audio_chunk(speech)
+            await asyncio.sleep(0.01)
+
+        text, lang, _ = await asyncio.wait_for(pipeline.translation_queue.get(), timeout=1.0)
+        assert text == "Bonjour à tous,"
+        assert lang == "fr"
+        # Le segment n'est pas encore terminé
+        assert pipeline.endpointer.in_segment
+    finally:
+        pipeline.stop()
+        for t in tasks:
+            t.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+@pytest.mark.asyncio
+async def test_segment_trace_recorded_at_first_audio(mock_pipeline_components, tmp_path):
+    """Chaque segment joué produit une trace complète agrégée dans les histogrammes."""
+    tts = mock_pipeline_components["tts"]
+    tts.play.side_effect = lambda samples, sr, on_start=None: on_start(time.monotonic())
+    metrics_path = tmp_path / "metrics.json"
+    pipeline = AsyncPipeline(model_size="tiny", device="cpu", min_silence_ms=64,
+                             metrics_path=str(metrics_path))
+    tasks = [
+        asyncio.create_task(pipeline.process_audio_loop()),
+        asyncio.create_task(pipeline.transcription_loop()),
+        asyncio.create_task(pipeline.translation_loop()),
+        asyncio.create_task(pipeline.tts_loop())
+    ]
+    try:
+        for _ in range(3):
+            await pipeline.add_audio_chunk(np.full(512, 0.5, dtype=np.float32))
+        for _ in range(4):
+            await pipeline.add_audio_chunk(np.zeros(512, dtype=np.float32))
+        for _ in range(20):
+            if pipeline.metrics.segments:
+                break
+            await asyncio.sleep(0.05)
+    finally:
+        pipeline.stop()
+        for t in tasks:
+            t.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    snapshot = pipeline.metrics.snapshot()
+    assert snapshot["segments"] == 1
+    for stage in ("vad", "utterance", "stt", "mt", "tts", "playout", "e2e"):
+        assert snapshot["stages_ms"][stage]["count"] == 1
+    assert set(snapshot["recent_traces"][0]["marks_ms"]) == {
+        "capture", "vad_onset", "endpoint", "stt_start", "stt_end",
+        "mt_start", "mt_end", "tts_start", "tts_end", "first_audio",
+    }
+    assert snapshot["queue_depths"]["audio"]["count"] == 7
+
+    pipeline.metrics.dump_json(pipeline.metrics_path)
+    assert json.loads(metrics_path.read_text())["segments"] == 1
+
+@pytest.mark.asyncio
+async def test_stale_segments_are_shed_and_counted(mock_pipeline_components):
+    """Un segment plus vieux que l'âge max n'est pas traduit et apparaît dans les compteurs."""
+    pipeline = AsyncPipeline(model_size="tiny", device="cpu",
+                             queue_policies={"translation": {"max_age_ms": 100}})
+    stale = pipeline.metrics.new_trace()
+    stale.mark("endpoint", time.monotonic() - 1.0)
+    fresh = pipeline.metrics.new_trace()
+    fresh.mark("endpoint")
+    await pipeline.translation_queue.put(("Vieux", "fr", stale))
+    await pipeline.translation_queue.put(("Récent", "fr", fresh))
+
+    task = asyncio.create_task(pipeline.translation_loop())
+    try:
+        _, _, trace = await asyncio.wait_for(pipeline.tts_queue.get(), timeout=1.0)
+    finally:
+        pipeline.stop()
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+    assert trace is fresh
+    mock_pipeline_components["translator"].translate.assert_called_once()
+    stats = pipeline.get_queue_stats()["translation"]
+    assert stats["dropped_stale"] == 1 and stats["maxsize"] == 16
+    assert stale.recorded
+
+@pytest.mark.asyncio
+async def test_governor_switches_transcriber_tier(mock_pipeline_components):
+    """Un STT plus lent que le temps réel fait basculer sur le palier plus rapide préchargé."""
+    pipeline = AsyncPipeline(model_size="large-v3", device="cpu", model_tiers=["large-v3", "tiny"])
+    pipeline.governor.min_dwell = 1
+    slow = pipeline.transcriber
+    fast = MagicMock()
+    fast.transcribe.return_value = ("Bonjour", MockInfo(language="fr"))
+    pipeline.transcribers["tiny"] = fast
+
+    def slow_transcribe(segment, **kwargs):
+        time.sleep(0.05)  # 50 ms pour 32 ms d'audio : RTF > 1
+        return "Bonjour", MockInfo(language="fr")
+    slow.transcribe.side_effect = slow_transcribe
+
+    trace = pipeline.metrics.new_trace()
+    trace.mark("endpoint")
+    await pipeline.transcription_queue.put((np.zeros(512, dtype=np.float32), trace, True))
+    task = asyncio.create_task(pipeline.transcription_loop())
+    try:
+        await asyncio.wait_for(pipeline.translation_queue.get(), timeout=1.0)
+    finally:
+        pipeline.stop()
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+    assert pipeline.transcriber is fast
+    assert pipeline.governor.get_status()["tier"] == "tiny"
+
+def test_governor_targets_stt_share_of_latency_budget(mock_pipeline_components):
+    pipeline = AsyncPipeline(model_size="tiny", device="cpu", model_tiers=["small", "tiny"],
+                             latency_target_ms=1200, stt_latency_share=0.4)
+    assert pipeline.governor.target_latency == pytest.approx(0.48)
+    with pytest.raises(ValueError):
+        AsyncPipeline(model_size="tiny", device="cpu", model_tiers=["tiny"], stt_latency_share=0)
+
+def test_unknown_queue_policy_rejected(mock_pipeline_components):
+    with pytest.raises(ValueError):
+        AsyncPipeline(model_size="tiny", device="cpu", queue_policies={"vad": {"maxsize": 1}})
+    with pytest.raises(ValueError):
+        AsyncPipeline(model_size="tiny", device="cpu", queue_policies={"tts": {"policy": "lifo"}})
+
+@pytest.mark.asyncio
+async def test_transcription_loop_batches_queued_segments(mock_pipeline_components):
+    """Les segments en attente sont décodés en un seul batch, chacun avec sa trace."""
+    transcriber = mock_pipeline_components["transcriber"]
+    transcriber.transcribe_batch.side_effect = lambda segments, **kwargs: [
+        (f"Phrase {i}", MockInfo(language="fr")) for i in range(len(segments))
+    ]
+    pipeline = AsyncPipeline(model_size="tiny", device="cpu")
+    traces = [pipeline.metrics.new_trace() for _ in range(3)]
+    for trace in traces:
+        await pipeline.transcription_queue.put((np.zeros(512, dtype=np.float32), trace, True))
+
+    task = asyncio.create_task(pipeline.transcription_loop())
+    try:
+        results = [await asyncio.wait_for(pipeline.translation_queue.get(), timeout=1.0) for _ in range(3)]
+    finally:
+        pipeline.stop()
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+    transcriber.transcribe_batch.assert_called_once()
+    assert len(transcriber.transcribe_batch.call_args[0][0]) == 3
+    assert results == [(f"Phrase {i}", "fr", traces[i]) for i in range(3)]
+    # Un seul décodage : mêmes bornes STT pour tout le batch
+    assert len({trace.marks["stt_start"] for trace in traces}) == 1
+    assert all("stt_end" in trace.marks for trace in traces)
+    # Compte rendu du décodage partagé, transmis au batch et rattaché à chaque trace
+    stats = transcriber.transcribe_batch.call_args.kwargs["stats"]
+    assert all(trace.decode == stats.to_dict() for trace in traces)
+
+@pytest.mark.asyncio
+async def test_direct_translation_bypasses_translator(mock_pipeline_components):
+    """Whisper traduit X -> en : le texte part directement en synthèse, MarianMT reste pour en -> fr."""
+    def fake_transcribe(segment, language="fr", task="transcribe", stats=None):
+        # Langue forcée si imposée, sinon « détectée » : l'audio anglais est marqué par un signal non nul
+        detected = language or ("en" if segment.any() else "fr")
+        return ("Good morning" if detected == "en" else "Hello everyone"), MockInfo(language=detected)
+
+    transcriber = mock_pipeline_components["transcriber"]
+    transcriber.transcribe.side_effect = fake_transcribe
+    pipeline = AsyncPipeline(model_size="tiny", device="cpu", direct_translation=True)
+    french, english = pipeline.metrics.new_trace(), pipeline.metrics.new_trace()
+
+    task = asyncio.create_task(pipeline.transcription_loop())
+    try:
+        await pipeline.transcription_queue.put((np.zeros(512, dtype=np.float32), french, True))
+        direct = await asyncio.wait_for(pipeline.tts_queue.get(), timeout=1.0)
+        await pipeline.transcription_queue.put((np.full(512, 0.5, dtype=np.float32), english, True))
+        cascaded = await asyncio.wait_for(pipeline.translation_queue.get(), timeout=1.0)
+    finally:
+        pipeline.stop()
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+    assert direct == ("Hello everyone", "en", french)
+    assert cascaded == ("Good morning", "en", english)
+    assert transcriber.transcribe.call_args.kwargs["task"] == "translate"
+    assert transcriber.transcribe.call_args.kwargs["language"] is None
+    mock_pipeline_components["translator"].translate.assert_not_called()
+
+@pytest.mark.asyncio
+async def test_translation_loop_batches_pending_sentences(mock_pipeline_components):
+    """Les énoncés en attente sont découpés en phrases et traduits en un seul appel."""
+    translator = mock_pipeline_components["translator"]
+    translator.translate_many.side_effect = lambda requests: [f"<{text}>" for text, _, _ in requests]
+    pipeline = AsyncPipeline(model_size="tiny", device="cpu")
+    traces = [pipeline.metrics.new_trace() for _ in range(2)]
+    await pipeline.translation_queue.put(("Bonjour. Ça va ?", "fr", traces[0]))
+    await pipeline.translation_queue.put(("Hello", "en", traces[1]))
+
+    task = asyncio.create_task(pipeline.translation_loop())
+    try:
+        results = [await asyncio.wait_for(pipeline.tts_queue.get(), timeout=1.0) for _ in range(2)]
+    finally:
+        pipeline.stop()
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+    translator.translate_many.assert_called_once_with([
+        ("Bonjour.", "fr", "en"), ("Ça va ?", "fr", "en"), ("Hello", "en", "fr"),
+    ])
+    translator.translate.assert_not_called()
+    assert results == [("<Bonjour.> <Ça va ?>", "en", traces[0]), ("<Hello>", "fr", traces[1])]
+    assert traces[0].marks["mt_end"] == traces[1].marks["mt_end"]
+
+@pytest.mark.asyncio
+async def test_streaming_translation_sends_clauses_to_tts(mock_pipeline_components):
+    """Chaque proposition part en synthèse ; seule la première porte le premier son."""
+    translator = mock_pipeline_components["translator"]
+    translator.translate_stream.side_effect = lambda text, src, tgt, max_clause_tokens: iter(
+        ["Hello everyone,", "thank you for coming."])
+    tts = mock_pipeline_components["tts"]
+    pipeline = AsyncPipeline(model_size="tiny", device="cpu", streaming_mt=True)
+    trace = pipeline.metrics.new_trace()
+    trace.mark("endpoint")
+    await pipeline.translation_queue.put(("Bonjour à tous, merci d'être venus.", "fr", trace))
+
+    tasks = [asyncio.create_task(pipeline.translation_loop()), asyncio.create_task(pipeline.tts_loop())]
+    try:
+        for _ in range(50):
+            if tts.play.call_count == 2:
+                break
+            await asyncio.sleep(0.02)
+    finally:
+        pipeline.stop()
+        for t in tasks:
+            t.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    assert [c.args[0] for c in tts.generate.call_args_list] == ["Hello everyone,", "thank you for coming."]
+    on_starts = [c.kwargs["on_start"] for c in tts.play.call_args_list]
+    assert on_starts[0] is not None and on_starts[1] is None
+    translator.translate_many.assert_not_called()
+    assert trace.marks["mt_end"] <= trace.marks["tts_start"]
+
+@pytest.mark.asyncio
+async def test_streaming_translation_records_trace_at_first_audio_despite_silent_clause(mock_pipeline_components):
+    """Une proposition suivante sans son ne clôt pas la trace avant le premier son du lecteur."""
+    translator = mock_pipeline_components["translator"]
+    translator.translate_stream.side_effect = lambda text, src, tgt, max_clause_tokens: iter(
+        ["Hello everyone,", "..."])
+    tts = mock_pipeline_components["tts"]
+    tts.generate.side_effect = [(np.zeros(100, dtype=np.float32), 24000), (None, None)]
+    started = []
+    # Le lecteur ne signale le premier son qu'après la synthèse des propositions suivantes
+    tts.play.side_effect = lambda samples, sr, on_start=None: started.append(on_start)
+    pipeline = AsyncPipeline(model_size="tiny", device="cpu", streaming_mt=True)
+    trace = pipeline.metrics.new_trace()
+    trace.mark("endpoint")
+    await pipeline.translation_queue.put(("Bonjour à tous...", "fr", trace))
+
+    tasks = [asyncio.create_task(pipeline.translation_loop()), asyncio.create_task(pipeline.tts_loop())]
+    try:
+        await asyncio.wait_for(pipeline.translation_queue.join(), 1.0)
+        await asyncio.wait_for(pipeline.tts_queue.join(), 1.0)
+    finally:
+        pipeline.stop()
+        for t in tasks:
+            t.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    assert tts.generate.call_count == 2
+    assert pipeline.metrics.snapshot()["segments"] == 0
+    started[0](time.monotonic())
+    snapshot = pipeline.metrics.snapshot()
+    assert snapshot["segments"] == 1
+    assert "first_audio" in snapshot["recent_traces"][0]["marks_ms"]
+
+@pytest.mark.asyncio
+async def test_dropped_middle_clause_does_not_record_trace(mock_pipeline_components):
+    """Proposition 2 sur 3 jetée de la file TTS : la trace reste close au premier son de la première."""
+    import threading
+
+    first_generating, release = threading.Event(), threading.Event()
+
+    def clauses(text, src, tgt, max_clause_tokens):
+        yield "One,"
+        first_generating.wait(1.0)  # La proposition 1 est en synthèse avant l'arrivée des suivantes
+        yield "two,"
+        yield "three."
+
+    def generate(text, **kwargs):
+        if text == "One,":
+            first_generating.set()
+            release.wait(1.0)
+        return np.zeros(100, dtype=np.float32), 24000
+
+    mock_pipeline_components["translator"].translate_stream.side_effect = clauses
+    tts = mock_pipeline_components["tts"]
+    tts.generate.side_effect = generate
+    started = []
+    tts.play.side_effect = lambda samples, sr, on_start=None: on_start and started.append(on_start)
+    pipeline = AsyncPipeline(model_size="tiny", device="cpu", streaming_mt=True,
+                             queue_policies={"tts": {"maxsize": 1, "policy": "drop_oldest"}})
+    trace = pipeline.metrics.new_trace()
+    trace.mark("endpoint")
+    await pipeline.translation_queue.put(("Un, deux, trois.", "fr", trace))
+
+    tasks = [asyncio.create_task(pipeline.translation_loop()), asyncio.create_task(pipeline.tts_loop())]
+    try:
+        await asyncio.wait_for(pipeline.translation_queue.join(), 1.0)
+        assert pipeline.get_queue_stats()["tts"]["dropped_oldest"] == 1
+        assert pipeline.metrics.snapshot()["segments"] == 0
+        release.set()
+        await asyncio.wait_for(pipeline.tts_queue.join(), 1.0)
+    finally:
+        release.set()
+        pipeline.stop()
+        for t in tasks:
+            t.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    assert [c.args[0] for c in tts.generate.call_args_list] == ["One,", "three."]
+    assert pipeline.metrics.snapshot()["segments"] == 0
+    started[0](time.monotonic())
+    snapshot = pipeline.metrics.snapshot()
+    assert snapshot["segments"] == 1
+    assert "first_audio" in snapshot["recent_traces"][0]["marks_ms"]
+
+@pytest.mark.asyncio
+async def test_last_dropped_clause_abandons_trace(mock_pipeline_components):
+    """La trace n'est close à la perte d'une proposition que si c'était sa dernière et que le flux est fini."""
+    pipeline = AsyncPipeline(model_size="tiny", device="cpu",
+                             queue_policies={"tts": {"maxsize": 1, "policy": "drop_oldest"}})
+    streaming, finished, last = (pipeline.metrics.new_trace() for _ in range(3))
+    streaming.tts_streaming = True
+    await pipeline._queue_tts("One,", "en", streaming)
+    await pipeline._queue_tts("Done.", "en", finished)  # Jette la proposition de `streaming`
+    await pipeline._queue_tts("Next.", "en", last)  # Jette l'unique proposition de `finished`
+
+    assert not streaming.recorded  # D'autres propositions peuvent encore arriver
+    assert finished.recorded and not last.recorded
+    assert pipeline.metrics.snapshot()["segments"] == 1
+
+@pytest.mark.asyncio
+async def test_blocking_stage_does_not_freeze_event_loop(mock_pipeline_components):
+    """Un décodage lent n'empêche pas la boucle asyncio de traiter l'audio."""
+
+    def slow_transcribe(segment, **kwargs):
+        time.sleep(0.5)
+        return "Bonjour", MockInfo(language="fr")
+
+    mock_pipeline_components["transcriber"].transcribe.side_effect = slow_transcribe
+    pipeline = AsyncPipeline(model_size="tiny", device="cpu")
+    await pipeline.transcription_queue.put((np.zeros(512, dtype=np.float32), pipeline.metrics.new_trace(), True))
+    task = asyncio.create_task(pipeline.transcription_loop())
+
+    try:
+        await asyncio.sleep(0.05)
+        start = asyncio.get_running_loop().time()
+        await asyncio.sleep(0.01)
+        assert asyncio.get_running_loop().time() - start < 0.2
+        await asyncio.wait_for(pipeline.translation_queue.get(), timeout=2.0)
+    finally:
+        pipeline.stop()
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
@@ -22,7 +22,7 @@ async def test_pipeline_integration(mock_pipeline_deps):
     chunk = np.zeros(512, dtype=np.float32)
     
     test_text = "Bonjour le monde"
-    await pipeline.translation_queue.put((test_text, "fr", 0))
+    await pipeline.translation_queue.put((test_text, "fr", pipeline.metrics.new_trace()))
     
     # On attend que la queue de traduction soit traitée ou timeout court
     timeout = 1
@@ -0,0 +1,82 @@
+import numpy as np
+from unittest.mock import patch
+from src.core.playback import AudioPlayer, resample_linear
+
+def run_callback(player, frames):
+    out = np.full((frames, 1), -1.0, dtype=np.float32)
+    player._callback(out, frames, None, None)
+    return out[:, 0]
+
+@patch("src.core.playback.sd.OutputStream")
+def test_play_is_non_blocking_and_opens_stream_once(mock_stream):
+    player = AudioPlayer(sample_rate=24000)
+    player.play(np.ones(100, dtype=np.float32), 24000)
+    player.play(np.ones(100, dtype=np.float32), 24000)
+
+    mock_stream.assert_called_once()
+    mock_stream.return_value.start.assert_called_once()
+    assert player.is_playing
+
+@patch("src.core.playback.sd.OutputStream")
+def test_callback_chains_buffers_without_gap(mock_stream):
+    player = AudioPlayer(sample_rate=24000)
+    player.play(np.full(3, 0.1, dtype=np.float32), 24000)
+    player.play(np.full(4, 0.2, dtype=np.float32), 24000)
+
+    out = run_callback(player, 5)
+    np.testing.assert_allclose(out, [0.1, 0.1, 0.1, 0.2, 0.2])
+    out = run_callback(player, 5)
+    np.testing.assert_allclose(out, [0.2, 0.2, 0.0, 0.0, 0.0])
+    assert not player.is_playing
+    assert player.wait(timeout=0)
+
+@patch("src.core.playback.sd.OutputStream")
+def test_stop_clears_queue_and_closes_stream(mock_stream):
+    player = AudioPlayer()
+    player.play(np.ones(1000, dtype=np.float32), 24000)
+    player.stop()
+
+    mock_stream.return_value.close.assert_called_once()
+    assert player.stream is None
+    assert not player.is_playing
+
+def test_resample_linear():
+    samples = np.linspace(0, 1, 24000, dtype=np.float32)
+    out = resample_linear(samples, 24000, 48000)
+    assert len(out) == 48000
+    assert out.dtype == np.float32
+    assert resample_linear(samples, 24000, 24000) is samples
+
+@patch("src.core.playback.sd.OutputStream")
+def test_on_start_called_when_buffer_starts(mock_stream):
+    player = AudioPlayer(sample_rate=24000)
+    started = []
+    player.play(np.full(3, 0.1, dtype=np.float32), 24000)
+    player.play(np.full(3, 0.2, dtype=np.float32), 24000, on_start=started.append)
+
+    run_callback(player, 2)
+    assert started == []
+    run_callback(player, 2)
+    assert len(started) == 1
+
+@patch("src.core.playback.sd.OutputStream")
+def test_drained_when_callback_consumes_buffer_during_play(mock_stream):
+    """Le callback qui lit le buffer dès sa mise en file ne laisse pas le lecteur « en lecture »."""
+    import threading
+
+    player = AudioPlayer(sample_rate=24000)
+    put = player._queue.put
+    audio_thread = threading.Thread(target=run_callback, args=(player, 10))
+
+    def put_then_play(item):
+        put(item)
+        # Callback audio (autre thread) déclenché entre la mise en file et la fin de play()
+        audio_thread.start()
+        audio_thread.join(timeout=0.1)
+
+    player._queue.put = put_then_play
+    player.play(np.full(3, 0.1, dtype=np.float32), 24000)
+    audio_thread.join(timeout=1.0)
+    assert not audio_thread.is_alive()
+    assert not player.is_playing
+    assert player.wait(timeout=0)
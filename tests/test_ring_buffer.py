@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+from src.core.ring_buffer import AudioRingBuffer
+
+def test_write_and_read_contiguous():
+    rb = AudioRingBuffer(capacity=10)
+    assert rb.write(np.arange(4, dtype=np.float32)) == 0
+    assert rb.write(np.arange(4, 8, dtype=np.float32)) == 4
+    np.testing.assert_array_equal(rb.read(2, 6), [2, 3, 4, 5])
+
+def test_read_view_is_zero_copy():
+    rb = AudioRingBuffer(capacity=10)
+    rb.write(np.ones(5, dtype=np.float32))
+    view = rb.read(0, 5, copy=False)
+    assert np.shares_memory(view, rb._buffer)
+    assert not np.shares_memory(rb.read(0, 5), rb._buffer)
+
+def test_read_across_wraparound():
+    rb = AudioRingBuffer(capacity=8)
+    rb.write(np.arange(6, dtype=np.float32))
+    rb.write(np.arange(6, 12, dtype=np.float32))
+    assert rb.oldest == 4
+    np.testing.assert_array_equal(rb.read(5, 11), [5, 6, 7, 8, 9, 10])
+
+def test_overflow_truncate_counts_lost_samples():
+    rb = AudioRingBuffer(capacity=8)
+    rb.write(np.arange(12, dtype=np.float32))
+    segment = rb.read(0, 12)
+    np.testing.assert_array_equal(segment, np.arange(4, 12))
+    assert rb.overflowed_samples == 4
+
+def test_overflow_raise():
+    rb = AudioRingBuffer(capacity=8, overflow="raise")
+    rb.write(np.arange(12, dtype=np.float32))
+    with pytest.raises(BufferError):
+        rb.read(0, 12)
+
+def test_invalid_configuration():
+    with pytest.raises(ValueError):
+        AudioRingBuffer(capacity=0)
+    with pytest.raises(ValueError):
+        AudioRingBuffer(capacity=8, overflow="grow")
+
+def test_spsc_write_read_wraparound():
+    from src.core.ring_buffer import SpscRingBuffer
+
+    rb = SpscRingBuffer(capacity=5, dtype=np.int16)
+    assert rb.write(np.arange(4, dtype=np.int16)) == 4
+    out = np.zeros(3, dtype=np.int16)
+    assert rb.read_into(out) == 3
+    # 1 sample restant + 4 écrits : traverse la fin du buffer
+    assert rb.write(np.arange(10, 16, dtype=np.int16)) == 4
+    assert rb.fill == 5 and rb.free == 0
+    out = np.zeros(6, dtype=np.int16)
+    assert rb.read_into(out) == 5
+    assert out[:5].tolist() == [3, 10, 11, 12, 13]
+
+def test_spsc_clear():
+    from src.core.ring_buffer import SpscRingBuffer
+
+    rb = SpscRingBuffer(capacity=8)
+    rb.write(np.ones(6, dtype=np.float32))
+    rb.clear()
+    assert rb.fill == 0
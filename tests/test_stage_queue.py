@@ -0,0 +1,66 @@
+import asyncio
+import time
+import pytest
+from src.core.stage_queue import StageQueue
+
+def timestamp(item):
+    return item[1]
+
+@pytest.mark.asyncio
+async def test_block_policy_applies_backpressure():
+    q = StageQueue("stt", maxsize=1)
+    await q.put("a")
+    with pytest.raises(asyncio.TimeoutError):
+        await asyncio.wait_for(q.put("b"), timeout=0.05)
+    assert q.dropped == 0
+
+@pytest.mark.asyncio
+async def test_drop_oldest_keeps_latest_items():
+    dropped = []
+    q = StageQueue("audio", maxsize=2, policy="drop_oldest", on_drop=lambda item, reason: dropped.append((item, reason)))
+    for item in "abc":
+        await q.put(item)
+    assert [q.get_nowait(), q.get_nowait()] == ["b", "c"]
+    assert dropped == [("a", "oldest")]
+    assert q.get_stats()["dropped_oldest"] == 1
+
+@pytest.mark.asyncio
+async def test_drop_stale_skips_old_items_on_get():
+    now = time.monotonic()
+    q = StageQueue("tts", maxsize=4, policy="drop_stale", max_age_s=1.0, timestamp_of=timestamp)
+    await q.put(("old", now - 5))
+    await q.put(("unknown", None))
+    await q.put(("fresh", now))
+    assert (await q.get())[0] == "unknown"
+    assert (await q.get())[0] == "fresh"
+    assert q.dropped_stale == 1
+
+@pytest.mark.asyncio
+async def test_drop_stale_get_waits_when_only_stale_items():
+    q = StageQueue("tts", maxsize=4, policy="drop_stale", max_age_s=1.0, timestamp_of=timestamp)
+    await q.put(("old", time.monotonic() - 5))
+    getter = asyncio.create_task(q.get())
+    await asyncio.sleep(0.02)
+    assert not getter.done()
+    await q.put(("fresh", time.monotonic()))
+    assert (await asyncio.wait_for(getter, timeout=1))[0] == "fresh"
+    with pytest.raises(asyncio.QueueEmpty):
+        q.get_nowait()
+
+@pytest.mark.asyncio
+async def test_drop_stale_makes_room_on_full_queue_and_join_completes():
+    q = StageQueue("mt", maxsize=1, policy="drop_stale", max_age_s=1.0, timestamp_of=timestamp)
+    await q.put(("old", time.monotonic() - 5))
+    await asyncio.wait_for(q.put(("fresh", time.monotonic())), timeout=0.1)
+    assert q.qsize() == 1 and q.dropped_stale == 1
+    q.get_nowait()
+    q.task_done()
+    await asyncio.wait_for(q.join(), timeout=0.1)
+
+def test_invalid_configuration():
+    with pytest.raises(ValueError):
+        StageQueue("x", policy="random")
+    with pytest.raises(ValueError):
+        StageQueue("x", policy="drop_oldest")
+    with pytest.raises(ValueError):
+        StageQueue("x", maxsize=2, policy="drop_stale")
@@ -0,0 +1,49 @@
+import numpy as np
+from unittest.mock import MagicMock
+from src.stt.streaming import LocalAgreement, StreamingTranscriber
+
+class MockInfo:
+    language = "fr"
+
+def test_local_agreement_commits_common_prefix():
+    la = LocalAgreement()
+    assert la.update("Bonjour à".split()) == []
+    assert la.update("Bonjour à tous".split()) == ["Bonjour", "à"]
+    # "tous," et "tous" s'accordent malgré la ponctuation
+    assert la.update("Bonjour à tous, comment".split()) == ["tous,"]
+    assert la.committed == ["Bonjour", "à", "tous,"]
+
+def test_local_agreement_stops_at_divergence():
+    la = LocalAgreement()
+    la.update("il fait beau".split())
+    assert la.update("il fait chaud".split()) == ["il", "fait"]
+    assert la.finish("il fait chaud aujourd'hui".split()) == ["chaud", "aujourd'hui"]
+    assert la.committed == []
+
+def test_streaming_emits_only_at_clause_boundaries():
+    transcriber = MagicMock()
+    hypotheses = [
+        "Bonjour à tous, je",
+        "Bonjour à tous, je voudrais",
+        "Bonjour à tous, je voudrais parler",
+    ]
+    transcriber.transcribe.side_effect = [(h, MockInfo()) for h in hypotheses] + \
+        [("Bonjour à tous, je voudrais parler du projet.", MockInfo())]
+    stream = StreamingTranscriber(transcriber, interval_ms=100)
+    step = stream.interval_samples
+
+    assert stream.feed(np.zeros(step, dtype=np.float32))[0] == ""
+    assert stream.feed(np.zeros(2 * step, dtype=np.float32))[0] == "Bonjour à tous,"
+    assert stream.feed(np.zeros(3 * step, dtype=np.float32))[0] == ""
+
+    text, info = stream.finish(np.zeros(4 * step, dtype=np.float32))
+    assert text == "je voudrais parler du projet."
+    assert info.language == "fr"
+
+def test_streaming_waits_for_interval():
+    transcriber = MagicMock()
+    transcriber.transcribe.return_value = ("Bonjour", MockInfo())
+    stream = StreamingTranscriber(transcriber, interval_ms=500)
+
+    stream.feed(np.zeros(stream.interval_samples - 1, dtype=np.float32))
+    assert not transcriber.transcribe.called
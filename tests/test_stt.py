@@ -35,3 +35,117 @@ def test_transcription_on_file():
     
     assert text != ""
     assert info.language == "fr"
+
+def test_transcribe_batch_maps_results_to_segments():
+    """Chaque texte du batch revient au segment qui l'a produit."""
+    from types import SimpleNamespace
+    from unittest.mock import patch
+
+    with patch("src.stt.transcriber.WhisperModel"), \
+         patch("src.stt.transcriber.BatchedInferencePipeline") as MockBatched:
+        transcriber = Transcriber(model_size="tiny", device="cpu")
+        info = SimpleNamespace(language="fr")
+        # Segments de 1s, 2s et 0.5s : clips à 0s, 1s et 3s ; le 2e produit deux sous-segments
+        MockBatched.return_value.transcribe.return_value = (iter([
+            SimpleNamespace(start=0.0, text=" Bonjour."),
+            SimpleNamespace(start=1.0, text=" Comment"),
+            SimpleNamespace(start=2.2, text=" ça va ?"),
+            SimpleNamespace(start=3.0, text=" Merci."),
+        ]), info)
+
+        audios = [np.zeros(16000, dtype=np.float32), np.zeros(32000, dtype=np.float32),
+                  np.zeros(8000, dtype=np.float32)]
+        results = transcriber.transcribe_batch(audios)
+
+        assert [text for text, _ in results] == ["Bonjour.", "Comment ça va ?", "Merci."]
+        kwargs = MockBatched.return_value.transcribe.call_args.kwargs
+        assert kwargs["batch_size"] == 3
+        assert kwargs["clip_timestamps"][1] == {"start": 1.0, "end": 3.0}
+
+def _whisper_segment(text, avg_logprob=-0.2, compression_ratio=1.2, tokens=3, temperature=0.0):
+    from types import SimpleNamespace
+    return SimpleNamespace(text=text, avg_logprob=avg_logprob, compression_ratio=compression_ratio,
+                           tokens=list(range(tokens)), temperature=temperature)
+
+def test_transcribe_single_call_with_fallback_temperatures():
+    """Un seul appel faster-whisper (encodeur réutilisé) : replis et seuils lui sont confiés."""
+    from types import SimpleNamespace
+    from unittest.mock import patch
+    from src.stt.transcriber import DecodeBudget, DecodeStats
+
+    with patch("src.stt.transcriber.WhisperModel") as MockModel:
+        transcriber = Transcriber(model_size="tiny", device="cpu",
+                                  budget=DecodeBudget(temperatures=(0.0, 0.4), deadline_s=None))
+        MockModel.return_value.transcribe.return_value = (
+            iter([_whisper_segment(" Merci.", temperature=0.4)]), SimpleNamespace(language="fr"))
+        stats = DecodeStats()
+        text, _ = transcriber.transcribe(np.zeros(32000, dtype=np.float32), stats=stats)
+
+    MockModel.return_value.transcribe.assert_called_once()
+    kwargs = MockModel.return_value.transcribe.call_args.kwargs
+    assert kwargs["temperature"] == [0.0, 0.4]
+    assert kwargs["compression_ratio_threshold"] == 2.4 and kwargs["log_prob_threshold"] == -1.0
+    assert kwargs["max_new_tokens"] == 16 + 24
+    assert text == "Merci."
+    assert stats.to_dict() == {"attempts": 2, "fallbacks": 1, "timed_out": False,
+                               "max_new_tokens": 40, "temperature": 0.4}
+
+def test_deadline_caps_tokens_from_measured_decode_rate():
+    """Le débit mesuré convertit l'échéance en plafond de jetons pour toutes les passes d'une fenêtre."""
+    from types import SimpleNamespace
+    from unittest.mock import patch
+    from src.stt.transcriber import DecodeBudget
+
+    clock = iter([0.0, 1.0, 2.0, 10.0, 10.5, 11.0])
+    with patch("src.stt.transcriber.WhisperModel") as MockModel, \
+         patch("src.stt.transcriber.time.perf_counter", side_effect=lambda: next(clock)):
+        transcriber = Transcriber(model_size="tiny", device="cpu",
+                                  budget=DecodeBudget(deadline_s=2.0, min_new_tokens=4, temperatures=(0.0, 0.4)))
+        model = MockModel.return_value
+        model.transcribe.side_effect = lambda audio, **kwargs: (
+            iter([_whisper_segment(" Bonjour.", tokens=20)]), SimpleNamespace(language="fr"))
+        audio = np.zeros(32000, dtype=np.float32)
+        transcriber.transcribe(audio)  # 20 jetons en 2 s : 10 jetons/s
+        transcriber.transcribe(audio)
+
+    caps = [c.kwargs["max_new_tokens"] for c in model.transcribe.call_args_list]
+    # Sans mesure : 4 + 12 * 2 ; ensuite 2 s * 10 jetons/s répartis sur 2 passes
+    assert caps == [28, 10]
+    assert transcriber.decode_rate == pytest.approx(10.0, rel=0.5)
+
+def test_transcribe_deadline_stops_later_windows():
+    """Passé l'échéance, la fenêtre suivante n'est pas décodée : le texte obtenu est retourné."""
+    from types import SimpleNamespace
+    from unittest.mock import patch
+    from src.stt.transcriber import DecodeBudget, DecodeStats
+
+    with patch("src.stt.transcriber.WhisperModel") as MockModel, \
+         patch("src.stt.transcriber.time.perf_counter", side_effect=[0.0, 5.0, 5.0]):
+        transcriber = Transcriber(model_size="tiny", device="cpu", budget=DecodeBudget(deadline_s=1.0))
+        MockModel.return_value.transcribe.return_value = (iter([
+            _whisper_segment(" Bonjour."),
+            _whisper_segment(" jamais décodé"),
+        ]), SimpleNamespace(language="fr"))
+        stats = DecodeStats()
+        text, _ = transcriber.transcribe(np.zeros(16000 * 40, dtype=np.float32), stats=stats)
+
+    assert text == "Bonjour."
+    assert stats.timed_out and stats.attempts == 1
+    MockModel.return_value.transcribe.assert_called_once()
+
+def test_transcribe_batch_applies_token_cap():
+    from types import SimpleNamespace
+    from unittest.mock import patch
+    from src.stt.transcriber import DecodeBudget
+
+    with patch("src.stt.transcriber.WhisperModel"), \
+         patch("src.stt.transcriber.BatchedInferencePipeline") as MockBatched:
+        transcriber = Transcriber(model_size="tiny", device="cpu",
+                                  budget=DecodeBudget(deadline_s=1.0, min_new_tokens=4, temperatures=(0.0,)))
+        transcriber.decode_rate = 10.0
+        MockBatched.return_value.transcribe.return_value = (iter([]), SimpleNamespace(language="fr"))
+        transcriber.transcribe_batch([np.zeros(32000, dtype=np.float32)] * 2)
+
+    kwargs = MockBatched.return_value.transcribe.call_args.kwargs
+    assert kwargs["max_new_tokens"] == 10
+    assert kwargs["temperature"] == 0.0
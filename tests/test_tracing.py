@@ -0,0 +1,68 @@
+import asyncio
+import json
+import threading
+import pytest
+from src.core.tracing import Tracer, TracedQueue, tracer
+from src.core.executors import StageExecutors
+
+@pytest.fixture
+def global_tracer():
+    tracer.clear()
+    tracer.enable()
+    yield tracer
+    tracer.disable()
+    tracer.clear()
+
+def test_disabled_tracer_records_nothing():
+    t = Tracer()
+    with t.span("stt"):
+        pass
+    t.instant("underrun")
+    t.counter("queue", depth=1)
+    assert len(t.events) == 0
+
+def test_ring_buffer_keeps_latest_events():
+    t = Tracer(capacity=3)
+    t.enable()
+    for i in range(5):
+        t.instant(f"e{i}")
+    assert [e["name"] for e in t.events] == ["e2", "e3", "e4"]
+
+def test_threads_get_separate_tracks(tmp_path):
+    t = Tracer()
+    t.enable()
+    with t.span("main"):
+        pass
+    worker = threading.Thread(target=lambda: t.span("worker").__enter__().__exit__(None, None, None), name="vox-tts")
+    worker.start()
+    worker.join()
+
+    path = tmp_path / "trace.json"
+    t.dump(str(path))
+    events = json.loads(path.read_text())["traceEvents"]
+    spans = {e["name"]: e for e in events if e["ph"] == "X"}
+    assert spans["main"]["tid"] != spans["worker"]["tid"]
+    names = {e["args"]["name"] for e in events if e["ph"] == "M"}
+    assert "vox-tts" in names
+    assert spans["main"]["dur"] >= 0
+
+@pytest.mark.asyncio
+async def test_queue_and_stage_spans(global_tracer):
+    queue = TracedQueue("stt")
+    executors = StageExecutors()
+
+    async def consumer():
+        item = await queue.get()
+        return await executors.run("stt", lambda x: x * 2, item)
+
+    task = asyncio.create_task(consumer(), name="transcription_loop")
+    await queue.put(21)
+    assert await task == 42
+    executors.shutdown()
+
+    spans = [e for e in global_tracer.events if e["ph"] == "X"]
+    by_name = {e["name"]: e for e in spans}
+    assert {"stt.get", "stt.put", "stt"} <= set(by_name)
+    # La coroutine et le worker du pool sont sur des pistes distinctes
+    assert by_name["stt.get"]["tid"] != by_name["stt"]["tid"]
+    assert any(e["ph"] == "C" and e["name"] == "stt_queue" for e in global_tracer.events)
@@ -0,0 +1,64 @@
+import pytest
+from src.core.translation_cache import TranslationCache, normalize_text
+
+def test_normalized_lookup_and_lru_eviction():
+    cache = TranslationCache(capacity=2)
+    cache.put("Merci  beaucoup ", "fr", "en", "Thank you very much")
+    assert cache.get("Merci beaucoup", "fr", "en") == "Thank you very much"
+    assert cache.get("Merci beaucoup", "en", "fr") is None
+
+    cache.put("Bonjour", "fr", "en", "Hello")
+    cache.get("Merci beaucoup", "fr", "en")  # Devient la plus récente
+    cache.put("Diapo suivante", "fr", "en", "Next slide")
+    assert cache.get("Bonjour", "fr", "en") is None
+
+    stats = cache.get_stats()
+    assert stats["memory_hits"] == 2
+    assert stats["misses"] == 2
+    assert stats["memory_entries"] == 2
+    assert stats["disk_entries"] is None
+
+def test_normalize_text_keeps_case():
+    assert normalize_text(" Çá  va ?\n") == normalize_text("Çá va ?")
+    assert normalize_text("Merci") != normalize_text("merci")
+
+def test_disk_tier_survives_restart(tmp_path):
+    path = str(tmp_path / "cache" / "mt.sqlite")
+    cache = TranslationCache(db_path=path)
+    cache.set_model("fr", "en", "opus-mt:1")
+    cache.put("Vous m'entendez ?", "fr", "en", "Can you hear me?")
+    cache.close()
+
+    cache = TranslationCache(db_path=path)
+    cache.set_model("fr", "en", "opus-mt:1")
+    assert cache.get("Vous m'entendez ?", "fr", "en") == "Can you hear me?"
+    assert cache.get("Vous m'entendez ?", "fr", "en") == "Can you hear me?"
+    stats = cache.get_stats()
+    assert (stats["disk_hits"], stats["memory_hits"]) == (1, 1)
+
+def test_model_change_invalidates_pair(tmp_path):
+    path = str(tmp_path / "mt.sqlite")
+    cache = TranslationCache(db_path=path)
+    cache.set_model("fr", "en", "v1")
+    cache.set_model("en", "fr", "v1")
+    cache.put("Merci", "fr", "en", "Thanks")
+    cache.put("Thanks", "en", "fr", "Merci")
+    cache.close()
+
+    cache = TranslationCache(db_path=path)
+    cache.set_model("fr", "en", "v2")
+    cache.set_model("en", "fr", "v1")
+    assert cache.get("Merci", "fr", "en") is None
+    assert cache.get("Thanks", "en", "fr") == "Merci"
+
+def test_disk_size_limit(tmp_path):
+    cache = TranslationCache(capacity=1, db_path=str(tmp_path / "mt.sqlite"), max_disk_entries=2)
+    for i in range(4):
+        cache.put(f"phrase {i}", "fr", "en", f"sentence {i}")
+    assert cache.get_stats()["disk_entries"] == 2
+    assert cache.get("phrase 0", "fr", "en") is None
+    assert cache.get("phrase 2", "fr", "en") == "sentence 2"
+
+def test_invalid_capacity():
+    with pytest.raises(ValueError):
+        TranslationCache(capacity=0)
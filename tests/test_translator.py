@@ -17,3 +17,106 @@ def test_translation_en_to_fr(translator):
     text = "Hello, how are you?"
     translation = translator.translate(text, source_lang="en", target_lang="fr")
     assert "bonjour" in translation.lower() or "comment allez-vous" in translation.lower()
+
+def test_split_sentences():
+    from src.core.translator import split_sentences
+    assert split_sentences("Bonjour à tous. Ça va ? Oui !") == ["Bonjour à tous.", "Ça va ?", "Oui !"]
+    assert split_sentences("  ") == []
+
+@pytest.fixture
+def mocked_marian():
+    """CTranslate2 et tokenizer factices : un jeton par mot, la « traduction » met en majuscules."""
+    from types import SimpleNamespace
+    from unittest.mock import MagicMock, patch
+
+    with patch("src.core.translator.ctranslate2") as mock_ct2, \
+         patch("src.core.translator.load_tokenizer") as mock_load_tokenizer, \
+         patch("src.core.translator.os.path.exists", return_value=True):
+        tokenizer = MagicMock()
+        tokenizer.tokenize.side_effect = lambda text: text.split()
+        tokenizer.detokenize.side_effect = lambda tokens: " ".join(token.lstrip("\u2581") for token in tokens).upper()
+        mock_load_tokenizer.return_value = tokenizer
+        model = mock_ct2.Translator.return_value
+        model.translate_batch.side_effect = lambda tokens: [SimpleNamespace(hypotheses=[t]) for t in tokens]
+        yield model
+
+def test_translate_many_groups_by_pair_and_length(mocked_marian):
+    """Un appel CT2 par paire de langues, phrases triées par longueur, ordre des requêtes conservé."""
+    translator = Translator(device="cpu")
+    results = translator.translate_many([
+        ("un deux trois", "fr", "en"),
+        ("hello", "en", "fr"),
+        ("", "fr", "en"),
+        ("quatre", "fr", "en"),
+    ])
+
+    assert results == ["UN DEUX TROIS", "HELLO", "", "QUATRE"]
+    batches = [call.args[0] for call in mocked_marian.translate_batch.call_args_list]
+    assert batches == [[["quatre"], ["un", "deux", "trois"]], [["hello"]]]
+
+def test_translate_many_serves_repeated_phrases_from_cache(mocked_marian):
+    from src.core.translation_cache import TranslationCache
+
+    translator = Translator(device="cpu", cache=TranslationCache())
+    assert translator.translate("Merci", "fr", "en") == "MERCI"
+    assert translator.translate_many([("Merci", "fr", "en"), ("Suivant", "fr", "en")]) == ["MERCI", "SUIVANT"]
+
+    batches = [call.args[0] for call in mocked_marian.translate_batch.call_args_list]
+    assert batches == [[["Merci"]], [["Suivant"]]]
+    assert translator.cache.get_stats()["memory_hits"] == 1
+
+@pytest.mark.parametrize("thread_safe", [True, False])
+def test_lock_only_guards_hf_tokenizer(mocked_marian, thread_safe):
+    """SentencePiece tokenise hors verrou ; seul le repli HF (non thread-safe) est sérialisé."""
+    from unittest.mock import MagicMock
+
+    translator = Translator(device="cpu")
+    translator.translate("un deux", "fr", "en")  # Chargement du modèle
+    translator.tokenizers[("fr", "en")].thread_safe = thread_safe
+    translator._lock = MagicMock()
+    assert translator.translate("trois quatre", "fr", "en") == "TROIS QUATRE"
+    assert translator._lock.__enter__.called is not thread_safe
+
+def test_translate_stream_yields_clauses(mocked_marian):
+    """Coupure après une ponctuation, ou au début de mot suivant la limite de jetons."""
+    from types import SimpleNamespace
+    from src.core.translation_cache import TranslationCache
+
+    tokens = ["\u2581hello", ",", "\u2581this", "\u2581is", "\u2581a", "\u2581long", "er", "\u2581test", "."]
+    mocked_marian.generate_tokens.side_effect = lambda source: iter(SimpleNamespace(token=t) for t in tokens)
+    translator = Translator(device="cpu", cache=TranslationCache())
+    text = "bonjour, ceci est un test plus long."
+
+    clauses = list(translator.translate_stream(text, "fr", "en", max_clause_tokens=3))
+
+    assert clauses == ["HELLO ,", "THIS IS A", "LONG ER TEST ."]
+    # La sortie gloutonne n'occupe pas l'entrée de cache du faisceau
+    assert translator.cache.get(text, "fr", "en") is None
+    beam = translator.translate(text, "fr", "en")
+    assert list(translator.translate_stream(text, "fr", "en")) == [beam]
+    mocked_marian.generate_tokens.assert_called_once()
+
+def test_loads_variant_recorded_in_manifest(tmp_path):
+    from unittest.mock import patch
+    from src.core.mt_models import write_manifest
+
+    (tmp_path / "opus_fr_en_int8").mkdir()
+    write_manifest(str(tmp_path), {"models": {"fr-en": {
+        "path": "opus_fr_en_int8", "compute_type": "int8", "intra_threads": 4}}})
+
+    with patch("src.core.translator.ctranslate2") as mock_ct2, \
+         patch("src.core.translator.load_tokenizer"), \
+         patch("src.core.translator.os.cpu_count", return_value=8):
+        Translator(device="cpu", model_dir=str(tmp_path), inter_threads=4)._load_model("fr", "en")
+
+    mock_ct2.Translator.assert_called_once_with(str(tmp_path / "opus_fr_en_int8"), device="cpu",
+                                                compute_type="int8", inter_threads=4, intra_threads=2)
+
+def test_missing_model_is_not_converted_on_first_use(tmp_path):
+    from unittest.mock import patch
+
+    with patch("src.core.translator.ctranslate2") as mock_ct2:
+        translator = Translator(device="cpu", model_dir=str(tmp_path))
+        with pytest.raises(FileNotFoundError, match="src.core.mt_models"):
+            translator.translate("Bonjour", "fr", "en")
+    mock_ct2.converters.TransformersConverter.assert_not_called()
@@ -57,3 +57,133 @@ def test_vad_on_existing_file():
         # On ne peut pas l'affirmer à 100% sans connaître le contenu du WAV,
         # mais on valide au moins que le code tourne sans erreur.
         print(f"Speech detected in {test_file}: {speech_detected}")
+
+@pytest.fixture
+def mocked_vad():
+    """VADDetector avec un modèle Silero simulé (pas de torch.hub)."""
+    import torch
+    from unittest.mock import MagicMock, patch
+
+    model = MagicMock()
+    # Probabilité = amplitude max de la trame (0 pour le silence)
+    model.side_effect = lambda x, sr: torch.tensor([[float(x.abs().max())]])
+    with patch("src.core.vad.torch.hub.load", return_value=(model, None)):
+        yield VADDetector()
+
+def test_process_chunk_carries_leftover(mocked_vad):
+    # 1000 samples : une trame complète, 488 samples conservés
+    frames = mocked_vad.process_chunk(np.zeros(1000, dtype=np.float32))
+    assert len(frames) == 1
+    assert frames["offset"].tolist() == [0]
+
+    # 488 + 536 = 1024 : deux trames, aucun padding
+    frames = mocked_vad.process_chunk(np.full(536, 0.9, dtype=np.float32))
+    assert frames["offset"].tolist() == [512, 1024]
+    assert frames["prob"].tolist() == pytest.approx([0.9, 0.9])
+    assert mocked_vad.model.call_count == 3
+
+def test_process_chunk_short_input_returns_empty(mocked_vad):
+    frames = mocked_vad.process_chunk(np.zeros(100, dtype=np.float32))
+    assert frames.size == 0
+    assert not mocked_vad.model.called
+
+def test_is_speech_uses_frame_probs(mocked_vad):
+    assert not mocked_vad.is_speech(np.zeros(4096, dtype=np.float32))
+    assert mocked_vad.is_speech(np.full(4096, 0.8, dtype=np.float32))
+
+def test_reset_clears_stream(mocked_vad):
+    mocked_vad.process_chunk(np.zeros(700, dtype=np.float32))
+    mocked_vad.reset()
+    frames = mocked_vad.process_chunk(np.zeros(512, dtype=np.float32))
+    assert frames["offset"].tolist() == [0]
+
+def test_onnx_vad_missing_model_raises(tmp_path):
+    from unittest.mock import patch
+    from src.core.vad import OnnxVADDetector
+
+    with patch("src.core.vad.importlib.util.find_spec", return_value=None):
+        with pytest.raises(FileNotFoundError):
+            OnnxVADDetector(model_path=str(tmp_path / "absent.onnx"))
+
+def test_prepare_onnx_model_copies_bundled_file(tmp_path):
+    from unittest.mock import patch
+    from src.core.vad import prepare_onnx_model
+
+    bundled = tmp_path / "bundled.onnx"
+    bundled.write_bytes(b"onnx")
+    target = tmp_path / "models" / "vad" / "silero_vad.onnx"
+    with patch("src.core.vad.bundled_onnx_model", return_value=str(bundled)), \
+         patch("src.core.vad.urllib.request.urlretrieve") as download:
+        assert prepare_onnx_model(str(target)) == str(target)
+        assert target.read_bytes() == b"onnx"
+        # Déjà en place : aucune copie ni téléchargement
+        bundled.write_bytes(b"v2")
+        prepare_onnx_model(str(target))
+    assert target.read_bytes() == b"onnx"
+    download.assert_not_called()
+
+def test_prepare_onnx_model_downloads_without_package(tmp_path):
+    from unittest.mock import patch
+    from src.core.vad import prepare_onnx_model, SILERO_ONNX_URL
+
+    target = tmp_path / "silero_vad.onnx"
+    with patch("src.core.vad.bundled_onnx_model", return_value=None), \
+         patch("src.core.vad.urllib.request.urlretrieve",
+               side_effect=lambda url, path: open(path, "wb").write(b"onnx")) as download:
+        prepare_onnx_model(str(target))
+    assert download.call_args.args[0] == SILERO_ONNX_URL
+    assert target.read_bytes() == b"onnx"
+
+def test_onnx_vad_silence():
+    from src.core.vad import OnnxVADDetector
+
+    try:
+        vad = OnnxVADDetector()
+    except FileNotFoundError:
+        pytest.skip("Modèle Silero ONNX non disponible")
+
+    frames = vad.process_chunk(np.zeros(4096, dtype=np.float32))
+    assert len(frames) == 8
+    assert not np.any(frames["prob"] > vad.threshold)
+
+def test_energy_gate_skips_noise_floor(mocked_vad):
+    from src.core.energy_gate import EnergyGate
+
+    rng = np.random.default_rng(0)
+    mocked_vad.energy_gate = EnergyGate()
+    noise = rng.normal(0, 0.001, 16000).astype(np.float32)
+    frames = mocked_vad.process_chunk(noise)
+
+    assert mocked_vad.energy_gate.frames_skipped > 0
+    assert mocked_vad.model.call_count == len(frames) - mocked_vad.energy_gate.frames_skipped
+    assert np.all(frames["prob"] <= 0.01)
+
+def test_energy_gate_passes_loud_frames(mocked_vad):
+    from src.core.energy_gate import EnergyGate
+
+    rng = np.random.default_rng(0)
+    mocked_vad.energy_gate = EnergyGate()
+    mocked_vad.process_chunk(rng.normal(0, 0.001, 8192).astype(np.float32))
+
+    t = np.arange(4096) / 16000
+    voice = (0.3 * np.sin(2 * np.pi * 200 * t)).astype(np.float32)
+    frames = mocked_vad.process_chunk(voice)
+    assert np.all(frames["prob"] > 0.2)
+
+def test_energy_gate_gap_resets_model_state(mocked_vad):
+    """Après des trames écartées, l'inférence repart d'un état RNN neuf."""
+    from src.core.energy_gate import EnergyGate
+
+    mocked_vad.energy_gate = EnergyGate()
+    t = np.arange(2048) / 16000
+    voice = (0.3 * np.sin(2 * np.pi * 200 * t)).astype(np.float32)
+    silence = np.zeros(2048, dtype=np.float32)
+
+    mocked_vad.process_chunk(voice)
+    assert mocked_vad.model.reset_states.call_count == 0
+    # Écart dans le même chunk (silence -> voix) puis à cheval sur deux chunks
+    mocked_vad.process_chunk(np.concatenate((silence, voice)))
+    assert mocked_vad.model.reset_states.call_count == 1
+    mocked_vad.process_chunk(silence)
+    mocked_vad.process_chunk(voice)
+    assert mocked_vad.model.reset_states.call_count == 2
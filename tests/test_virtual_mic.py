@@ -1,8 +1,7 @@
 """
-Tests for the VirtualMicrophone class using pulsectl and pactl.
+Tests for the VirtualMicrophone class using pulsectl.
 """
 import pytest
-import subprocess
 from unittest.mock import Mock, patch, MagicMock
 import numpy as np
 import threading
@@ -28,53 +27,73 @@ class TestVirtualMicrophone:
         assert not vmic.stop_playback.is_set()
     
     @patch('pulsectl.Pulse')
-    @patch('sounddevice._terminate')
-    @patch('sounddevice._initialize')
-    def test_create_virtual_sink_success(self, mock_sd_init, mock_sd_term, mock_pulse_class):
+    def test_create_virtual_sink_success(self, mock_pulse_class):
         """Test successful creation of virtual sink with pulsectl."""
         # Setup mock Pulse client
         mock_pulse = mock_pulse_class.return_value.__enter__.return_value
         mock_pulse.module_load.side_effect = [101, 102]
-        
-        # Mock sink and source lists for volume setting
-        mock_sink = Mock()
-        mock_sink.name = "test-mic-output"
-        mock_sink.index = 1
-        mock_pulse.sink_list.return_value = [mock_sink]
-        
-        mock_source = Mock()
-        mock_source.name = "test-mic"
-        mock_source.index = 2
-        mock_pulse.source_list.return_value = [mock_source]
+        mock_pulse.module_list.return_value = []
         
         vmic = VirtualMicrophone("test-mic")
-        with patch.object(vmic, 'destroy_virtual_sink'):
-            result = vmic.create_virtual_sink()
+        result = vmic.create_virtual_sink()
         
         assert result is True
         assert vmic.is_created is True
+        assert vmic._module_indices == [101, 102]
         
         # Verify pulsectl calls
         assert mock_pulse.module_load.call_count >= 2
+        mock_pulse.get_sink_by_name.assert_called_with("test-mic-output")
+        mock_pulse.get_source_by_name.assert_called_with("test-mic")
+        # Sink et source déjà présents : aucune attente
+        mock_pulse.event_listen.assert_not_called()
+
+    @patch('pulsectl.Pulse')
+    def test_create_virtual_sink_waits_for_sink_event(self, mock_pulse_class):
+        """Le sink absent au premier essai est attendu via event_listen, sans sleep fixe."""
+        import pulsectl
+        mock_pulse = mock_pulse_class.return_value.__enter__.return_value
+        mock_pulse.module_load.side_effect = [101, 102]
+        mock_pulse.module_list.return_value = []
+        sink = Mock(index=5)
+        mock_pulse.get_sink_by_name.side_effect = [pulsectl.PulseIndexError(), sink]
+
+        vmic = VirtualMicrophone("test-mic")
+        assert vmic.create_virtual_sink() is True
+        mock_pulse.event_listen.assert_called_once()
+        mock_pulse.sink_mute.assert_called_once_with(5, mute=False)
 
     @patch('pulsectl.Pulse')
-    @patch('src.core.virtual_mic.subprocess.run')
-    def test_destroy_virtual_sink_success(self, mock_run, mock_pulse_class):
-        """Test successful destruction of virtual sink (Aggressive cleaning)."""
+    def test_create_virtual_sink_timeout(self, mock_pulse_class):
+        """Un sink qui n'apparaît jamais fait échouer la création après le délai."""
+        import pulsectl
+        mock_pulse = mock_pulse_class.return_value.__enter__.return_value
+        mock_pulse.module_list.return_value = []
+        mock_pulse.get_sink_by_name.side_effect = pulsectl.PulseIndexError()
+
+        vmic = VirtualMicrophone("test-mic")
+        vmic.READY_TIMEOUT_S = 0.05
+        assert vmic.create_virtual_sink() is False
+        assert not vmic.is_created
+
+    @patch('pulsectl.Pulse')
+    def test_destroy_virtual_sink_success(self, mock_pulse_class):
+        """Seuls les modules enregistrés sont déchargés, en ordre inverse."""
+        import pulsectl
+        mock_pulse = mock_pulse_class.return_value.__enter__.return_value
+        mock_pulse.get_sink_by_name.side_effect = pulsectl.PulseIndexError()
+        mock_pulse.get_source_by_name.side_effect = pulsectl.PulseIndexError()
+
         vmic = VirtualMicrophone("test-mic")
         vmic.is_created = True
-        
-        # Mock pactl list modules short
-        mock_result = Mock()
-        mock_result.returncode = 0
-        mock_result.stdout = "42  module-null-sink  sink_name=vox-test\n99  module-remap-source  source_name=vox-mic"
-        mock_run.side_effect = [mock_result, Mock(), Mock()] # list, unload 42, unload 99
+        vmic._module_indices = [42, 99]
         
         result = vmic.destroy_virtual_sink()
         
         assert result is True
         assert not vmic.is_created
-        assert mock_run.call_count >= 1
+        assert [c.args[0] for c in mock_pulse.module_unload.call_args_list] == [99, 42]
+        assert vmic._module_indices == []
 
     @patch('sounddevice.query_devices')
     def test_find_sounddevice_device_id_found(self, mock_query_devices):
@@ -100,25 +119,91 @@ class TestVirtualMicrophone:
         assert "test-mic" in instructions
         assert "Google Meet" in instructions
 
-    @patch('src.core.virtual_mic.subprocess.run')
     @patch('os.getpid')
-    def test_force_redirect_stream(self, mock_getpid, mock_run):
-        """Test the brute force redirection logic."""
+    def test_route_sink_input_moves_only_our_stream(self, mock_getpid):
+        """Seul notre sink-input, s'il n'est pas déjà sur le sink virtuel, est déplacé."""
         mock_getpid.return_value = 1234
         vmic = VirtualMicrophone("test-mic")
-        
-        # Mock pactl list sink-inputs
-        mock_list = Mock()
-        mock_list.returncode = 0
-        mock_list.stdout = """Entrée de la destination #500
-        application.process.id = "1234"
-        """
-        mock_run.side_effect = [mock_list, Mock()] # list, then move
-        
-        vmic._force_redirect_stream()
-        
-        # Verify move-sink-input was called with ID 500
-        move_call = mock_run.call_args_list[1]
-        assert "move-sink-input" in move_call[0][0]
-        assert "500" in move_call[0][0]
-        assert vmic.output_sink_name in move_call[0][0]
+        vmic._sink_index = 7
+        pulse = Mock()
+
+        other = Mock(index=400, sink=0, proplist={"application.process.id": "999"})
+        vmic._route_sink_input(pulse, other)
+        pulse.sink_input_move.assert_not_called()
+
+        ours = Mock(index=500, sink=0, proplist={"application.process.id": "1234"})
+        vmic._route_sink_input(pulse, ours)
+        pulse.sink_input_move.assert_called_once_with(500, 7)
+        assert vmic._stream_index == 500
+
+        # Déjà sur le bon sink (événement 'change' suite au déplacement) : rien à faire
+        ours.sink = 7
+        vmic._route_sink_input(pulse, ours)
+        pulse.sink_input_move.assert_called_once()
+
+    @patch('os.getpid')
+    def test_pulse_events_trigger_routing(self, mock_getpid):
+        """Les événements sont mis en attente puis traités hors du callback."""
+        import pulsectl
+        mock_getpid.return_value = 1234
+        vmic = VirtualMicrophone("test-mic")
+        vmic._sink_index = 7
+        pulse = Mock()
+        pulse.sink_input_info.return_value = Mock(index=500, sink=0, proplist={"application.process.id": "1234"})
+
+        with pytest.raises(pulsectl.PulseLoopStop):
+            vmic._on_pulse_event(Mock(t="new", index=500))
+        vmic._process_pending_events(pulse)
+        pulse.sink_input_move.assert_called_once_with(500, 7)
+
+        with pytest.raises(pulsectl.PulseLoopStop):
+            vmic._on_pulse_event(Mock(t="remove", index=500))
+        vmic._process_pending_events(pulse)
+        assert vmic._stream_index is None
+
+    @patch('src.core.virtual_mic.sd.OutputStream')
+    @patch.object(VirtualMicrophone, 'start_stream_routing')
+    @patch.object(VirtualMicrophone, '_find_sounddevice_device_id', return_value=3)
+    def test_persistent_output_stream(self, mock_find, mock_redirect, mock_stream):
+        """Un seul OutputStream 48kHz s16le est ouvert pour tous les énoncés."""
+        vmic = VirtualMicrophone("test-mic")
+        vmic.is_created = True
+        vmic.start_playback()
+        try:
+            for _ in range(3):
+                vmic.play_audio(np.full(2400, 0.5, dtype=np.float32), 24000)
+            for _ in range(50):
+                if vmic.audio_queue.empty() and not vmic._feeding:
+                    break
+                threading.Event().wait(0.02)
+        finally:
+            vmic.stop_playback_thread()
+
+        mock_stream.assert_called_once()
+        kwargs = mock_stream.call_args.kwargs
+        assert kwargs["samplerate"] == 48000
+        assert kwargs["dtype"] == "int16"
+        assert kwargs["device"] == 3
+        mock_stream.return_value.close.assert_called_once()
+
+    def test_stream_callback_reads_ring_and_pads_silence(self):
+        """Le callback lit le buffer circulaire et complète par du silence."""
+        vmic = VirtualMicrophone("test-mic")
+        vmic.ring_buffer.write(np.array([100, 200, 300], dtype=np.int16))
+        assert vmic.get_buffer_fill() > 0
+
+        out = np.full((5, 1), -1, dtype=np.int16)
+        vmic._stream_callback(out, 5, None, None)
+        assert out[:, 0].tolist() == [100, 200, 300, 0, 0]
+        assert vmic.get_playback_stats()["buffered_ms"] == 0
+        # File vide et rien en cours d'envoi : silence normal, pas de sous-alimentation
+        assert vmic.underruns == 0
+
+        vmic._feeding = True
+        vmic._stream_callback(out, 5, None, None)
+        assert vmic.underruns == 1
+
+    def test_to_int16_clips(self):
+        pcm = VirtualMicrophone._to_int16(np.array([-2.0, 0.0, 1.0, 2.0], dtype=np.float32))
+        assert pcm.dtype == np.int16
+        assert pcm.tolist() == [-32767, 0, 32767, 32767]